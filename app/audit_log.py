@@ -0,0 +1,178 @@
+'''
+
+Gravação assíncrona do log de operações (tabela Logs).
+As operações colocam os registros em uma fila em memória e seguem sem esperar o INSERT;
+uma thread de fundo grava os registros em lotes (por quantidade ou por tempo) com executemany,
+usando a sua própria conexão. A fila é limitada: se a gravação não acompanhar, quem registra
+o log espera até abrir espaço. Os registros pendentes são gravados no close_connection e
+ao encerrar o interpretador. Um lote que não pôde ser gravado não é descartado: ele é tentado
+de novo (com espera crescente) junto com os próximos, e o close falha se ainda restar algum.
+
+'''
+
+import atexit
+import queue
+import threading
+import time
+
+LOG_INSERT = '''
+    INSERT INTO Logs (text, datetime)
+    VALUES (?, ?)
+'''
+
+# Tentativas de gravar um lote antes de deixá-lo para a próxima rodada (espera WRITE_BACKOFF
+# segundos, dobrando a cada tentativa)
+WRITE_RETRIES = 4
+WRITE_BACKOFF = 0.1
+
+# Marcadores colocados na fila junto com os registros
+_FLUSH = object()
+_STOP = object()
+
+
+class AuditLogError(Exception):
+    """
+    Erro lançado no close quando há registros do log que não puderam ser gravados.
+
+    Attributes:
+        rows (list): Registros (texto, data e hora) ainda não gravados.
+    """
+    def __init__(self, rows, error):
+        self.rows = rows
+        super().__init__(f"{len(rows)} registros do log não gravados: {error}")
+
+
+class AuditLogWriter:
+    def __init__(self, db, batch_size=50, interval_ms=200, max_queue=1000):
+        """
+        Args:
+            db (DatabaseManager): Gerenciador do banco de dados (a thread de fundo abre a sua própria conexão).
+            batch_size (int): Máximo de registros gravados por executemany.
+            interval_ms (int): Tempo máximo (ms) que um registro espera por outros antes de o lote ser gravado.
+            max_queue (int): Tamanho máximo da fila; com a fila cheia, `put` espera.
+        """
+        self.db = db
+        self.batch_size = batch_size
+        self.interval = interval_ms / 1000
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        # Contadores para acompanhar a gravação
+        self.written = 0
+        self.batches = 0
+        # Registros cuja gravação falhou, tentados de novo no próximo lote, e o último erro
+        self._unwritten = []
+        self._error = None
+
+    def put(self, text, timestamp):
+        """
+        Coloca um registro na fila. Espera se a fila estiver cheia.
+
+        Args:
+            text (str): Texto do log.
+            timestamp (str): Data e hora da operação (formato: 'YYYY-MM-DD HH:MM:SS').
+        """
+        self._start()
+        self._queue.put((text, timestamp))
+
+    def flush(self):
+        """
+        Espera até que todos os registros colocados na fila estejam gravados.
+        """
+        if self._thread is None:
+            return
+        self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def close(self):
+        """
+        Grava os registros pendentes e encerra a thread de fundo. Um novo `put` inicia outra thread.
+
+        Raises:
+            AuditLogError: Se algum registro não pôde ser gravado (ele continua guardado para
+                uma nova tentativa, caso o log volte a ser usado).
+        """
+        with self._lock:
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(_STOP)
+                thread.join()
+                self._thread = None
+                atexit.unregister(self.close)
+        if self._unwritten:
+            raise AuditLogError(list(self._unwritten), self._error)
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-log", daemon=True)
+                self._thread.start()
+                # A thread é daemon: os registros pendentes são gravados ao encerrar o interpretador
+                atexit.register(self.close)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch, stop, received = self._next_batch()
+            try:
+                if batch or self._unwritten:
+                    self._write(batch)
+            finally:
+                # Cada item retirado da fila (registros e marcadores) conta para o flush
+                for _ in range(received):
+                    self._queue.task_done()
+
+    def _next_batch(self):
+        # Espera o primeiro registro e junta outros até completar o lote, até o tempo limite ou até um marcador.
+        # Retorna (registros, True se recebeu _STOP, quantidade de itens retirados da fila)
+        batch = []
+        received = 0
+        deadline = None
+        while len(batch) < self.batch_size:
+            if deadline is None:
+                item = self._queue.get()
+            else:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            received += 1
+            if item is _STOP:
+                return batch, True, received
+            if item is _FLUSH:
+                break
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.interval
+        return batch, False, received
+
+    def _write(self, batch):
+        # Registros que falharam antes vão primeiro, mantendo a ordem do log
+        rows = self._unwritten + batch
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                # Executado na thread de fundo: db.cursor é a conexão desta thread. Uma falha desfaz
+                # a transação inteira, então uma nova tentativa não duplica registros
+                self.db.write_transaction(lambda: self.db.cursor.executemany(LOG_INSERT, rows))
+            except Exception as e:
+                self._error = e
+                if attempt < WRITE_RETRIES:
+                    time.sleep(WRITE_BACKOFF * (2 ** attempt))
+                continue
+            self._unwritten = []
+            self._error = None
+            self.written += len(rows)
+            self.batches += 1
+            return
+        self._unwritten = rows
+        print(f"Audit log.....\033[91m{len(rows)} registros aguardando nova tentativa: {self._error}\033[0m")
+
+    def stats(self):
+        """
+        Returns:
+            dict: Registros gravados, lotes, registros aguardando nova tentativa e registros na fila.
+        """
+        return {"written": self.written, "batches": self.batches, "unwritten": len(self._unwritten), "queued": self._queue.qsize()}
@@ -0,0 +1,239 @@
+'''
+
+Carrinho da página de venda.
+O Cart guarda os itens em ordem de inclusão e mantém os totais (venda, custo e quantidade)
+atualizados a cada alteração, então ler um código de barras custa o mesmo no primeiro e no
+ducentésimo item. Ler de novo um código que já está no carrinho soma a quantidade na mesma linha.
+O CartModel exibe o carrinho nas QTableView avisando o Qt apenas da linha incluída, alterada ou removida.
+
+'''
+
+from dataclasses import dataclass
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
+
+from table_models import format_money
+
+
+@dataclass(slots=True)
+class CartLine:
+    # Número da linha no carrinho (informado pelo usuário para remover o item)
+    id: int
+    product_id: int
+    name: str
+    code: str
+    # Preços unitários no momento da leitura
+    sale_price: float
+    purchase_price: float
+    stock: int
+    quantity: int
+
+    @property
+    def sale_total(self):
+        return self.sale_price * self.quantity
+
+    @property
+    def purchase_total(self):
+        return self.purchase_price * self.quantity
+
+
+class Cart:
+    def __init__(self):
+        # Linhas na ordem de inclusão
+        self._lines = []
+        # Código do produto -> linha, e id da linha -> linha
+        self._by_code = {}
+        self._by_id = {}
+        # Posição de cada linha em _lines (refeito apenas quando uma linha é removida)
+        self._row_of = {}
+        self._next_id = 1
+        # Totais mantidos a cada alteração
+        self.sale_total = 0.0
+        self.purchase_total = 0.0
+        self.quantity = 0
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __iter__(self):
+        return iter(self._lines)
+
+    @property
+    def empty(self):
+        return not self._lines
+
+    def line_at(self, row):
+        return self._lines[row]
+
+    def row_of(self, line):
+        return self._row_of[line.id]
+
+    def get(self, line_id):
+        """
+        Retorna a linha com o id informado (None se não existir).
+        """
+        return self._by_id.get(line_id)
+
+    def find(self, code):
+        """
+        Retorna a linha do produto com o código informado (None se não estiver no carrinho).
+        """
+        return self._by_code.get(code)
+
+    def add(self, product, quantity):
+        """
+        Inclui um produto no carrinho. Se o código já estiver no carrinho, soma a quantidade na mesma linha.
+
+        Args:
+            product (Product): Produto lido (ver models.py).
+            quantity (int): Quantidade lida.
+
+        Returns:
+            tuple: (CartLine, True se a quantidade foi somada a uma linha existente)
+        """
+        line = self._by_code.get(product.code)
+        merged = line is not None
+        if merged:
+            line.quantity += quantity
+        else:
+            line = CartLine(self._next_id, product.id, product.name, product.code,
+                            float(product.sale_price), float(product.purchase_price), product.stock, quantity)
+            self._next_id += 1
+            self._row_of[line.id] = len(self._lines)
+            self._lines.append(line)
+            self._by_code[line.code] = line
+            self._by_id[line.id] = line
+        self.sale_total += line.sale_price * quantity
+        self.purchase_total += line.purchase_price * quantity
+        self.quantity += quantity
+        return line, merged
+
+    def remove(self, line_id):
+        """
+        Remove uma linha do carrinho.
+
+        Args:
+            line_id (int): Id da linha.
+
+        Returns:
+            tuple: (CartLine removida, posição que ela ocupava) ou None se o id não existir.
+        """
+        line = self._by_id.pop(line_id, None)
+        if line is None:
+            return None
+        row = self._row_of.pop(line_id)
+        del self._lines[row]
+        del self._by_code[line.code]
+        for position in range(row, len(self._lines)):
+            self._row_of[self._lines[position].id] = position
+        if self._lines:
+            self.sale_total -= line.sale_total
+            self.purchase_total -= line.purchase_total
+            self.quantity -= line.quantity
+        else:
+            # Carrinho vazio: zera os totais sem resíduos de arredondamento das subtrações
+            self.sale_total = 0.0
+            self.purchase_total = 0.0
+            self.quantity = 0
+        return line, row
+
+    def clear(self):
+        self._lines.clear()
+        self._by_code.clear()
+        self._by_id.clear()
+        self._row_of.clear()
+        self._next_id = 1
+        self.sale_total = 0.0
+        self.purchase_total = 0.0
+        self.quantity = 0
+
+    def items(self):
+        """
+        Itens no formato usado por SalesProcessor.checkout.
+
+        Returns:
+            list: Tuplas (código, quantidade), na ordem do carrinho.
+        """
+        return [(line.code, line.quantity) for line in self._lines]
+
+
+class CartModel(QAbstractTableModel):
+    # (cabeçalho, função que retorna o texto da célula)
+    COLUMNS = (
+        ("ID", lambda line: str(line.id)),
+        ("Nome", lambda line: line.name),
+        ("Código", lambda line: line.code),
+        ("Preço de Venda ( R$ )", lambda line: format_money(line.sale_total)),
+        ("Estoque", lambda line: str(line.stock)),
+        ("Quantidade", lambda line: str(line.quantity)),
+        ("Preço de Compra Total ( R$ )", lambda line: format_money(line.purchase_total)),
+    )
+
+    def __init__(self, cart=None):
+        """
+        Args:
+            cart (Cart, opcional): Carrinho exibido. None cria um carrinho vazio.
+        """
+        super().__init__()
+        self.cart = cart if cart is not None else Cart()
+
+    def rowCount(self, index=QModelIndex()):
+        return len(self.cart)
+
+    def columnCount(self, index=QModelIndex()):
+        return len(self.COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.COLUMNS[index.column()][1](self.cart.line_at(index.row()))
+        elif role == Qt.ItemDataRole.TextAlignmentRole:
+            # Centraliza o conteúdo das células
+            return Qt.AlignmentFlag.AlignCenter
+        return QVariant()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            if orientation == Qt.Orientation.Horizontal:
+                return self.COLUMNS[section][0]
+            else:
+                return str(section)
+
+    def add(self, product, quantity):
+        """
+        Inclui um produto no carrinho, avisando as tabelas apenas da linha nova ou alterada.
+
+        Returns:
+            CartLine: Linha incluída ou alterada.
+        """
+        line = self.cart.find(product.code)
+        if line is not None:
+            self.cart.add(product, quantity)
+            row = self.cart.row_of(line)
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+            return line
+        row = len(self.cart)
+        self.beginInsertRows(QModelIndex(), row, row)
+        line, _ = self.cart.add(product, quantity)
+        self.endInsertRows()
+        return line
+
+    def remove(self, line_id):
+        """
+        Remove uma linha do carrinho.
+
+        Returns:
+            CartLine: Linha removida, ou None se o id não existir.
+        """
+        line = self.cart.get(line_id)
+        if line is None:
+            return None
+        row = self.cart.row_of(line)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.cart.remove(line_id)
+        self.endRemoveRows()
+        return line
+
+    def clear(self):
+        self.beginResetModel()
+        self.cart.clear()
+        self.endResetModel()
@@ -0,0 +1,364 @@
+'''
+
+Gráficos da página inicial.
+Cada gráfico é descrito por um ChartSpec (tipo, títulos, widget onde aparece). Há dois modos:
+
+- "canvas": o canvas do matplotlib é criado uma única vez. Ao trocar o período ou recarregar a
+  página, apenas os dados das linhas e barras já existentes são substituídos e o canvas é
+  redesenhado quando o Qt estiver livre (draw_idle), sem criar uma nova figura nem refazer o layout.
+- "pixmap": o gráfico é desenhado fora da thread da interface (backend Agg, sem Qt) e exibido como
+  imagem em um QLabel. As imagens ficam em um cache LRU; um gráfico já desenhado aparece na hora e,
+  enquanto a versão nova é desenhada, a anterior continua na tela.
+
+Nos dois modos, dados iguais aos já exibidos não causam redesenho.
+
+'''
+
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from PyQt6.QtCore import QEvent, QObject, QRunnable, QThreadPool, QTimer, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtWidgets import QLabel, QSizePolicy, QVBoxLayout
+
+from lazy import LazyModule
+
+figure = LazyModule("matplotlib.figure")
+backend_qtagg = LazyModule("matplotlib.backends.backend_qt5agg")
+backend_agg = LazyModule("matplotlib.backends.backend_agg")
+
+CHART_KINDS = ("line", "bar")
+CHART_MODES = ("canvas", "pixmap")
+DPI = 100
+
+
+def load_matplotlib():
+    """
+    Importa o matplotlib usado pelos gráficos (pode ser chamado em segundo plano, antes do primeiro gráfico).
+    """
+    figure.load()
+    backend_qtagg.load()
+    backend_agg.load()
+
+
+@dataclass(slots=True)
+class ChartSpec:
+    kind: str
+    title: str
+    ylabel: str
+    xlabel: str = None
+    # Eixo da grade ("both", "x" ou "y")
+    grid: str = "both"
+    facecolor: str = None
+    # Limites do tamanho inicial da figura em pixels (largura, altura), no modo "canvas"
+    max_size: tuple = None
+    min_size: tuple = None
+
+
+def figure_size(spec, widget):
+    """
+    Tamanho da figura em pixels (largura, altura): o tamanho atual do widget dentro dos limites do gráfico.
+    """
+    width_px = widget.width()
+    height_px = widget.height()
+    if spec.max_size is not None:
+        width_px = min(width_px, spec.max_size[0])
+        height_px = min(height_px, spec.max_size[1])
+    if spec.min_size is not None:
+        width_px = max(width_px, spec.min_size[0])
+        height_px = max(height_px, spec.min_size[1])
+    return width_px, height_px
+
+
+def _setup_axes(fig, spec):
+    # Fundo, títulos e grade, iguais nos dois modos
+    if spec.facecolor is not None:
+        fig.patch.set_facecolor(spec.facecolor)
+        fig.patch.set_linewidth(0)
+    ax = fig.add_subplot(111)
+    ax.set_title(spec.title)
+    ax.set_ylabel(spec.ylabel)
+    if spec.xlabel is not None:
+        ax.set_xlabel(spec.xlabel)
+    ax.grid(True, axis=spec.grid)
+    return ax
+
+
+def render_image(spec, labels, values, title, size):
+    """
+    Desenha o gráfico com o backend Agg (sem Qt) e retorna a imagem.
+    Pode ser chamado fora da thread da interface: cada chamada usa a sua própria figura.
+
+    Args:
+        spec (ChartSpec): Descrição do gráfico.
+        labels (list): Rótulos do eixo x.
+        values (list): Valores do eixo y.
+        title (str): Título do gráfico.
+        size (tuple): Tamanho da imagem em pixels (largura, altura).
+
+    Returns:
+        QImage: Imagem do gráfico.
+    """
+    fig = figure.Figure(figsize=(size[0] / DPI, size[1] / DPI), dpi=DPI)
+    canvas = backend_agg.FigureCanvasAgg(fig)
+    ax = _setup_axes(fig, spec)
+    ax.set_title(title)
+    positions = range(len(values))
+    if spec.kind == "line":
+        ax.plot(positions, values, marker='o', linestyle='-', color='b')
+    else:
+        ax.bar(positions, values, color='b', alpha=0.7)
+    ax.set_xticks(positions)
+    ax.set_xticklabels(labels)
+    canvas.draw()
+    width, height = canvas.get_width_height()
+    # copy(): a imagem passa a ter os próprios bytes, independente do buffer da figura
+    return QImage(canvas.buffer_rgba(), width, height, width * 4, QImage.Format.Format_RGBA8888).copy()
+
+
+class _Chart:
+    __slots__ = ("spec", "widget", "figure", "canvas", "ax", "artists", "labels", "values", "title", "label", "key", "generation")
+
+    def __init__(self, spec, widget):
+        self.spec = spec
+        self.widget = widget
+        # Modo "canvas": figura, canvas, eixo e Line2D (linha) ou lista de Rectangle (barras)
+        self.figure = None
+        self.canvas = None
+        self.ax = None
+        self.artists = None
+        # Rótulos do eixo x, valores e título exibidos no momento (ou sendo desenhados)
+        self.labels = None
+        self.values = None
+        self.title = spec.title
+        # Modo "pixmap": QLabel que exibe a imagem, chave dos dados no cache e número do último pedido de desenho
+        self.label = None
+        self.key = None
+        self.generation = 0
+
+
+class _RenderSignals(QObject):
+    # (nome do gráfico, geração, (chave do cache, rótulos, valores, título), QImage)
+    finished = pyqtSignal(str, int, object, object)
+    failed = pyqtSignal(str, object)
+
+
+class _RenderTask(QRunnable):
+    def __init__(self, signals, name, generation, spec, size, entry):
+        super().__init__()
+        self.signals = signals
+        self.name = name
+        self.generation = generation
+        self.spec = spec
+        self.size = size
+        # (chave do cache, rótulos, valores, título)
+        self.entry = entry
+
+    def run(self):
+        _, labels, values, title = self.entry
+        try:
+            image = render_image(self.spec, labels, values, title, self.size)
+        except Exception as error:
+            self.signals.failed.emit(self.name, error)
+            return
+        self.signals.finished.emit(self.name, self.generation, self.entry, image)
+
+
+class ChartManager(QObject):
+    def __init__(self, mode="canvas", cache_size=32, parent=None):
+        """
+        Args:
+            mode (str): "canvas" (canvas do matplotlib atualizado no lugar) ou "pixmap"
+                (imagens desenhadas em segundo plano e guardadas em cache).
+            cache_size (int): No modo "pixmap", número máximo de imagens em memória (LRU).
+            parent (QObject, opcional): Objeto pai no Qt.
+        """
+        super().__init__(parent)
+        if mode not in CHART_MODES:
+            raise ValueError(f"Modo de gráfico inválido: {mode!r}. Use um de {CHART_MODES}")
+        self.mode = mode
+        self.cache_size = cache_size
+        # Nome do gráfico -> _Chart
+        self._charts = {}
+        # (nome, chave do chamador, tamanho) -> (rótulos, valores, título, QPixmap), na ordem de uso
+        self._images = OrderedDict()
+        # Uma única thread de desenho: os gráficos são desenhados um de cada vez, na ordem dos pedidos
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = _RenderSignals()
+        self.signals.finished.connect(self._rendered)
+        self.signals.failed.connect(self._render_failed)
+        # Gráficos que mudaram de tamanho ou apareceram na tela, redesenhados juntos quando o redimensionamento para
+        self._resized = set()
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(100)
+        self._resize_timer.timeout.connect(self._redraw_resized)
+
+    def register(self, name, widget, spec):
+        """
+        Associa um gráfico a um widget da interface. O canvas (ou QLabel) só é criado na primeira atualização.
+
+        Args:
+            name (str): Nome usado para atualizar o gráfico.
+            widget (QWidget): Widget (criado no QtDesigner) que recebe o gráfico.
+            spec (ChartSpec): Descrição do gráfico.
+        """
+        if spec.kind not in CHART_KINDS:
+            raise ValueError(f"Tipo de gráfico inválido: {spec.kind!r}")
+        self._charts[name] = _Chart(spec, widget)
+
+    def update(self, name, labels, values, title=None, key=None):
+        """
+        Substitui os dados de um gráfico e agenda o redesenho.
+
+        Args:
+            name (str): Nome do gráfico registrado.
+            labels (Iterable): Rótulos do eixo x (um por ponto ou barra).
+            values (Iterable): Valores do eixo y.
+            title (str, opcional): Novo título (ex.: "por Mês" ou "por Dia", conforme o período).
+            key (tuple, opcional): No modo "pixmap", identifica os dados no cache de imagens,
+                normalmente (período, versão dos dados). Sem key, os próprios dados são a chave.
+
+        Returns:
+            bool: False se os dados e o título eram os mesmos já exibidos (nada foi redesenhado).
+        """
+        chart = self._charts[name]
+        labels = [str(label) for label in labels]
+        values = [float(value) for value in values]
+        if title is None:
+            title = chart.title
+        if labels == chart.labels and values == chart.values and title == chart.title:
+            return False
+        if self.mode == "canvas":
+            self._update_canvas(chart, labels, values, title)
+        chart.labels = labels
+        chart.values = values
+        chart.title = title
+        if self.mode == "pixmap":
+            chart.key = key
+            self._update_pixmap(name, chart)
+        return True
+
+    def canvas(self, name):
+        """
+        Retorna o widget que exibe o gráfico: o canvas no modo "canvas" ou o QLabel no modo
+        "pixmap" (None se ainda não foi desenhado).
+        """
+        chart = self._charts[name]
+        return chart.label if self.mode == "pixmap" else chart.canvas
+
+    def wait(self):
+        """
+        Aguarda os desenhos em andamento terminarem (usado ao fechar a janela).
+        """
+        self.pool.waitForDone()
+
+    def _update_canvas(self, chart, labels, values, title):
+        if chart.canvas is None:
+            self._create(chart)
+        positions = range(len(values))
+
+        if chart.spec.kind == "line":
+            chart.artists.set_data(positions, values)
+        else:
+            self._set_bars(chart, values)
+
+        # Rótulos só são trocados quando mudam (o layout dos rótulos é a parte cara do desenho)
+        if labels != chart.labels:
+            chart.ax.set_xticks(positions)
+            chart.ax.set_xticklabels(labels)
+        if title != chart.ax.get_title():
+            chart.ax.set_title(title)
+
+        chart.ax.relim()
+        chart.ax.autoscale_view()
+        chart.canvas.draw_idle()
+
+    def _create(self, chart):
+        # Figura, eixo e artistas vazios, criados uma única vez por gráfico
+        width_px, height_px = figure_size(chart.spec, chart.widget)
+        chart.figure = figure.Figure(figsize=(width_px / DPI, height_px / DPI), dpi=DPI)
+        chart.canvas = backend_qtagg.FigureCanvasQTAgg(chart.figure)
+        chart.ax = _setup_axes(chart.figure, chart.spec)
+        if chart.spec.kind == "line":
+            chart.artists, = chart.ax.plot([], [], marker='o', linestyle='-', color='b')
+        else:
+            chart.artists = []
+        self._place(chart, chart.canvas)
+
+    def _set_bars(self, chart, values):
+        bars = chart.artists
+        # Mesma quantidade de barras: só as alturas mudam
+        if len(bars) == len(values):
+            for bar, value in zip(bars, values):
+                bar.set_height(value)
+            return
+        for bar in bars:
+            bar.remove()
+        chart.artists = list(chart.ax.bar(range(len(values)), values, color='b', alpha=0.7))
+
+    def _update_pixmap(self, name, chart):
+        if chart.label is None:
+            chart.label = QLabel()
+            chart.label.setObjectName(name)
+            chart.label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            # O tamanho da imagem segue o do QLabel, e não o contrário
+            chart.label.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
+            chart.label.installEventFilter(self)
+            self._place(chart, chart.label)
+        # Fora da tela o QLabel ainda não tem o tamanho final: o desenho espera ele aparecer
+        if not chart.label.isVisible():
+            return
+        size = (chart.label.width(), chart.label.height())
+        labels, values, title = chart.labels, chart.values, chart.title
+        cache_key = (name, chart.key if chart.key is not None else (tuple(labels), tuple(values), title), size)
+        chart.generation += 1
+
+        cached = self._images.get(cache_key)
+        # A chave vem do chamador: a imagem só é reaproveitada se foi desenhada com os mesmos dados
+        if cached is not None and cached[:3] == (labels, values, title):
+            self._images.move_to_end(cache_key)
+            chart.label.setPixmap(cached[3])
+            return
+        # A imagem anterior continua na tela até a nova ficar pronta
+        entry = (cache_key, labels, values, title)
+        self.pool.start(_RenderTask(self.signals, name, chart.generation, chart.spec, size, entry))
+
+    def eventFilter(self, watched, event):
+        # QLabel de um gráfico apareceu ou mudou de tamanho: redesenha no tamanho novo
+        if event.type() in (QEvent.Type.Show, QEvent.Type.Resize) and watched.objectName() in self._charts:
+            self._resized.add(watched.objectName())
+            self._resize_timer.start()
+        return False
+
+    def _redraw_resized(self):
+        for name in self._resized:
+            chart = self._charts[name]
+            if chart.values is not None:
+                self._update_pixmap(name, chart)
+        self._resized.clear()
+
+    def _rendered(self, name, generation, entry, image):
+        cache_key, labels, values, title = entry
+        pixmap = QPixmap.fromImage(image)
+        self._images[cache_key] = (labels, values, title, pixmap)
+        self._images.move_to_end(cache_key)
+        while len(self._images) > self.cache_size:
+            self._images.popitem(last=False)
+        # Desenho superado por um pedido mais recente do mesmo gráfico: fica só no cache
+        chart = self._charts[name]
+        if generation == chart.generation:
+            chart.label.setPixmap(pixmap)
+
+    def _render_failed(self, name, error):
+        print(f"Chart ({name}).....\033[91m{error}\033[0m")
+
+    @staticmethod
+    def _place(chart, widget):
+        # Coloca o canvas (ou QLabel) no widget do QtDesigner
+        layout = chart.widget.layout()
+        if layout is None:
+            layout = QVBoxLayout(chart.widget)
+            chart.widget.setLayout(layout)
+        layout.addWidget(widget)
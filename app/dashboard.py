@@ -0,0 +1,162 @@
+'''
+
+Agregação dos dados dos gráficos da página inicial.
+O resumo diário das vendas (DailySales) é lido uma vez; as datas são convertidas uma única vez
+e as séries por dia e por mês (faturamento, lucro e somas acumuladas) são calculadas a partir dele,
+sem que cada gráfico copie e reagrupe as vendas por conta própria. Os recortes por período ficam
+guardados até chegarem vendas novas, que são somadas ao resumo sem reler o histórico (ver fold).
+
+'''
+
+from lazy import LazyModule
+
+pd = LazyModule("pandas")
+
+# Formato dos rótulos do eixo x
+DAY_LABEL = "%d"
+MONTH_LABEL = "%b"
+
+
+class DashboardAggregator:
+    def __init__(self, daily_sales, last_sale_id=0, versions=None):
+        """
+        Args:
+            daily_sales (DataFrame): Resumo diário de todas as vendas (ver DatabaseManager.fetch_sales_since),
+                com as colunas sale_date, total_value e profit, ordenado por data.
+            last_sale_id (int): Maior id de venda incluído no resumo.
+            versions (dict, opcional): Versões dos dados (tabela DataVersion) no momento da leitura.
+        """
+        self._set(self._parse(daily_sales), last_sale_id, versions)
+
+    def _set(self, daily, last_sale_id, versions):
+        self.daily = daily
+        self.last_sale_id = last_sale_id
+        self.versions = versions
+        # Meses de cada dia; o índice ordenado permite recortar períodos por busca binária
+        self._months = daily.index.to_period("M")
+        # (tipo, data inicial, data final) -> DataFrame já agregado
+        self._cache = {}
+
+    @staticmethod
+    def _parse(daily_sales):
+        # Datas convertidas uma única vez, como índice do resumo
+        dates = pd.DatetimeIndex(pd.to_datetime(daily_sales["sale_date"]), name="date")
+        return pd.DataFrame({
+            "revenue": daily_sales["total_value"].to_numpy(dtype=float),
+            "profit": daily_sales["profit"].to_numpy(dtype=float),
+        }, index=dates)
+
+    def fold(self, new_sales, last_sale_id, versions):
+        """
+        Soma as vendas novas ao resumo. O agregador atual não é alterado (pode estar em uso
+        pela interface); o resultado é um novo agregador, ou este mesmo se nada mudou.
+
+        Args:
+            new_sales (DataFrame): Resumo diário apenas das vendas novas (mesmas colunas do construtor).
+            last_sale_id (int): Maior id de venda após as vendas novas.
+            versions (dict): Versões dos dados no momento da leitura das vendas novas.
+
+        Returns:
+            DashboardAggregator: Agregador com as vendas novas.
+        """
+        if new_sales.empty and last_sale_id == self.last_sale_id and versions == self.versions:
+            return self
+        folded = DashboardAggregator.__new__(DashboardAggregator)
+        if new_sales.empty:
+            folded._set(self.daily, last_sale_id, versions)
+            # Mesmo resumo: os recortes já calculados continuam válidos
+            folded._cache = self._cache
+            return folded
+        # Só as vendas novas são convertidas; dias que já existiam no resumo são somados
+        daily = pd.concat([self.daily, self._parse(new_sales)]).groupby(level=0, sort=True).sum()
+        folded._set(daily, last_sale_id, versions)
+        return folded
+
+    @property
+    def empty(self):
+        return self.daily.empty
+
+    @property
+    def version(self):
+        """
+        Versão dos dados do painel: muda quando há venda nova ou quando vendas ou produtos são alterados.
+        """
+        versions = self.versions or {}
+        return (self.last_sale_id, versions.get("Sales"), versions.get("Product"))
+
+    def days(self, date_from=None, date_to=None):
+        """
+        Faturamento e lucro por dia no período.
+
+        Args:
+            date_from (str, opcional): Data inicial, inclusive (formato: 'YYYY-MM-DD').
+            date_to (str, opcional): Data final, inclusive (formato: 'YYYY-MM-DD').
+
+        Returns:
+            DataFrame: Colunas label (dia), revenue, profit, cumulative_revenue e cumulative_profit.
+        """
+        key = ("days", date_from, date_to)
+        if key not in self._cache:
+            start, stop = self._bounds(date_from, date_to)
+            self._cache[key] = self._summary(self.daily.iloc[start:stop], self.daily.index[start:stop].strftime(DAY_LABEL))
+        return self._cache[key]
+
+    def months(self, date_from=None, date_to=None):
+        """
+        Faturamento e lucro por mês no período.
+
+        Args:
+            date_from (str, opcional): Data inicial, inclusive (formato: 'YYYY-MM-DD').
+            date_to (str, opcional): Data final, inclusive (formato: 'YYYY-MM-DD').
+
+        Returns:
+            DataFrame: Colunas label (mês abreviado), revenue, profit, cumulative_revenue e cumulative_profit.
+        """
+        key = ("months", date_from, date_to)
+        if key not in self._cache:
+            start, stop = self._bounds(date_from, date_to)
+            monthly = self.daily.iloc[start:stop].groupby(self._months[start:stop], sort=True).sum()
+            self._cache[key] = self._summary(monthly, monthly.index.strftime(MONTH_LABEL))
+        return self._cache[key]
+
+    def period(self, date_from=None, date_to=None):
+        """
+        Série do período com a granularidade dos gráficos filtrados: por mês quando o período
+        tem vendas em mais de um mês, senão por dia.
+
+        Returns:
+            tuple: (DataFrame como em days/months, True se agrupado por mês)
+        """
+        start, stop = self._bounds(date_from, date_to)
+        by_month = len(self._months[start:stop].unique()) > 1
+        if by_month:
+            return self.months(date_from, date_to), True
+        return self.days(date_from, date_to), False
+
+    def current_month(self, today):
+        """
+        Faturamento e lucro por dia, do primeiro dia do mês de `today` em diante.
+
+        Args:
+            today (datetime): Data de referência (normalmente datetime.now()).
+        """
+        return self.days(date_from=today.replace(day=1).strftime("%Y-%m-%d"))
+
+    def _bounds(self, date_from, date_to):
+        # Posições [início, fim) do período no índice de datas
+        index = self.daily.index
+        start = 0 if date_from is None else index.searchsorted(pd.Timestamp(date_from), side="left")
+        stop = len(index) if date_to is None else index.searchsorted(pd.Timestamp(date_to), side="right")
+        return start, stop
+
+    @staticmethod
+    def _summary(frame, labels):
+        # Valores do período e somas acumuladas, calculados de uma vez para todas as colunas
+        cumulative = frame[["revenue", "profit"]].cumsum()
+        return pd.DataFrame({
+            "label": labels,
+            "revenue": frame["revenue"].to_numpy(),
+            "profit": frame["profit"].to_numpy(),
+            "cumulative_revenue": cumulative["revenue"].to_numpy(),
+            "cumulative_profit": cumulative["profit"].to_numpy(),
+        })
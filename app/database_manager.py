@@ -9,20 +9,765 @@ Além disso, será responsável por criar as tabelas necessárias, fazer consult
 '''
 
 
+import re
 import sqlite3
-import pandas as pd
+import sys
+import threading
+import time
 import random
+from contextlib import contextmanager
 from datetime import datetime
+from models import ROW_TYPES, ROW_COLUMNS
+from audit_log import AuditLogWriter, AuditLogError, LOG_INSERT
+from lazy import LazyModule
+
+# pandas é usado apenas nas consultas que retornam DataFrame (relatórios, tabelas),
+# então só é carregado no primeiro uso (ver lazy.py)
+pd = LazyModule("pandas")
+
+
+# Níveis de durabilidade aceitos pelo DatabaseManager
+#   full    -> commit (fsync) a cada operação
+#   grouped -> operações compartilham um commit a cada N operações ou T milissegundos
+#   relaxed -> como grouped, mas com PRAGMA synchronous = OFF (o sistema operacional decide quando gravar no disco)
+DURABILITY_MODES = ("full", "grouped", "relaxed")
+
+# Gravação do log de operações (tabela Logs)
+#   async  -> os registros vão para uma fila e são gravados em lotes por uma thread de fundo (ver audit_log.py)
+#   strict -> cada registro é gravado na mesma transação da operação que ele descreve
+AUDIT_MODES = ("async", "strict")
+
+# Escritas concorrentes (vários caixas no mesmo banco): se o lock de escrita não for obtido dentro do
+# busy_timeout, a transação é refeita até BUSY_RETRIES vezes, esperando BUSY_BACKOFF segundos
+# (dobrando a cada tentativa, com variação aleatória para os caixas não tentarem juntos)
+BUSY_RETRIES = 5
+BUSY_BACKOFF = 0.05
+
+# Operadores aceitos nos filtros de fetch_page
+FILTER_OPERATORS = ("=", "<", "<=", ">", ">=")
+
+# Perfis de PRAGMA aplicados ao conectar
+#   register    -> caixa: WAL para leituras concorrentes com a venda, cache moderado
+#   back-office -> relatórios: cache e mmap maiores, espera mais longa por locks
+#   bulk-load   -> cargas em massa: sem fsync, cache grande
+# cache_size negativo é em KiB (ex.: -16000 = ~16 MB)
+PRAGMA_PROFILES = {
+    "register": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -16000,
+        "mmap_size": 64 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    "back-office": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 15000,
+    },
+    "bulk-load": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -128000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+}
+
+
+# Recalcula a tabela DailySales a partir de todas as vendas
+DAILY_SALES_BACKFILL = '''
+    INSERT INTO DailySales (sale_date, payment, revenue, profit, sale_count)
+    SELECT sale_date, payment, SUM(total_value), SUM(COALESCE(profit, 0)), COUNT(*)
+    FROM Sales
+    GROUP BY sale_date, payment
+'''
+
+# Recalcula a tabela ProductDailySales a partir de todos os itens vendidos
+PRODUCT_DAILY_SALES_BACKFILL = '''
+    INSERT INTO ProductDailySales (sale_date, product_id, quantity, revenue, profit)
+    SELECT s.sale_date, sp.product_id, SUM(sp.quantity), SUM(sp.quantity * COALESCE(sp.unit_price, 0)),
+           SUM(sp.quantity * (COALESCE(sp.unit_price, 0) - COALESCE(sp.unit_cost, 0)))
+    FROM SalesProduct sp
+    JOIN Sales s ON s.id = sp.sale_id
+    GROUP BY s.sale_date, sp.product_id
+'''
+
+
+def _add_column(table_name, column_name, definition):
+    """
+    Passo de migração que adiciona uma coluna apenas se ela ainda não existir.
+    """
+    def step(cursor):
+        cursor.execute(f"PRAGMA table_info({table_name})")
+        if column_name not in [column[1] for column in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {definition}")
+    return step
+
+
+def _product_daily_delta(row, sign):
+    """
+    SQL de trigger que soma (sign='+') ou subtrai (sign='-') um item vendido
+    (NEW ou OLD de SalesProduct) no resumo ProductDailySales do dia da venda.
+    """
+    # NEW.unit_price pode estar vazio na inserção, por isso o preço é lido da própria linha
+    source = "SalesProduct sp WHERE sp.id = NEW.id AND" if row == "NEW" else "(SELECT 1) WHERE"
+    price = "sp.unit_price" if row == "NEW" else "OLD.unit_price"
+    cost = "sp.unit_cost" if row == "NEW" else "OLD.unit_cost"
+    return f'''
+        INSERT INTO ProductDailySales (sale_date, product_id, quantity, revenue, profit)
+        SELECT (SELECT sale_date FROM Sales WHERE id = {row}.sale_id), {row}.product_id,
+               {sign}{row}.quantity,
+               {sign}{row}.quantity * COALESCE({price}, 0),
+               {sign}{row}.quantity * (COALESCE({price}, 0) - COALESCE({cost}, 0))
+        FROM {source} EXISTS (SELECT 1 FROM Sales WHERE id = {row}.sale_id)
+        ON CONFLICT (sale_date, product_id) DO UPDATE
+        SET quantity = quantity + excluded.quantity,
+            revenue = revenue + excluded.revenue,
+            profit = profit + excluded.profit;
+    '''
+
+
+# Tabelas de busca textual (FTS5): tabela de origem -> (tabela FTS, colunas indexadas)
+SEARCH_TABLES = {
+    "Product": ("ProductSearch", ("name", "description", "code")),
+    "Customer": ("CustomerSearch", ("name", "cpf", "email")),
+}
+
+
+def _search_table(table_name):
+    """
+    Passos de migração que criam a tabela FTS5 de uma tabela e os triggers que a mantêm sincronizada.
+    A tabela FTS é "external content": guarda apenas o índice e lê os textos da tabela de origem.
+    """
+    search_table, columns = SEARCH_TABLES[table_name]
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"NEW.{column}" for column in columns)
+    old_values = ", ".join(f"OLD.{column}" for column in columns)
+    # Remoção de uma linha do índice (comando 'delete' do FTS5, com os valores antigos)
+    delete_old = f"INSERT INTO {search_table} ({search_table}, rowid, {column_list}) VALUES ('delete', OLD.id, {old_values});"
+    insert_new = f"INSERT INTO {search_table} (rowid, {column_list}) VALUES (NEW.id, {new_values});"
+    return [
+        # unicode61 com remove_diacritics: "joao" encontra "João"; prefix acelera as buscas por prefixo de 2 e 3 letras
+        f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {search_table} USING fts5(
+                {column_list},
+                content='{table_name}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        ''',
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table_name.lower()}_insert_search AFTER INSERT ON {table_name} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table_name.lower()}_delete_search AFTER DELETE ON {table_name} BEGIN {delete_old} END",
+        # Só reindexa quando um campo pesquisável muda (a baixa de estoque de cada venda não toca no índice)
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table_name.lower()}_update_search AFTER UPDATE OF {column_list} ON {table_name} BEGIN {delete_old} {insert_new} END",
+        # Indexando as linhas já existentes
+        f"INSERT INTO {search_table} ({search_table}) VALUES ('rebuild')",
+    ]
+
+# Migrações do esquema, aplicadas em ordem na abertura do banco.
+# A versão aplicada fica registrada em PRAGMA user_version, assim cada migração roda uma única vez.
+# Cada item é (versão, descrição, passos). Um passo é um comando SQL ou uma função que recebe o cursor.
+# Nunca altere uma migração já publicada: adicione uma nova ao final da lista.
+MIGRATIONS = [
+    (1, "Índices das consultas mais frequentes", [
+        # Itens de uma venda (delete_sale, detalhes da venda) - cobre product_id e quantity
+        "CREATE INDEX IF NOT EXISTS idx_salesproduct_sale ON SalesProduct (sale_id, product_id, quantity)",
+        # Vendas de um produto (gráfico de produtos mais vendidos)
+        "CREATE INDEX IF NOT EXISTS idx_salesproduct_product ON SalesProduct (product_id, sale_id, quantity)",
+        # Filtros por data nos gráficos e relatórios - cobre os valores somados
+        "CREATE INDEX IF NOT EXISTS idx_sales_date ON Sales (sale_date, total_value, profit)",
+        # Compras de um cliente
+        "CREATE INDEX IF NOT EXISTS idx_sales_customer ON Sales (customer_id, sale_date)",
+        # Busca e ordenação de clientes pelo nome
+        "CREATE INDEX IF NOT EXISTS idx_customer_name ON Customer (name)",
+        # Filtro do log por data
+        "CREATE INDEX IF NOT EXISTS idx_logs_datetime ON Logs (datetime)",
+    ]),
+    (2, "Tabela DailySales com o resumo diário das vendas", [
+        # Uma linha por dia e forma de pagamento, mantida pelos triggers abaixo
+        '''
+            CREATE TABLE IF NOT EXISTS DailySales (
+                sale_date TEXT NOT NULL,
+                payment INTEGER NOT NULL,
+                revenue REAL NOT NULL DEFAULT 0.0,
+                profit REAL NOT NULL DEFAULT 0.0,
+                sale_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (sale_date, payment)
+            ) WITHOUT ROWID
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_sales_insert_daily AFTER INSERT ON Sales
+            BEGIN
+                INSERT INTO DailySales (sale_date, payment, revenue, profit, sale_count)
+                VALUES (NEW.sale_date, NEW.payment, NEW.total_value, COALESCE(NEW.profit, 0), 1)
+                ON CONFLICT (sale_date, payment) DO UPDATE
+                SET revenue = revenue + excluded.revenue,
+                    profit = profit + excluded.profit,
+                    sale_count = sale_count + 1;
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_sales_delete_daily AFTER DELETE ON Sales
+            BEGIN
+                UPDATE DailySales
+                SET revenue = revenue - OLD.total_value,
+                    profit = profit - COALESCE(OLD.profit, 0),
+                    sale_count = sale_count - 1
+                WHERE sale_date = OLD.sale_date AND payment = OLD.payment;
+                DELETE FROM DailySales
+                WHERE sale_date = OLD.sale_date AND payment = OLD.payment AND sale_count <= 0;
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_sales_update_daily
+            AFTER UPDATE OF sale_date, payment, total_value, profit ON Sales
+            BEGIN
+                UPDATE DailySales
+                SET revenue = revenue - OLD.total_value,
+                    profit = profit - COALESCE(OLD.profit, 0),
+                    sale_count = sale_count - 1
+                WHERE sale_date = OLD.sale_date AND payment = OLD.payment;
+                DELETE FROM DailySales
+                WHERE sale_date = OLD.sale_date AND payment = OLD.payment AND sale_count <= 0;
+                INSERT INTO DailySales (sale_date, payment, revenue, profit, sale_count)
+                VALUES (NEW.sale_date, NEW.payment, NEW.total_value, COALESCE(NEW.profit, 0), 1)
+                ON CONFLICT (sale_date, payment) DO UPDATE
+                SET revenue = revenue + excluded.revenue,
+                    profit = profit + excluded.profit,
+                    sale_count = sale_count + 1;
+            END
+        ''',
+        # Preenchendo o resumo com as vendas já existentes
+        "DELETE FROM DailySales",
+        DAILY_SALES_BACKFILL,
+    ]),
+    (3, "Preço por item vendido e tabela ProductDailySales", [
+        # Guardando o preço de venda e de custo no momento da venda, o resumo não muda se o produto for reajustado
+        _add_column("SalesProduct", "unit_price", "REAL"),
+        _add_column("SalesProduct", "unit_cost", "REAL"),
+        '''
+            UPDATE SalesProduct
+            SET unit_price = (SELECT sale_price FROM Product WHERE Product.id = SalesProduct.product_id),
+                unit_cost = (SELECT purchase_price FROM Product WHERE Product.id = SalesProduct.product_id)
+            WHERE unit_price IS NULL OR unit_cost IS NULL
+        ''',
+        # Uma linha por dia e produto, mantida pelos triggers abaixo
+        '''
+            CREATE TABLE IF NOT EXISTS ProductDailySales (
+                sale_date TEXT NOT NULL,
+                product_id INTEGER NOT NULL,
+                quantity INTEGER NOT NULL DEFAULT 0,
+                revenue REAL NOT NULL DEFAULT 0.0,
+                profit REAL NOT NULL DEFAULT 0.0,
+                PRIMARY KEY (sale_date, product_id)
+            ) WITHOUT ROWID
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_salesproduct_insert_daily AFTER INSERT ON SalesProduct
+            BEGIN
+                -- Itens inseridos sem preço recebem o preço atual do produto
+                UPDATE SalesProduct
+                SET unit_price = COALESCE(NEW.unit_price, (SELECT sale_price FROM Product WHERE id = NEW.product_id)),
+                    unit_cost = COALESCE(NEW.unit_cost, (SELECT purchase_price FROM Product WHERE id = NEW.product_id))
+                WHERE id = NEW.id AND (NEW.unit_price IS NULL OR NEW.unit_cost IS NULL);
+                ''' + _product_daily_delta("NEW", "+") + '''
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_salesproduct_delete_daily AFTER DELETE ON SalesProduct
+            BEGIN
+                ''' + _product_daily_delta("OLD", "-") + '''
+                DELETE FROM ProductDailySales
+                WHERE sale_date = (SELECT sale_date FROM Sales WHERE id = OLD.sale_id) AND product_id = OLD.product_id AND quantity <= 0;
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_salesproduct_update_daily
+            AFTER UPDATE OF sale_id, product_id, quantity ON SalesProduct
+            BEGIN
+                ''' + _product_daily_delta("OLD", "-") + '''
+                ''' + _product_daily_delta("NEW", "+") + '''
+                DELETE FROM ProductDailySales
+                WHERE sale_date = (SELECT sale_date FROM Sales WHERE id = OLD.sale_id) AND product_id = OLD.product_id AND quantity <= 0;
+            END
+        ''',
+        # Mudar a data de uma venda move todos os seus itens para o novo dia
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_sales_update_product_daily AFTER UPDATE OF sale_date ON Sales
+            BEGIN
+                INSERT INTO ProductDailySales (sale_date, product_id, quantity, revenue, profit)
+                SELECT OLD.sale_date, product_id, -SUM(quantity), -SUM(quantity * COALESCE(unit_price, 0)),
+                       -SUM(quantity * (COALESCE(unit_price, 0) - COALESCE(unit_cost, 0)))
+                FROM SalesProduct WHERE sale_id = OLD.id GROUP BY product_id
+                ON CONFLICT (sale_date, product_id) DO UPDATE
+                SET quantity = quantity + excluded.quantity,
+                    revenue = revenue + excluded.revenue,
+                    profit = profit + excluded.profit;
+                INSERT INTO ProductDailySales (sale_date, product_id, quantity, revenue, profit)
+                SELECT NEW.sale_date, product_id, SUM(quantity), SUM(quantity * COALESCE(unit_price, 0)),
+                       SUM(quantity * (COALESCE(unit_price, 0) - COALESCE(unit_cost, 0)))
+                FROM SalesProduct WHERE sale_id = NEW.id GROUP BY product_id
+                ON CONFLICT (sale_date, product_id) DO UPDATE
+                SET quantity = quantity + excluded.quantity,
+                    revenue = revenue + excluded.revenue,
+                    profit = profit + excluded.profit;
+                DELETE FROM ProductDailySales WHERE quantity <= 0 AND sale_date = OLD.sale_date;
+            END
+        ''',
+        # Preenchendo o resumo com os itens já vendidos
+        "DELETE FROM ProductDailySales",
+        PRODUCT_DAILY_SALES_BACKFILL,
+    ]),
+    (4, "Busca textual (FTS5) de produtos e clientes", [
+        *_search_table("Product"),
+        *_search_table("Customer"),
+    ]),
+    (5, "Tabela DataVersion com a versão dos dados do painel", [
+        # Contadores incrementados pelos triggers abaixo, na mesma transação da alteração.
+        # Vendas novas não mudam a versão "Sales": o painel as encontra pelo id (ver fetch_sales_since)
+        '''
+            CREATE TABLE IF NOT EXISTS DataVersion (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''',
+        "INSERT OR IGNORE INTO DataVersion (name, version) VALUES ('Sales', 0), ('Product', 0)",
+        # Venda já registrada editada ou removida: o painel precisa ser recalculado por completo
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_sales_update_version
+            AFTER UPDATE OF sale_date, payment, total_value, profit ON Sales
+            BEGIN
+                UPDATE DataVersion SET version = version + 1 WHERE name = 'Sales';
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_sales_delete_version AFTER DELETE ON Sales
+            BEGIN
+                UPDATE DataVersion SET version = version + 1 WHERE name = 'Sales';
+            END
+        ''',
+        # Produtos e itens vendidos: mudam os gráficos de estoque e de produtos mais vendidos
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_product_insert_version AFTER INSERT ON Product
+            BEGIN
+                UPDATE DataVersion SET version = version + 1 WHERE name = 'Product';
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_product_update_version AFTER UPDATE OF name, stock ON Product
+            BEGIN
+                UPDATE DataVersion SET version = version + 1 WHERE name = 'Product';
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_product_delete_version AFTER DELETE ON Product
+            BEGIN
+                UPDATE DataVersion SET version = version + 1 WHERE name = 'Product';
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_salesproduct_update_version
+            AFTER UPDATE OF sale_id, product_id, quantity ON SalesProduct
+            BEGIN
+                UPDATE DataVersion SET version = version + 1 WHERE name = 'Product';
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_salesproduct_delete_version AFTER DELETE ON SalesProduct
+            BEGIN
+                UPDATE DataVersion SET version = version + 1 WHERE name = 'Product';
+            END
+        ''',
+    ]),
+    (6, "Versão do cadastro de produtos na tabela DataVersion", [
+        # Qualquer alteração em Product (inclusive preço, código e descrição) muda a versão "Catalog",
+        # usada pelo ProductCatalog para descartar os produtos em memória alterados por outro caixa
+        "INSERT OR IGNORE INTO DataVersion (name, version) VALUES ('Catalog', 0)",
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_product_insert_catalog AFTER INSERT ON Product
+            BEGIN
+                UPDATE DataVersion SET version = version + 1 WHERE name = 'Catalog';
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_product_update_catalog AFTER UPDATE ON Product
+            BEGIN
+                UPDATE DataVersion SET version = version + 1 WHERE name = 'Catalog';
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_product_delete_catalog AFTER DELETE ON Product
+            BEGIN
+                UPDATE DataVersion SET version = version + 1 WHERE name = 'Catalog';
+            END
+        ''',
+    ]),
+    (7, "Itens gravados antes ou depois da própria venda no resumo ProductDailySales", [
+        # Itens que já apontavam para o id de uma venda nova (ex.: restos de uma venda removida sem os itens)
+        # passam a contar quando a venda é inserida, como em rebuild_rollups. insert_full_sale grava
+        # a venda antes dos itens, então aqui não há nada a somar nesse caso
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_sales_insert_product_daily AFTER INSERT ON Sales
+            BEGIN
+                INSERT INTO ProductDailySales (sale_date, product_id, quantity, revenue, profit)
+                SELECT NEW.sale_date, product_id, SUM(quantity), SUM(quantity * COALESCE(unit_price, 0)),
+                       SUM(quantity * (COALESCE(unit_price, 0) - COALESCE(unit_cost, 0)))
+                FROM SalesProduct WHERE sale_id = NEW.id GROUP BY product_id
+                ON CONFLICT (sale_date, product_id) DO UPDATE
+                SET quantity = quantity + excluded.quantity,
+                    revenue = revenue + excluded.revenue,
+                    profit = profit + excluded.profit;
+            END
+        ''',
+        # Venda removida sem remover os itens: eles deixam de contar (delete_sale remove os itens antes)
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_sales_delete_product_daily AFTER DELETE ON Sales
+            BEGIN
+                INSERT INTO ProductDailySales (sale_date, product_id, quantity, revenue, profit)
+                SELECT OLD.sale_date, product_id, -SUM(quantity), -SUM(quantity * COALESCE(unit_price, 0)),
+                       -SUM(quantity * (COALESCE(unit_price, 0) - COALESCE(unit_cost, 0)))
+                FROM SalesProduct WHERE sale_id = OLD.id GROUP BY product_id
+                ON CONFLICT (sale_date, product_id) DO UPDATE
+                SET quantity = quantity + excluded.quantity,
+                    revenue = revenue + excluded.revenue,
+                    profit = profit + excluded.profit;
+                DELETE FROM ProductDailySales WHERE quantity <= 0 AND sale_date = OLD.sale_date;
+            END
+        ''',
+        # O resumo é recalculado para incluir os itens que já estavam nessa situação
+        "DELETE FROM ProductDailySales",
+        PRODUCT_DAILY_SALES_BACKFILL,
+    ]),
+    (8, "Versão do cadastro de produtos alterada só pelas colunas do cadastro", [
+        # A baixa de estoque de cada venda não muda mais a versão "Catalog": antes, toda venda fazia
+        # o ProductCatalog esvaziar o cache inteiro. O estoque em memória é relido após cada venda
+        # (ProductCatalog.refresh_stock) e validado no banco ao finalizar a venda
+        "DROP TRIGGER IF EXISTS trg_product_update_catalog",
+        '''
+            CREATE TRIGGER IF NOT EXISTS trg_product_update_catalog
+            AFTER UPDATE OF name, code, description, purchase_price, sale_price ON Product
+            BEGIN
+                UPDATE DataVersion SET version = version + 1 WHERE name = 'Catalog';
+            END
+        ''',
+    ]),
+]
+
+
+# Máximo de parâmetros por consulta com IN (...), abaixo do limite de versões antigas do SQLite (999)
+MAX_IN_PARAMS = 900
+
+
+def group_quantities(items):
+    """
+    Soma as quantidades por código; um mesmo produto pode aparecer em várias linhas.
+
+    Args:
+        items (iterable): Tuplas (código do produto, quantidade), ou um dict código -> quantidade.
+
+    Returns:
+        dict: Código -> quantidade total, na ordem em que os códigos aparecem.
+    """
+    if isinstance(items, dict):
+        items = items.items()
+    requested = {}
+    for code, quantity in items:
+        requested[code] = requested.get(code, 0) + int(quantity)
+    return requested
+
+
+def stock_shortfalls(requested, products):
+    """
+    Compara as quantidades pedidas com o estoque consultado.
+
+    Args:
+        requested (dict): Código -> quantidade pedida (ver group_quantities).
+        products (dict): Código -> (id, stock, sale_price, purchase_price) (ver DatabaseManager.fetch_stock).
+
+    Returns:
+        dict: Código -> (quantidade pedida, estoque disponível) dos produtos sem estoque suficiente.
+            Produtos inexistentes aparecem com estoque None. Vazio se todos tiverem estoque.
+    """
+    shortfalls = {}
+    for code, quantity in requested.items():
+        row = products.get(code)
+        if row is None:
+            shortfalls[code] = (quantity, None)
+        elif row[1] < quantity:
+            shortfalls[code] = (quantity, row[1])
+    return shortfalls
+
+
+def is_busy(error):
+    """
+    Indica se o erro do SQLite é de banco ocupado (SQLITE_BUSY ou um de seus códigos estendidos).
+    """
+    code = getattr(error, "sqlite_errorcode", None)
+    return code is not None and code & 0xFF == sqlite3.SQLITE_BUSY
+
+
+class InsufficientStockError(Exception):
+    """
+    Erro lançado quando uma venda pede mais unidades do que há em estoque.
+
+    Attributes:
+        shortfalls (dict): Código do produto -> (quantidade pedida, estoque disponível).
+            Produtos inexistentes aparecem com estoque None.
+    """
+    def __init__(self, shortfalls):
+        self.shortfalls = shortfalls
+        itens = ", ".join(
+            f"{code} (pedido {requested}, estoque {'inexistente' if available is None else available})"
+            for code, (requested, available) in shortfalls.items()
+        )
+        super().__init__(f"Estoque insuficiente: {itens}")
+
+
+class _ThreadState(threading.local):
+    """
+    Estado de cada thread no DatabaseManager: conexão, cursor, profundidade das
+    transações abertas e operações aguardando o commit agrupado.
+    """
+    def __init__(self):
+        self.connection = None
+        self.cursor = None
+        self.transaction_depth = 0
+        self.immediate = False
+        self.pending_ops = 0
+        self.pending_since = None
+        # Logs gerados dentro da transação aberta, entregues ao AuditLogWriter só depois do commit
+        self.pending_logs = []
 
 
 class DatabaseManager:
 
     # Método construtor da classe
-    def __init__(self, db_name="sales_system.db"):
+    def __init__(self, db_name="sales_system.db", durability="full", group_size=20, group_interval_ms=200, profile="register", audit="async"):
+        """
+        Args:
+            db_name (str): Caminho do arquivo do banco de dados.
+            durability (str): Nível de durabilidade dos commits: "full", "grouped" ou "relaxed".
+            group_size (int): No modo agrupado, número de operações por commit.
+            group_interval_ms (int): No modo agrupado, tempo máximo (ms) que uma operação espera pelo commit.
+            profile (str): Perfil de PRAGMA aplicado ao conectar ("register", "back-office" ou "bulk-load").
+            audit (str): Gravação do log de operações: "async" (em lotes, em segundo plano) ou "strict" (na mesma transação).
+        """
+        if profile not in PRAGMA_PROFILES:
+            raise ValueError(f"Perfil inválido: {profile}. Use um de {tuple(PRAGMA_PROFILES)}")
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Durabilidade inválida: {durability}. Use uma de {DURABILITY_MODES}")
+        if audit not in AUDIT_MODES:
+            raise ValueError(f"Modo de auditoria inválido: {audit}. Use um de {AUDIT_MODES}")
+        self.durability = durability
+        self.audit = audit
+        self.audit_log = AuditLogWriter(self) if audit == "async" else None
+        self.group_size = group_size
+        self.group_interval = group_interval_ms / 1000
+        # Única thread cujas escritas esperam o commit agrupado (ver claim_group_commit);
+        # até alguém reivindicar, é a thread que criou o DatabaseManager
+        self._group_thread = threading.get_ident()
+        # Cada thread usa a sua própria conexão (objetos sqlite3 não devem ser compartilhados entre threads),
+        # com o seu próprio controle de transações abertas e commits agrupados pendentes.
+        # A conexão da thread que criou o DatabaseManager é aberta aqui; as das demais, no primeiro uso.
+        self.db_name = db_name
+        self._local = _ThreadState()
+        # Estado de cada thread que abriu uma conexão (para o close_connection efetivar as pendências de todas)
+        self._states = []
+        self._connections_lock = threading.Lock()
+        self.profile = profile
+        self.pragmas = None
         # Conecta ao banco de dados (cria se não existir)
-        self.connection = sqlite3.connect(db_name)
-        self.cursor = self.connection.cursor()
+        self.pragmas = self.apply_profile(profile)
         self.create_tables()
+        self.migrate()
+
+    # Conexão e cursor da thread atual
+    @property
+    def connection(self):
+        connection = self._local.connection
+        if connection is None:
+            connection = self._connect()
+        return connection
+
+    @property
+    def cursor(self):
+        cursor = self._local.cursor
+        if cursor is None:
+            self._connect()
+            cursor = self._local.cursor
+        return cursor
+
+    # Método para abrir a conexão da thread atual
+    def _connect(self):
+        """
+        Abre uma conexão para a thread atual, com o mesmo perfil de PRAGMA da conexão principal.
+        """
+        # check_same_thread=False apenas para que close_connection consiga fechar as conexões das outras threads;
+        # cada conexão continua sendo usada somente pela thread que a abriu
+        connection = sqlite3.connect(self.db_name, check_same_thread=False)
+        self._local.connection = connection
+        self._local.cursor = connection.cursor()
+        with self._connections_lock:
+            self._states.append(self._local)
+        # A primeira conexão recebe o perfil no construtor; as demais, aqui, sem exibir as configurações
+        if self.pragmas is not None:
+            self.apply_profile(self.profile, verbose=False)
+        return connection
+
+    # Método para aplicar um perfil de PRAGMA na conexão
+    def apply_profile(self, profile, verbose=True):
+        """
+        Aplica um perfil de PRAGMA na conexão da thread atual e exibe as configurações ativas.
+        
+        Args:
+            profile (str): Nome do perfil em PRAGMA_PROFILES.
+            verbose (bool): Se False, não exibe as configurações.
+        
+        Returns:
+            dict: Valor efetivo de cada PRAGMA, lido de volta do banco.
+        """
+        settings = dict(PRAGMA_PROFILES[profile])
+        # O modo relaxado abre mão do fsync independente do perfil
+        if self.durability == "relaxed":
+            settings["synchronous"] = "OFF"
+        for name, value in settings.items():
+            self.cursor.execute(f"PRAGMA {name} = {value}")
+        
+        # Lendo os valores efetivos (ex.: bancos em memória não suportam WAL)
+        active = {}
+        for name in settings:
+            self.cursor.execute(f"PRAGMA {name}")
+            row = self.cursor.fetchone()
+            active[name] = row[0] if row else None
+        if verbose:
+            print(f"Database profile ({profile}).....\033[92m" + ", ".join(f"{k}={v}" for k, v in active.items()) + "\033[0m")
+        return active
+
+    # Método que decide quando as escritas pendentes são efetivadas
+    def _commit(self):
+        """
+        Efetiva a operação atual de acordo com o nível de durabilidade.
+        Dentro de `transaction()` não faz nada, o commit acontece ao final da transação.
+        Nos modos agrupados, só a thread de commit agrupado adia o commit; as demais fazem commit
+        na hora, pois nenhum timer efetiva as pendências delas e a transação aberta seguraria o
+        lock de escrita do banco (bloqueando os outros caixas) até a próxima escrita da thread.
+        """
+        if self._local.transaction_depth > 0:
+            return
+        if self.durability == "full" or threading.get_ident() != self._group_thread:
+            self.connection.commit()
+            self._release_logs()
+            return
+        
+        # Modo agrupado: acumula operações até atingir o tamanho do grupo ou o tempo limite
+        now = time.monotonic()
+        if self._local.pending_since is None:
+            self._local.pending_since = now
+        self._local.pending_ops += 1
+        if self._local.pending_ops >= self.group_size or now - self._local.pending_since >= self.group_interval:
+            self.flush()
+
+    # Método para definir a thread que agrupa os commits
+    def claim_group_commit(self):
+        """
+        Define a thread atual como a única que agrupa commits nos modos "grouped" e "relaxed".
+        Deve ser a thread que também chama flush_if_due periodicamente (na interface, a thread
+        de escrita do TaskRunner), para que as pendências tenham sempre um prazo para o commit.
+        """
+        self._group_thread = threading.get_ident()
+
+    # Método para efetivar as escritas pendentes cujo tempo limite já passou
+    def flush_if_due(self):
+        """
+        No modo agrupado, faz o commit se a operação pendente mais antiga já
+        esperou mais que `group_interval_ms`. Pode ser chamado periodicamente por um timer.
+        """
+        if self._local.transaction_depth == 0 and self._local.pending_since is not None:
+            if time.monotonic() - self._local.pending_since >= self.group_interval:
+                self.flush()
+
+    # Método para efetivar imediatamente as escritas pendentes
+    def flush(self):
+        """
+        Faz o commit de todas as operações pendentes do modo agrupado.
+        """
+        self.connection.commit()
+        self._local.pending_ops = 0
+        self._local.pending_since = None
+        self._release_logs()
+
+    # Unidade de trabalho: várias operações em uma única transação
+    @contextmanager
+    def transaction(self, immediate=False):
+        """
+        Agrupa várias operações em uma única transação, com um único commit ao final.
+        Se qualquer exceção for lançada, todas as operações do bloco são desfeitas.
+        Transações aninhadas fazem parte da transação mais externa.
+
+        Args:
+            immediate (bool): Abre a transação com BEGIN IMMEDIATE, obtendo o lock de escrita
+                antes da primeira leitura: o que for lido dentro dela não muda até o commit.
+                Transações imediatas sempre fazem commit ao final, mesmo no modo agrupado,
+                para não segurar o lock de escrita dos outros caixas. Ignorado em transações aninhadas.
+
+        Exemplo:
+            with db.transaction():
+                db.insert_customer(...)
+                db.insert_product(...)
+        """
+        if self._local.transaction_depth == 0:
+            # Efetiva as operações pendentes do modo agrupado para que um rollback não as desfaça
+            self.flush()
+            # BEGIN explícito também sem immediate: o sqlite3 só abriria a transação no primeiro
+            # INSERT/UPDATE/DELETE, e um SAVEPOINT executado antes disso (ex.: decrement_stock_bulk)
+            # passaria a ser a transação mais externa, com commit já no RELEASE
+            self.cursor.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            self._local.immediate = immediate
+        self._local.transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._local.transaction_depth -= 1
+            if self._local.transaction_depth == 0:
+                self.connection.rollback()
+                # As operações foram desfeitas, então os seus logs também
+                self._local.pending_logs.clear()
+            raise
+        self._local.transaction_depth -= 1
+        if self._local.transaction_depth == 0:
+            if self._local.immediate:
+                self.flush()
+            else:
+                self._commit()
+
+    # Transação de escrita refeita quando outro caixa está com o lock do banco
+    def write_transaction(self, work, *args, **kwargs):
+        """
+        Executa `work(*args, **kwargs)` em uma transação BEGIN IMMEDIATE. Se o banco estiver
+        ocupado por outra conexão (SQLITE_BUSY) mesmo após o busy_timeout, a transação é
+        desfeita e refeita do início, até BUSY_RETRIES vezes.
+        Dentro de uma transação já aberta, `work` apenas participa dela (sem novas tentativas).
+
+        Returns:
+            O retorno de `work`.
+
+        Raises:
+            sqlite3.OperationalError: Se o banco continuar ocupado após todas as tentativas.
+        """
+        if self._local.transaction_depth > 0:
+            return work(*args, **kwargs)
+        for attempt in range(BUSY_RETRIES + 1):
+            try:
+                with self.transaction(immediate=True):
+                    return work(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not is_busy(e) or attempt == BUSY_RETRIES:
+                    raise
+            time.sleep(BUSY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5))
 
     # Método para criar as tabelas no banco de dados
     def create_tables(self):
@@ -94,21 +839,295 @@ class DatabaseManager:
         print("Commit progress.....\033[92mOk\033[0m")
         
         
+    # Método para atualizar o esquema do banco de dados
+    def migrate(self):
+        """
+        Aplica as migrações de MIGRATIONS ainda não aplicadas neste banco.
+        Cada migração roda em sua própria transação junto com a atualização de
+        PRAGMA user_version, então uma falha não deixa o esquema pela metade.
+        
+        Returns:
+            int: Versão do esquema após as migrações.
+        """
+        self.cursor.execute("PRAGMA user_version")
+        current = self.cursor.fetchone()[0]
+        # Efetiva escritas pendentes, a migração precisa de uma transação própria
+        self.flush()
+        
+        for version, description, steps in MIGRATIONS:
+            if version <= current:
+                continue
+            # Sem BEGIN explícito o sqlite3 executaria os comandos DDL em autocommit
+            self.cursor.execute("BEGIN")
+            try:
+                for step in steps:
+                    if callable(step):
+                        step(self.cursor)
+                    else:
+                        self.cursor.execute(step)
+                # PRAGMA não aceita parâmetros, a versão vem da lista de migrações
+                self.cursor.execute(f"PRAGMA user_version = {int(version)}")
+                self.connection.commit()
+            except Exception:
+                self.connection.rollback()
+                raise
+            current = version
+            print(f"Migration {version} - {description}.....\033[92mOk\033[0m")
+        
+        return current
+
+    # Método para recalcular os resumos de vendas
+    def rebuild_rollups(self):
+        """
+        Recalcula as tabelas DailySales e ProductDailySales a partir das vendas.
+        Normalmente os triggers mantêm os resumos atualizados, este método serve
+        para reconstruí-los por completo (ex.: após uma importação externa de vendas).
+        """
+        with self.transaction():
+            self.cursor.execute("DELETE FROM DailySales")
+            self.cursor.execute(DAILY_SALES_BACKFILL)
+            self.cursor.execute("DELETE FROM ProductDailySales")
+            self.cursor.execute(PRODUCT_DAILY_SALES_BACKFILL)
+
+    # Método para consultar o resumo diário de vendas
+    def fetch_daily_sales(self, date_from=None, date_to=None, by_payment=False):
+        """
+        Consulta o resumo diário de vendas (tabela DailySales).
+
+        Args:
+            date_from (str, opcional): Data inicial, inclusive (formato: 'YYYY-MM-DD').
+            date_to (str, opcional): Data final, inclusive (formato: 'YYYY-MM-DD').
+            by_payment (bool): Se True, retorna uma linha por dia e forma de pagamento.
+
+        Returns:
+            DataFrame: Colunas sale_date, [payment,] total_value, profit e sale_count, ordenadas por data.
+        """
+        group = "sale_date, payment" if by_payment else "sale_date"
+        query = f'''
+            SELECT {group}, SUM(revenue) AS total_value, SUM(profit) AS profit, SUM(sale_count) AS sale_count
+            FROM DailySales
+            WHERE sale_date >= COALESCE(?, sale_date) AND sale_date <= COALESCE(?, sale_date)
+            GROUP BY {group}
+            ORDER BY {group}
+        '''
+        self.cursor.execute(query, (date_from, date_to))
+        rows = self.cursor.fetchall()
+        # Converte o resultado para DataFrame usando pandas
+        columns = [column[0] for column in self.cursor.description]
+        # Tipos fixos para que um período sem vendas ainda tenha colunas numéricas
+        df = pd.DataFrame(rows, columns=columns).astype({"total_value": float, "profit": float, "sale_count": int})
+        return df
+
+    # Método para consultar as vendas novas e a versão dos dados do painel
+    def fetch_sales_since(self, after_id=None):
+        """
+        Consulta o resumo diário das vendas com id maior que after_id, junto com o maior id de venda
+        e as versões da tabela DataVersion. Tudo é lido na mesma consulta, ou seja, no mesmo instante
+        do banco: uma venda registrada durante a leitura aparece na próxima chamada, nunca duas vezes.
+
+        Args:
+            after_id (int, opcional): Último id de venda já conhecido. None = todas as vendas (lidas do resumo DailySales).
+
+        Returns:
+            tuple: (DataFrame com as colunas sale_date, total_value, profit e sale_count ordenadas por data,
+                    maior id de venda (0 sem vendas), dict nome -> versão)
+        """
+        if after_id is None:
+            daily = '''
+                SELECT sale_date, SUM(revenue) AS total_value, SUM(profit) AS profit, SUM(sale_count) AS sale_count
+                FROM DailySales
+                GROUP BY sale_date
+            '''
+            params = ()
+        else:
+            # Busca pelo id (chave primária): só as vendas novas são lidas
+            daily = '''
+                SELECT sale_date, SUM(total_value) AS total_value, SUM(COALESCE(profit, 0)) AS profit, COUNT(*) AS sale_count
+                FROM Sales
+                WHERE id > ?
+                GROUP BY sale_date
+            '''
+            params = (after_id,)
+        query = f'''
+            WITH state AS (
+                SELECT (SELECT COALESCE(MAX(id), 0) FROM Sales) AS last_sale_id,
+                       (SELECT version FROM DataVersion WHERE name = 'Sales') AS sales_version,
+                       (SELECT version FROM DataVersion WHERE name = 'Product') AS product_version
+            )
+            SELECT state.last_sale_id, state.sales_version, state.product_version,
+                   d.sale_date, d.total_value, d.profit, d.sale_count
+            FROM state
+            LEFT JOIN ({daily}) d ON 1
+            ORDER BY d.sale_date
+        '''
+        self.cursor.execute(query, params)
+        rows = self.cursor.fetchall()
+        last_sale_id, sales_version, product_version = rows[0][:3]
+        # Sem vendas no período, o LEFT JOIN devolve uma única linha com o resumo vazio
+        rows = [row[3:] for row in rows if row[3] is not None]
+        df = pd.DataFrame(rows, columns=["sale_date", "total_value", "profit", "sale_count"])
+        df = df.astype({"total_value": float, "profit": float, "sale_count": int})
+        return df, last_sale_id, {"Sales": sales_version, "Product": product_version}
+
+    # Método para consultar a versão de um conjunto de dados
+    def fetch_data_version(self, name):
+        """
+        Consulta a versão registrada na tabela DataVersion (incrementada pelos triggers a cada alteração).
+
+        Args:
+            name (str): Nome da versão ("Sales", "Product" ou "Catalog").
+
+        Returns:
+            int: Versão atual (0 se o nome não existir).
+        """
+        self.cursor.execute("SELECT version FROM DataVersion WHERE name = ?", (name,))
+        row = self.cursor.fetchone()
+        return row[0] if row is not None else 0
+
+    # Método para consultar os produtos mais vendidos
+    def fetch_top_products(self, date_from=None, date_to=None, limit=20):
+        """
+        Consulta os produtos mais vendidos no período a partir do resumo ProductDailySales,
+        já com o nome de cada produto.
+        
+        Args:
+            date_from (str, opcional): Data inicial, inclusive (formato: 'YYYY-MM-DD').
+            date_to (str, opcional): Data final, inclusive (formato: 'YYYY-MM-DD').
+            limit (int): Quantidade máxima de produtos retornados.
+        
+        Returns:
+            DataFrame: Colunas product_id, name, quantity, revenue e profit, da maior para a menor quantidade.
+        """
+        query = '''
+            SELECT d.product_id, COALESCE(p.name, 'Produto removido') AS name,
+                   SUM(d.quantity) AS quantity, SUM(d.revenue) AS revenue, SUM(d.profit) AS profit
+            FROM ProductDailySales d
+            LEFT JOIN Product p ON p.id = d.product_id
+            WHERE d.sale_date >= COALESCE(?, d.sale_date) AND d.sale_date <= COALESCE(?, d.sale_date)
+            GROUP BY d.product_id
+            ORDER BY quantity DESC
+            LIMIT ?
+        '''
+        self.cursor.execute(query, (date_from, date_to, limit))
+        rows = self.cursor.fetchall()
+        # Converte o resultado para DataFrame usando pandas
+        columns = [column[0] for column in self.cursor.description]
+        df = pd.DataFrame(rows, columns=columns).astype({"quantity": int, "revenue": float, "profit": float})
+        return df
+
+    # Método para a busca textual de produtos e clientes
+    def search_text(self, table_name, text, limit=None):
+        """
+        Busca registros pelo índice FTS5 da tabela (ver SEARCH_TABLES).
+        Cada palavra do texto é buscada como prefixo, em qualquer coluna indexada,
+        e todas precisam aparecer (ex.: "jo sil" encontra "João da Silva").
+        
+        Args:
+            table_name (str): Tabela pesquisada ("Product" ou "Customer").
+            text (str): Texto digitado pelo usuário.
+            limit (int, opcional): Quantidade máxima de registros. None = sem limite.
+        
+        Returns:
+            DataFrame: Registros encontrados, do mais relevante para o menos relevante.
+            Texto vazio retorna todos os registros, na ordem do id.
+        """
+        search_table, _ = SEARCH_TABLES[table_name]
+        # Apenas letras e números: o restante é separador para o tokenizador e evita erros de sintaxe do MATCH
+        words = re.findall(r"\w+", text or "")
+        limit = -1 if limit is None else limit
+        if not words:
+            query = f"SELECT * FROM {table_name} ORDER BY id LIMIT ?"
+            params = (limit,)
+        else:
+            match = " ".join(f'"{word}"*' for word in words)
+            query = f'''
+                SELECT t.*
+                FROM {search_table} s
+                JOIN {table_name} t ON t.id = s.rowid
+                WHERE {search_table} MATCH ?
+                ORDER BY s.rank
+                LIMIT ?
+            '''
+            params = (match, limit)
+        self.cursor.execute(query, params)
+        rows = self.cursor.fetchall()
+        # Converte o resultado para DataFrame usando pandas
+        columns = [column[0] for column in self.cursor.description]
+        df = pd.DataFrame(rows, columns=columns)
+        return df
+
+    # Método para consultar os produtos com mais unidades em estoque
+    def fetch_top_stock(self, limit=10):
+        """
+        Consulta os produtos com mais unidades em estoque.
+        
+        Args:
+            limit (int): Quantidade máxima de produtos retornados.
+        
+        Returns:
+            DataFrame: Colunas id, name e stock, do maior para o menor estoque.
+        """
+        self.cursor.execute("SELECT id, name, stock FROM Product ORDER BY stock DESC LIMIT ?", (limit,))
+        rows = self.cursor.fetchall()
+        # Converte o resultado para DataFrame usando pandas
+        columns = [column[0] for column in self.cursor.description]
+        df = pd.DataFrame(rows, columns=columns)
+        return df
+
+    def fetch_stock(self, codes):
+        """
+        Consulta o estoque e os preços de vários produtos de uma vez, com uma única consulta
+        WHERE code IN (...) (dividida em lotes apenas para carrinhos com mais de MAX_IN_PARAMS códigos).
+
+        Args:
+            codes (iterable): Códigos dos produtos.
+
+        Returns:
+            dict: Código -> (id, stock, sale_price, purchase_price). Códigos inexistentes ficam de fora.
+        """
+        codes = list(dict.fromkeys(codes))
+        products = {}
+        for start in range(0, len(codes), MAX_IN_PARAMS):
+            batch = codes[start:start + MAX_IN_PARAMS]
+            placeholders = ", ".join("?" * len(batch))
+            self.cursor.execute(f"SELECT code, id, stock, sale_price, purchase_price FROM Product WHERE code IN ({placeholders})", batch)
+            for code, *row in self.cursor.fetchall():
+                products[code] = tuple(row)
+        return products
+
     # Método criar um log de operação
     def create_log(self, text):
         """
-        Cria um log de operação no banco de dados.
+        Cria um log de operação no banco de dados e efetiva a operação que ele descreve.
+        No modo de auditoria "strict" o log é gravado na mesma transação; no modo "async" ele só vai
+        para a fila do AuditLogWriter quando o commit da operação de fato acontece (no fim da
+        transação ou, nos modos agrupados, no próximo flush). Se a operação for desfeita, o log também é.
         
         Args:
             text (str): Texto do log a ser registrado.
         """
         datetime_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        query = '''
-            INSERT INTO Logs (text, datetime)
-            VALUES (?, ?)
-        '''
-        self.cursor.execute(query, (text, datetime_str))
-        self.connection.commit()
+        if self.audit_log is None:
+            self.cursor.execute(LOG_INSERT, (text, datetime_str))
+        else:
+            self._local.pending_logs.append((text, datetime_str))
+        self._commit()
+
+    def _release_logs(self, state=None):
+        # Chamado logo após um commit: entrega à fila os logs das operações que ele efetivou
+        state = state if state is not None else self._local
+        pending = state.pending_logs
+        if pending:
+            state.pending_logs = []
+            for text, datetime_str in pending:
+                self.audit_log.put(text, datetime_str)
+
+    def flush_logs(self):
+        """
+        Espera a gravação dos logs que estão na fila (no modo "async"). Usado antes de consultar a tabela Logs.
+        """
+        if self.audit_log is not None:
+            self.audit_log.flush()
     
     # Método para consultar todos os registros de uma tabela e retornar como DataFrame
     def fetch_all(self, table_name):
@@ -129,6 +1148,76 @@ class DatabaseManager:
         df = pd.DataFrame(rows, columns=columns)
         return df
 
+    # Método para consultar uma página de registros de uma tabela (paginação por id)
+    def fetch_page(self, table_name, after_id=None, limit=200, order="desc", filters=None, order_by="id", after_value=None):
+        """
+        Consulta uma página de registros usando o id como chave (keyset pagination).
+        Em vez de OFFSET, a próxima página começa depois do último id já lido, então o custo
+        de cada página não depende do tamanho da tabela nem de quantas páginas já foram lidas.
+        Ordenando por outra coluna, a chave passa a ser (coluna, id): a página seguinte começa
+        depois do par (valor, id) do último registro lido. Os NULL seguem a ordem do SQLite
+        (antes dos valores em ordem crescente, depois deles em ordem decrescente).
+        
+        Args:
+            table_name (str): Nome da tabela a ser consultada.
+            after_id (int, opcional): Último id da página anterior. None = primeira página.
+            limit (int): Quantidade máxima de registros da página.
+            order (str): "desc" (mais recentes primeiro) ou "asc".
+            filters (list, opcional): Condições (coluna, operador, valor) combinadas com AND,
+                ex.: [("sale_date", ">=", "2024-01-01"), ("customer_id", "=", 3)].
+            order_by (str): Coluna da ordenação (padrão: id).
+            after_value (opcional): Valor de `order_by` no último registro da página anterior
+                (usado junto com after_id quando order_by não é o id; None se era NULL).
+        
+        Returns:
+            DataFrame: Registros da página, na ordem pedida.
+        """
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Ordem inválida: {order!r} (use 'asc' ou 'desc')")
+        if not re.fullmatch(r"[A-Za-z_]\w*", order_by):
+            raise ValueError(f"Coluna de ordenação inválida: {order_by!r}")
+        conditions = []
+        params = []
+        for column, operator, value in filters or ():
+            if operator not in FILTER_OPERATORS:
+                raise ValueError(f"Operador inválido: {operator!r}")
+            conditions.append(f"{column} {operator} ?")
+            params.append(value)
+        comparison = "<" if order == "desc" else ">"
+        if order_by == "id":
+            # Uma única faixa de ids
+            segments = [([f"id {comparison} ?"], [int(after_id)]) if after_id is not None else ([], [])]
+        elif after_id is None:
+            segments = [([], [])]
+        elif after_value is None:
+            # A página anterior terminou entre os NULL, que no SQLite vêm antes de qualquer valor:
+            # em ordem crescente ainda faltam os NULL seguintes e depois todos os valores
+            segments = [([f"{order_by} IS NULL", f"id {comparison} ?"], [int(after_id)])]
+            if order == "asc":
+                segments.append(([f"{order_by} IS NOT NULL"], []))
+        else:
+            # Depois do par (valor, id); em ordem decrescente os NULL vêm por último
+            segments = [([f"({order_by}, id) {comparison} (?, ?)"], [after_value, int(after_id)])]
+            if order == "desc":
+                segments.append(([f"{order_by} IS NULL"], []))
+        # A mesma ordem do índice da coluna (que guarda também o id): a página é lida direto do índice,
+        # sem ordenar a tabela inteira. Cada trecho é uma faixa contínua do índice, consultada só se
+        # os anteriores não completaram a página
+        sort = f"id {order}" if order_by == "id" else f"{order_by} {order}, id {order}"
+        rows = []
+        for segment_conditions, segment_params in segments:
+            where_conditions = conditions + segment_conditions
+            where = f"WHERE {' AND '.join(where_conditions)}" if where_conditions else ""
+            query = f"SELECT * FROM {table_name} {where} ORDER BY {sort} LIMIT ?"
+            self.cursor.execute(query, params + segment_params + [limit - len(rows)])
+            rows.extend(self.cursor.fetchall())
+            if len(rows) >= limit:
+                break
+        # Converte o resultado para DataFrame usando pandas
+        columns = [column[0] for column in self.cursor.description]
+        df = pd.DataFrame(rows, columns=columns)
+        return df
+
     # Método para consultar um registro específico pelo ID e retornar como DataFrame
     def fetch_by_id(self, table_name, record_id, column_name='id'):
         """
@@ -152,6 +1241,64 @@ class DatabaseManager:
         
         return df
 
+    # Método que cria um cursor que já devolve objetos de linha (Product, Customer, ...)
+    def _row_cursor(self, table_name):
+        row_type = ROW_TYPES[table_name]
+        cursor = self.connection.cursor()
+        cursor.row_factory = lambda _, row: row_type(*row)
+        return cursor
+
+    # Método para consultar um registro específico e retornar como objeto de linha
+    def fetch_row(self, table_name, record_id, column_name='id'):
+        """
+        Consulta um registro específico, sem montar DataFrame.
+        
+        Args:
+            table_name (str): Nome da tabela a ser consultada (Customer, Product, Sales ou SalesProduct).
+            record_id (int): Valor a ser buscado.
+            column_name (str, opcional): Nome da coluna filtrada (padrão: 'id').
+        
+        Returns:
+            Customer | Product | Sale | SaleLine | None: Registro encontrado ou None.
+        """
+        cursor = self._row_cursor(table_name)
+        cursor.execute(f"SELECT {ROW_COLUMNS[table_name]} FROM {table_name} WHERE {column_name} = ?", (record_id,))
+        return cursor.fetchone()
+
+    # Método para consultar vários registros e retornar como lista de objetos de linha
+    def fetch_rows(self, table_name, record_id, column_name='id'):
+        """
+        Consulta todos os registros cuja coluna seja igual ao valor informado, sem montar DataFrame.
+        
+        Args:
+            table_name (str): Nome da tabela a ser consultada (Customer, Product, Sales ou SalesProduct).
+            record_id (int): Valor a ser buscado.
+            column_name (str, opcional): Nome da coluna filtrada (padrão: 'id').
+        
+        Returns:
+            list: Lista de objetos de linha, na ordem do id.
+        """
+        cursor = self._row_cursor(table_name)
+        cursor.execute(f"SELECT {ROW_COLUMNS[table_name]} FROM {table_name} WHERE {column_name} = ? ORDER BY id", (record_id,))
+        return cursor.fetchall()
+
+    # Método para consultar todos os registros de uma tabela como lista de objetos de linha
+    def fetch_all_rows(self, table_name, limit=None):
+        """
+        Consulta todos os registros da tabela, sem montar DataFrame.
+        
+        Args:
+            table_name (str): Nome da tabela a ser consultada (Customer, Product, Sales ou SalesProduct).
+            limit (int, opcional): Número máximo de registros retornados.
+        
+        Returns:
+            list: Lista de objetos de linha, na ordem do id.
+        """
+        cursor = self._row_cursor(table_name)
+        # LIMIT -1 no SQLite significa sem limite
+        cursor.execute(f"SELECT {ROW_COLUMNS[table_name]} FROM {table_name} ORDER BY id LIMIT ?", (-1 if limit is None else limit,))
+        return cursor.fetchall()
+
     # Método para consultar registros específicos em uma tabela filtrando pelo valor da coluna
     def filter_by_column(self, table_name, column_name, value):
         """
@@ -191,7 +1338,6 @@ class DatabaseManager:
             VALUES (?, ?, ?, ?)
         '''
         self.cursor.execute(query, (name, cpf, email, phone))
-        self.connection.commit()
         
         # Gerando log de operação
         self.create_log(f"Novo cliente cadastrado: {name} ({cpf})")
@@ -214,7 +1360,6 @@ class DatabaseManager:
             VALUES (?, ?, ?, ?, ?, ?)
         '''
         self.cursor.execute(query, (name, description, code, purchase_price, sale_price, stock))
-        self.connection.commit()
         
         # Gerando log de operação
         self.create_log(f"Novo produto cadastrado: {name} ({code})")
@@ -248,12 +1393,13 @@ class DatabaseManager:
         total_value = round(total_value, 2)
         
         self.cursor.execute(query, (customer_id, total_value, profit, sale_date, installment, payment, tax, discount))
-        self.connection.commit()
+        # Guardando o ID antes do log, que sobrescreve o lastrowid do cursor
+        sale_id = self.cursor.lastrowid
         
         # Gerando log de operação
-        self.create_log(f"Nova venda realizada - ID: {self.cursor.lastrowid}")
+        self.create_log(f"Nova venda realizada - ID: {sale_id}")
         
-        return self.cursor.lastrowid  # Retorna o ID da venda inserida
+        return sale_id  # Retorna o ID da venda inserida
 
     # Método para inserir produtos vendidos na tabela SalesProduct
     def insert_sales_product(self, sale_id, product_id, quantity):
@@ -277,8 +1423,139 @@ class DatabaseManager:
             return
         
         self.cursor.execute(query, (sale_id, product_id, quantity))
-        self.connection.commit()
+        self._commit()
     
+    # Método para inserir todos os produtos vendidos de uma venda de uma vez
+    def insert_sales_products_bulk(self, sale_id, lines):
+        """
+        Insere todas as linhas de uma venda na tabela SalesProduct com um único executemany.
+
+        Args:
+            sale_id (int): ID da venda (referente à tabela Sales).
+            lines (iterable): Tuplas (product_id, quantidade, preço unitário de venda, custo unitário),
+                uma por item do carrinho.
+        """
+        query = '''
+            INSERT INTO SalesProduct (sale_id, product_id, quantity, unit_price, unit_cost)
+            VALUES (?, ?, ?, ?, ?)
+        '''
+        self.cursor.executemany(query, [
+            (sale_id, int(product_id), int(quantity), unit_price, unit_cost)
+            for product_id, quantity, unit_price, unit_cost in lines
+        ])
+        self._commit()
+
+    # Método para baixar o estoque de vários produtos de uma vez
+    def decrement_stock_bulk(self, quantities):
+        """
+        Baixa o estoque de vários produtos com um único executemany. Cada UPDATE só é aplicado
+        se o produto ainda tiver estoque suficiente (stock >= quantidade), então o estoque nunca
+        fica negativo, mesmo que tenha mudado depois da validação.
+        Se algum produto não puder ser baixado, nenhuma baixa é feita. Fora de uma transação,
+        roda em uma transação BEGIN IMMEDIATE (ver write_transaction).
+
+        Args:
+            quantities (dict): ID do produto -> quantidade a baixar.
+
+        Raises:
+            InsufficientStockError: Com todos os produtos sem estoque suficiente (ou inexistentes).
+        """
+        rows = [(int(quantity), int(product_id), int(quantity)) for product_id, quantity in quantities.items()]
+        if not rows:
+            return
+        query = '''
+            UPDATE Product
+            SET stock = stock - ?
+            WHERE id = ? AND stock >= ?
+        '''
+
+        def decrement():
+            self.cursor.execute("SAVEPOINT decrement_stock")
+            self.cursor.executemany(query, rows)
+            # rowcount soma as linhas alteradas por todos os UPDATE: cada produto com estoque altera uma
+            if self.cursor.rowcount == len(rows):
+                self.cursor.execute("RELEASE decrement_stock")
+                return
+            # Desfaz as baixas já feitas e descobre quais produtos não tinham estoque
+            self.cursor.execute("ROLLBACK TO decrement_stock")
+            self.cursor.execute("RELEASE decrement_stock")
+            ids = [product_id for _, product_id, _ in rows]
+            placeholders = ", ".join("?" * len(ids))
+            self.cursor.execute(f"SELECT id, code, stock FROM Product WHERE id IN ({placeholders})", ids)
+            stock = {product_id: (code, available) for product_id, code, available in self.cursor.fetchall()}
+            shortfalls = {}
+            for quantity, product_id, _ in rows:
+                code, available = stock.get(product_id, (product_id, None))
+                if available is None or available < quantity:
+                    shortfalls[code] = (quantity, available)
+            raise InsufficientStockError(shortfalls)
+
+        self.write_transaction(decrement)
+
+    # Método para registrar uma venda completa em uma única transação
+    def insert_full_sale(self, customer_id, total_value, profit, sale_date, items, installment=1, payment=1, tax=0.0, discount=0.0):
+        """
+        Registra uma venda completa (Sales, SalesProduct, baixa de estoque e log)
+        em uma única transação, com um único commit. Qualquer falha desfaz tudo.
+        Seguro com vários caixas no mesmo banco: a validação e a baixa do estoque acontecem
+        com o lock de escrita já obtido, então duas vendas nunca baixam o mesmo estoque.
+
+        Args:
+            customer_id (int): ID do cliente que realizou a compra.
+            total_value (float): Valor total da venda.
+            profit (float): Lucro da venda.
+            sale_date (str): Data da venda (formato: 'YYYY-MM-DD').
+            items (list): Lista de tuplas (código do produto, quantidade), uma por linha do carrinho.
+            installment (int): Número de parcelas da compra.
+            payment (int): Forma de pagamento da compra.
+            tax (float): Taxa de juros da compra.
+            discount (float): Desconto aplicado na compra.
+
+        Returns:
+            int: ID da venda inserida.
+
+        Raises:
+            InsufficientStockError: Se algum produto não existir ou não tiver estoque suficiente.
+            sqlite3.OperationalError: Se o banco continuar ocupado após todas as tentativas.
+        """
+        # Somando as quantidades por código, um mesmo produto pode aparecer em várias linhas
+        requested = group_quantities(items)
+
+        if installment < 1:
+            installment = 1
+        total_value = round(total_value, 2)
+
+        # A transação é aberta com BEGIN IMMEDIATE: nenhum outro caixa grava entre a validação do estoque
+        # e a baixa, e se o banco estiver ocupado a venda inteira é refeita (ver write_transaction).
+        # Faz commit ao final ou rollback se qualquer exceção for lançada
+        def write():
+            # 1. Validando o estoque de todos os produtos com uma única consulta
+            products = self.fetch_stock(requested)
+            shortfalls = stock_shortfalls(requested, products)
+            if shortfalls:
+                raise InsufficientStockError(shortfalls)
+
+            # 2. Inserindo a venda
+            self.cursor.execute('''
+                INSERT INTO Sales (customer_id, total_value, profit, sale_date, installment, payment, tax, discount)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (customer_id, total_value, profit, sale_date, installment, payment, tax, discount))
+            sale_id = self.cursor.lastrowid
+
+            # 3. Inserindo os produtos vendidos, uma linha por item do carrinho, com o preço do momento
+            self.insert_sales_products_bulk(sale_id, [
+                (products[code][0], quantity, products[code][2], products[code][3]) for code, quantity in items
+            ])
+
+            # 4. Baixando o estoque, cada produto só é baixado se ainda tiver estoque
+            self.decrement_stock_bulk({products[code][0]: quantity for code, quantity in requested.items()})
+
+            # 5. Gerando log de operação na mesma transação
+            self.create_log(f"Nova venda realizada - ID: {sale_id}")
+            return sale_id
+
+        return self.write_transaction(write)
+
     # Método para editar um cliente na tabela Customer
     def update_customer(self, customer_id, name=None, cpf=None, email=None, phone=None):
         """
@@ -300,7 +1577,6 @@ class DatabaseManager:
             WHERE id = ?
         '''
         self.cursor.execute(query, (name, cpf, email, phone, customer_id))
-        self.connection.commit()
         
         # Gerando log de operação
         self.create_log(f"Cliente editado - ID: {customer_id}")
@@ -332,7 +1608,6 @@ class DatabaseManager:
         
         # Ajuste da ordem dos parâmetros
         self.cursor.execute(query, (name, description, code, purchase_price, sale_price, stock, int(product_id)))
-        self.connection.commit()
         
         # Gerando log de operação
         self.create_log(f"Produto editado - ID: {product_id}")
@@ -366,7 +1641,6 @@ class DatabaseManager:
             WHERE id = ?
         '''
         self.cursor.execute(query, (customer_id, total_value, profit, sale_date, sale_id, installment, payment, tax, discount))
-        self.connection.commit()
         
         # Gerando log de operação
         self.create_log(f"Venda editada - ID: {sale_id}")
@@ -390,7 +1664,6 @@ class DatabaseManager:
             WHERE id = ?
         '''
         self.cursor.execute(query, (sale_id, product_id, quantity, sales_product_id))
-        self.connection.commit()
         
         # Gerando log de operação
         self.create_log(f"Registro de venda editado - ID: {sales_product_id}")
@@ -407,11 +1680,11 @@ class DatabaseManager:
             DELETE FROM Customer
             WHERE id = ?
         '''
-        self.cursor.execute(query, (customer_id,))
-        self.connection.commit()
-        
+        # Buscando o cliente antes de deletar, para registrar no log
         cliente = self.fetch_by_id("Customer", customer_id)
         
+        self.cursor.execute(query, (customer_id,))
+        
         # Gerando log de operação
         self.create_log(f"Cliente deletado: {cliente['name'].values[0]} ({cliente['cpf'].values[0]})")
 
@@ -427,11 +1700,11 @@ class DatabaseManager:
             DELETE FROM Product
             WHERE id = ?
         '''
-        self.cursor.execute(query, (product_id,))
-        self.connection.commit()
-        
+        # Buscando o produto antes de deletar, para registrar no log
         produto = self.fetch_by_id("Product", product_id)
         
+        self.cursor.execute(query, (product_id,))
+        
         # Gerando log de operação
         self.create_log(f"Produto deletado: {produto['name'].values[0]} ({produto['code'].values[0]})")
 
@@ -454,7 +1727,6 @@ class DatabaseManager:
             DELETE FROM Sales
             WHERE id = ?
         ''', (sale_id,))
-        self.connection.commit()
         
         # Gerando log de operação
         self.create_log(f"Venda deletada - ID: {sale_id}")
@@ -472,15 +1744,38 @@ class DatabaseManager:
             WHERE id = ?
         '''
         self.cursor.execute(query, (sales_product_id,))
-        self.connection.commit()
         
         # Gerando log de operação
         self.create_log(f"Registro de venda deletado - ID: {sales_product_id}")
 
     # Método para fechar a conexão com o banco de dados
     def close_connection(self):
-        # Fecha a conexão com o banco de dados
-        self.connection.close()
+        # 1. Efetiva os commits agrupados pendentes de todas as threads; os logs dessas
+        #    operações entram na fila só depois do commit de cada uma
+        with self._connections_lock:
+            states = list(self._states)
+        for state in states:
+            if state.connection.in_transaction:
+                state.connection.commit()
+            state.pending_ops = 0
+            state.pending_since = None
+            self._release_logs(state)
+        # 2. Grava os logs da fila e encerra a thread de gravação, que usa uma das conexões abaixo.
+        #    Se sobrar log não gravado, as conexões são fechadas mesmo assim e o erro é relançado no final
+        audit_error = None
+        if self.audit_log is not None:
+            try:
+                self.audit_log.close()
+            except AuditLogError as e:
+                audit_error = e
+        # 3. Fecha as conexões com o banco de dados (de todas as threads)
+        with self._connections_lock:
+            for state in self._states:
+                state.connection.close()
+            self._states.clear()
+        self._local = _ThreadState()
+        if audit_error is not None:
+            raise audit_error
 
 
 ''' Criando banco de dados para teste '''
@@ -572,9 +1867,16 @@ def populate_test_database(db_manager):
 
 
 if __name__ == "__main__":
-    # Cria uma instância do DatabaseManager
-    db = DatabaseManager()
-    # Popula o banco de dados com dados de teste
-    populate_test_database(db)
+    # Cria uma instância do DatabaseManager com o perfil de carga em massa
+    db = DatabaseManager(profile="bulk-load")
+    # `python database_manager.py backfill` apenas recalcula os resumos a partir das vendas existentes
+    if len(sys.argv) > 1 and sys.argv[1] == "backfill":
+        db.rebuild_rollups()
+        db.close_connection()
+        print("Resumos de vendas recalculados com sucesso!")
+        sys.exit(0)
+    # Popula o banco de dados com dados de teste, tudo em uma única transação
+    with db.transaction():
+        populate_test_database(db)
     # Fecha a conexão com o banco de dados
     db.close_connection()
@@ -0,0 +1,51 @@
+'''
+
+Importação adiada de bibliotecas pesadas (pandas, numpy, matplotlib).
+O módulo só é importado de fato no primeiro acesso a um atributo, então a janela
+aparece sem esperar bibliotecas que só são usadas em relatórios e gráficos.
+
+Exemplo:
+    pd = LazyModule("pandas")   # nada é importado aqui
+    pd.DataFrame(...)           # pandas é importado neste momento
+
+'''
+
+import importlib
+import sys
+import threading
+
+
+class LazyModule:
+    def __init__(self, name):
+        """
+        Args:
+            name (str): Nome completo do módulo (ex.: "matplotlib.figure").
+        """
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Importa o módulo (se ainda não foi importado) e o retorna.
+        Pode ser chamado em segundo plano para adiantar a importação.
+        """
+        if self._module is None:
+            # O lock evita que duas threads façam a primeira importação ao mesmo tempo
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def is_loaded(self):
+        """
+        Indica se o módulo já foi importado (por este objeto ou por outra parte do programa).
+        """
+        return self._module is not None or self._name in sys.modules
+
+    def __getattr__(self, attribute):
+        return getattr(self.load(), attribute)
+
+    def __repr__(self):
+        state = "carregado" if self._module is not None else "adiado"
+        return f"<LazyModule {self._name} ({state})>"
@@ -0,0 +1,173 @@
+'''
+
+Busca enquanto o usuário digita (clientes no caixa, produtos no estoque).
+Cada alteração do texto reinicia um timer curto (debounce); quando o usuário para de digitar,
+a consulta roda em uma thread separada e o resultado volta para a interface por um sinal.
+Consultas que ficaram para trás (o texto mudou antes de terminarem) são descartadas, e quando
+o novo texto apenas refina o anterior, o resultado anterior é filtrado em memória, sem ir ao banco.
+O resultado guardado para o refinamento vale por até `max_age` segundos e é descartado com
+`invalidate()` quando a aplicação grava um cliente ou produto.
+
+'''
+
+import re
+import time
+import unicodedata
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+
+def normalize(text):
+    """
+    Deixa o texto em minúsculas e sem acentos, como o tokenizador da busca textual do banco.
+    """
+    text = unicodedata.normalize("NFKD", str(text).casefold())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def words_of(text):
+    """
+    Separa o texto nas palavras usadas na busca (apenas letras e números).
+    """
+    return re.findall(r"\w+", normalize(text))
+
+
+def narrows(new_text, old_text):
+    """
+    Indica se a busca por new_text retorna um subconjunto da busca por old_text.
+    Como cada palavra é buscada como prefixo e todas precisam aparecer, continuar
+    digitando (o texto novo começa com o antigo) só pode reduzir o resultado.
+    """
+    return bool(words_of(old_text)) and normalize(new_text).startswith(normalize(old_text))
+
+
+class _SearchSignals(QObject):
+    # (geração, texto, resultado)
+    finished = pyqtSignal(int, str, object)
+    failed = pyqtSignal(int, str, object)
+
+
+class _SearchTask(QRunnable):
+    def __init__(self, live_search, generation, text):
+        super().__init__()
+        self.live_search = live_search
+        self.generation = generation
+        self.text = text
+
+    def run(self):
+        # Consulta que já ficou para trás nem chega a ir ao banco
+        if self.generation != self.live_search.generation:
+            return
+        try:
+            result = self.live_search.search(self.text, self.live_search.limit)
+        except Exception as error:
+            self.live_search.signals.failed.emit(self.generation, self.text, error)
+            return
+        self.live_search.signals.finished.emit(self.generation, self.text, result)
+
+
+class LiveSearch(QObject):
+    def __init__(self, line_edit, search, on_results, columns, limit=None, delay_ms=150, max_age=30.0, parent=None):
+        """
+        Args:
+            line_edit (QLineEdit): Campo de texto observado.
+            search (callable): Função (texto, limite) -> DataFrame, executada fora da thread da interface.
+            on_results (callable): Função que recebe o DataFrame do resultado (chamada na thread da interface).
+            columns (tuple): Colunas do resultado onde a busca procura o texto (para o refinamento em memória).
+            limit (int, opcional): Quantidade máxima de resultados por consulta. None = sem limite.
+            delay_ms (int): Tempo sem digitação antes de consultar.
+            max_age (float): Tempo máximo (s) em que o último resultado é reaproveitado sem consultar o banco.
+            parent (QObject, opcional): Objeto pai no Qt.
+        """
+        super().__init__(parent)
+        self.search = search
+        self.on_results = on_results
+        self.columns = columns
+        self.limit = limit
+        self.line_edit = line_edit
+        # Número da consulta mais recente; resultados de gerações anteriores são descartados
+        self.generation = 0
+        self.max_age = max_age
+        # Último resultado exibido, o texto que o gerou e quando (time.monotonic)
+        self._last_text = None
+        self._last_result = None
+        self._last_time = None
+
+        # Uma única thread para as buscas: consultas enfileiradas e já superadas são puladas
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = _SearchSignals()
+        self.signals.finished.connect(self._finished)
+        self.signals.failed.connect(self._failed)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self.search_now)
+        line_edit.textChanged.connect(self._text_changed)
+
+    def _text_changed(self, _text):
+        # Reinicia a espera a cada tecla: só consulta quando o usuário para de digitar
+        self.timer.start()
+
+    def search_now(self):
+        """
+        Busca imediatamente o texto atual do campo (sem esperar o debounce).
+        """
+        self.timer.stop()
+        text = self.line_edit.text()
+        self.generation += 1
+        if self._last_time is not None and time.monotonic() - self._last_time > self.max_age:
+            self.invalidate()
+        if text == self._last_text:
+            return
+        # Refinamento: o resultado anterior estava completo e o texto novo só o restringe
+        if self._last_result is not None and self._is_complete(self._last_result) and narrows(text, self._last_text):
+            self._show(text, self._filter(self._last_result, text))
+            return
+        self.pool.start(_SearchTask(self, self.generation, text))
+
+    def invalidate(self):
+        """
+        Descarta o último resultado: a próxima busca consulta o banco (ex.: após gravar um cliente ou produto).
+        """
+        self._last_text = None
+        self._last_result = None
+        self._last_time = None
+
+    def wait(self):
+        """
+        Aguarda a consulta em andamento terminar (usado ao fechar a janela).
+        """
+        self.pool.waitForDone()
+
+    def _finished(self, generation, text, result):
+        # Resultado de uma consulta superada por outra mais recente
+        if generation != self.generation:
+            return
+        self._show(text, result)
+
+    def _failed(self, generation, text, error):
+        if generation != self.generation:
+            return
+        print(f"Live search ({text!r}).....\033[91m{error}\033[0m")
+
+    def _show(self, text, result):
+        self._last_text = text
+        self._last_result = result
+        self._last_time = time.monotonic()
+        self.on_results(result)
+
+    def _is_complete(self, result):
+        # Com limite, um resultado cheio pode ter deixado registros de fora
+        return self.limit is None or result.shape[0] < self.limit
+
+    def _filter(self, result, text):
+        # Mesma regra do banco: cada palavra precisa ser prefixo de alguma palavra das colunas pesquisadas
+        words = words_of(text)
+        texts = result[list(self.columns)].astype(str).agg(" ".join, axis=1)
+        keep = [
+            all(any(token.startswith(word) for token in tokens) for word in words)
+            for tokens in map(words_of, texts)
+        ]
+        return result[keep]
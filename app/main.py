@@ -1,71 +1,67 @@
-from PyQt6.QtWidgets import QMainWindow, QApplication, QTableView, QVBoxLayout, QWidget, QPushButton, QHeaderView, QFrame, QGraphicsScene, QGraphicsPixmapItem
+import time
+# Instante em que o programa começou a carregar, usado na métrica de inicialização
+STARTED_AT = time.perf_counter()
+
+from PyQt6.QtWidgets import QMainWindow, QApplication, QTableView, QVBoxLayout, QWidget, QPushButton, QHeaderView, QFrame, QGraphicsScene, QGraphicsPixmapItem, QProgressBar
 from app import Ui_MainWindow  # Importa a interface gerada pelo Qt Designer
-from PyQt6.QtCore import Qt, QAbstractTableModel, QVariant
+from PyQt6.QtCore import Qt
 from PyQt6.QtCore import QTimer
 from PyQt6.QtGui import QPixmap,QImage
 
-from sales_processor import SalesProcessor
+from sales_processor import SalesProcessor, InsufficientStockError, is_busy
+from table_models import PandasModel, PagedTableModel
+from cart import CartModel
+from live_search import LiveSearch
+from workers import TaskRunner
 from datetime import datetime
+from functools import partial
 # traceback
 import traceback
 
 # Imports para gráficos
+# Bibliotecas pesadas carregadas só no primeiro uso (ver lazy.py): a janela aparece sem esperar por elas
 import sys
-import pandas as pd
-import numpy as np
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-
-
-class PandasModel(QAbstractTableModel):
-    def __init__(self, dataframe: pd.DataFrame):
-        super().__init__()
-        self._data = dataframe
+from lazy import LazyModule
+pd = LazyModule("pandas")
+from charts import ChartManager, ChartSpec, load_matplotlib
+from dashboard import DashboardAggregator
+
+# Gráficos da página inicial: nome -> (widget do QtDesigner, descrição do gráfico)
+DASHBOARD_CHARTS = {
+    "vendas_por_mes": ("graphicsView_initial", ChartSpec("line", "Crescimento de vendas por mês", "Valor de vendas por mês", facecolor="#f0f0f0", max_size=(736, 369))),
+    "vendas_mes_atual": ("graphicsView_initial_2", ChartSpec("line", "Crescimento de vendas por dia no mês atual", "Valor de vendas por dia", max_size=(736, 369))),
+    "produtos_vendidos": ("graphicsView_initial_3", ChartSpec("bar", "Quantidade de Produtos Vendidos", "Quantidade Vendida", xlabel="Nome do Produto", grid="y", facecolor="#f0f0f0", min_size=(950, 450))),
+    "vendas_periodo": ("graphicsView_initial_4", ChartSpec("line", "Crescimento de vendas", "Valor em R$")),
+    "lucro_periodo": ("graphicsView_initial_5", ChartSpec("line", "Lucro por Mês", "Lucro ( R$ )", max_size=(736, 369))),
+    "lucro_mes_atual": ("widget_2", ChartSpec("line", "Lucro por Dia ( Mês Atual )", "Lucro ( R$ )", max_size=(736, 369))),
+    "estoque": ("widget", ChartSpec("bar", "Quantidade de Produtos em Estoque", "Quantidade em Estoque", facecolor="#f0f0f0")),
+}
 
-    def rowCount(self, index):
-        return self._data.shape[0]
-
-    def columnCount(self, index):
-        return self._data.shape[1]
-
-    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
-        if role == Qt.ItemDataRole.DisplayRole:
-            return str(self._data.iloc[index.row(), index.column()])
-        elif role == Qt.ItemDataRole.TextAlignmentRole:
-            # Centraliza o conteúdo das células
-            return Qt.AlignmentFlag.AlignCenter
-        return QVariant()
-
-    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
-        if role == Qt.ItemDataRole.DisplayRole:
-            if orientation == Qt.Orientation.Horizontal:
-                return self._data.columns[section]
-            else:
-                return str(self._data.index[section])
 
 class MainWindow(QMainWindow):
     
-    def __init__(self):
+    def __init__(self, register_mode=False, chart_mode="canvas", audit="async"):
+        """
+        Args:
+            register_mode (bool): Modo caixa: abre direto na página de venda e não carrega
+                os gráficos na inicialização (eles são carregados ao abrir a página inicial).
+            chart_mode (str): Modo dos gráficos (ver ChartManager): "canvas" ou "pixmap"
+                (desenhados em segundo plano e guardados em cache como imagens).
+            audit (str): Gravação do log de operações (ver DatabaseManager): "async" ou "strict".
+        """
         super().__init__()
         
-        # Inicializa a classe SalesProcessor
-        self.sales_processor = SalesProcessor()
+        # O SalesProcessor é criado na inicialização em segundo plano (ver warm_up)
+        self.sales_processor = None
+        # Resumo das vendas da página inicial (DashboardAggregator), lido no primeiro carregamento do painel
+        self.dashboard = None
+        self.register_mode = register_mode
+        self.audit = audit
+        self.startup_metrics = {}
         
         # Iniciando variávels de controle
-        # dataframe para armazenar os produtos do carrinho
-        self.carrinho = pd.DataFrame(columns=["id","name", "code", "sale_price", "stock", "quantity"])
-        carrinho_tmp = self.carrinho.copy()
-        carrinho_tmp.columns = ["ID", "Nome", "Código", "Preço de Venda", "Estoque", "Quantidade"]
-        self.clientes = pd.DataFrame(columns=["id", "name", "cpf"])
-        
-        self.controle_de_estoque = pd.DataFrame(columns=["id", "name", "code", "stock"])
-        self.table_estoque = pd.DataFrame(columns=["id", "name", "code", "description", "purchase_price", "sale_price", "stock"])
-        estoque_tmp = self.table_estoque.copy()
-        estoque_tmp.columns = ["ID", "Nome", "Código", "Descrição", "Preço de Compra", "Preço de Venda", "Estoque"]
-        self.vendas = pd.DataFrame(columns=["id", "client_id", "sale_date", "total_value"])
-        self.table_vendas = pd.DataFrame(columns=["id", "client_id", "sale_date", "total_value", "payment", "installment", "tax"])
-        self.table_log_pd = pd.DataFrame(columns=["ID", "Operação", "Data"])
+        # Os DataFrames (carrinho, tabelas) são criados em init_tables, depois que o pandas
+        # foi carregado em segundo plano
         self.cliente = None
         self.produto = None
         self.payment_method = 1
@@ -75,7 +71,6 @@ class MainWindow(QMainWindow):
         self.installment = 1
         self.value_total = 0
         self.purchase_total = 0
-        self.installment_table = pd.DataFrame(columns=["N de Parcelas", "Valor das Parcelas", "Taxa", "Desconto"])
         self.payment_names = {
             0: "Dinheiro",
             1: "Cartão de Crédito",
@@ -87,32 +82,23 @@ class MainWindow(QMainWindow):
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
         
-        # Vai para a pagina loading_page
-        self.go_to_loading_page()
-        
-        # Busca por todas as vendas e preenche o dataframe vendas
-        self.vendas = self.sales_processor.search_sale()
-        
-        # Testando gráficos #################
-
-        # Gerar o gráfico de crescimento
-        self.plot_products()
-        self.plot_profit_growth_daily()
-        self.plot_sales_growth_daily()
-        self.plot_sales_growth()
-        self.plot_stock_products()
-        
+        # Operações do banco de dados fora da thread da interface, com indicador de ocupado na barra de status
+        self.tasks = TaskRunner(parent=self)
+        self.busy_indicator = QProgressBar()
+        self.busy_indicator.setRange(0, 0)
+        self.busy_indicator.setMaximumWidth(120)
+        self.busy_indicator.setTextVisible(False)
+        self.busy_indicator.hide()
+        self.ui.statusbar.addPermanentWidget(self.busy_indicator)
+        self.tasks.busy_changed.connect(self.set_busy)
+        
+        # Cada gráfico da página inicial tem um único canvas, atualizado com os dados novos
+        self.charts = ChartManager(mode=chart_mode, parent=self)
+        for nome, (widget, spec) in DASHBOARD_CHARTS.items():
+            self.charts.register(nome, getattr(self.ui, widget), spec)
         
         ######################
         # Aplicando estilo na QTableView
-        self.ui.carrinho_table.setModel(PandasModel(carrinho_tmp))
-        self.ui.table_search_client_carrinho.setModel(PandasModel(self.clientes))
-        self.ui.table_clientes.setModel(PandasModel(self.clientes))
-        self.ui.table_finalizar_venda.setModel(PandasModel(carrinho_tmp))
-        self.ui.table_estoque.setModel(PandasModel(estoque_tmp))
-        self.ui.table_ultimas_compras.setModel(PandasModel(self.table_vendas))
-        self.ui.table_parcelas.setModel(PandasModel(self.installment_table))
-        self.ui.table_log.setModel(PandasModel(self.table_log_pd))
         # Configuração para preencher a largura da QTableView
         header = self.ui.carrinho_table.horizontalHeader()
         header.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)  # Faz com que as colunas preencham 100% da largura
@@ -120,10 +106,6 @@ class MainWindow(QMainWindow):
         header_2 = self.ui.table_search_client_carrinho.horizontalHeader()
         header_2.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         
-        model = self.buscar_cliente('')
-        model.columns = ["ID", "Nome", "CPF"]
-        self.ui.table_search_client_carrinho.setModel(model)
-        
         header_25 = self.ui.table_clientes.horizontalHeader()
         header_25.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         
@@ -141,7 +123,12 @@ class MainWindow(QMainWindow):
         
         header_7 = self.ui.table_log.horizontalHeader()
         header_7.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        
+
+        # Ordenação ao clicar no cabeçalho das tabelas de consulta (começa na ordem original)
+        for table in (self.ui.table_clientes, self.ui.table_estoque, self.ui.table_ultimas_compras, self.ui.table_log):
+            table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+            table.setSortingEnabled(True)
+
 
         # Inicializando Botões do Menu Principal
         self.ui.btn_menu_inicio.clicked.connect(self.go_to_inicial_page)
@@ -202,6 +189,23 @@ class MainWindow(QMainWindow):
         # LOG PAGE
         self.ui.log_filter_btn.clicked.connect(self.filter_log)
         
+        # Busca enquanto digita: clientes na página de venda e produtos no controle de estoque
+        self.busca_cliente_ao_vivo = LiveSearch(
+            self.ui.lineEdit_buscar_cliente_carrinho,
+            search=lambda text, limit: self.sales_processor.search_customers(text, limit=limit),
+            on_results=self.mostrar_busca_cliente,
+            columns=("name", "cpf", "email"),
+            limit=50,
+            parent=self,
+        )
+        self.busca_produto_ao_vivo = LiveSearch(
+            self.ui.lineEdit_buscar_estoque_nome,
+            search=lambda text, limit: self.sales_processor.search_products(text, limit=limit),
+            on_results=self.mostrar_busca_estoque,
+            columns=("name", "description", "code"),
+            parent=self,
+        )
+        
         # Iniciando Temas
         self.default_theme(
             title_size="font-size: 30px; font-weight: bold;", 
@@ -210,462 +214,289 @@ class MainWindow(QMainWindow):
             background_lineedit="background: white; color: #333;border: 1px solid grey;border-radius: 3px;"  # Fundo dos campos de texto totalmente branco com texto escuro
         )
         
+        # Vai para a pagina loading_page e inicia o carregamento em segundo plano
+        self.go_to_loading_page()
+        # Primeiro quadro: o timer dispara assim que o loop de eventos começa a rodar (janela já visível)
+        QTimer.singleShot(0, lambda: self.mark_startup("first_frame"))
+        
+    def closeEvent(self, event):
+        # Aguarda as operações e buscas em andamento antes de fechar as conexões
+        self.tasks.wait()
+        self.busca_cliente_ao_vivo.wait()
+        self.busca_produto_ao_vivo.wait()
+        self.charts.wait()
+        # Garante que nenhuma escrita pendente seja perdida ao fechar a janela
+        if self.sales_processor is not None:
+            self.sales_processor.close()
+        super().closeEvent(event)
+        
+    def init_tables(self):
+        '''
+        Método para criar os DataFrames de controle e os modelos iniciais das tabelas
+        '''
+        # Carrinho da página de venda (o mesmo modelo é exibido na página de finalizar venda)
+        self.carrinho = CartModel()
+        self.clientes = pd.DataFrame(columns=["id", "name", "cpf"])
+        
+        self.controle_de_estoque = pd.DataFrame(columns=["id", "name", "code", "stock"])
+        self.table_estoque = pd.DataFrame(columns=["id", "name", "code", "description", "purchase_price", "sale_price", "stock"])
+        estoque_tmp = self.table_estoque.copy()
+        estoque_tmp.columns = ["ID", "Nome", "Código", "Descrição", "Preço de Compra", "Preço de Venda", "Estoque"]
+        self.table_vendas = pd.DataFrame(columns=["id", "client_id", "sale_date", "total_value", "payment", "installment", "tax"])
+        self.table_log_pd = pd.DataFrame(columns=["ID", "Operação", "Data"])
+        self.installment_table = pd.DataFrame(columns=["N de Parcelas", "Valor das Parcelas", "Taxa", "Desconto"])
+        
+        self.ui.carrinho_table.setModel(self.carrinho)
+        self.ui.table_search_client_carrinho.setModel(PandasModel(self.clientes))
+        self.ui.table_clientes.setModel(PandasModel(self.clientes))
+        self.ui.table_finalizar_venda.setModel(self.carrinho)
+        self.ui.table_estoque.setModel(PandasModel(estoque_tmp))
+        self.ui.table_ultimas_compras.setModel(PandasModel(self.table_vendas))
+        self.ui.table_parcelas.setModel(PandasModel(self.installment_table))
+        self.ui.table_log.setModel(PandasModel(self.table_log_pd))
+    
+    def set_busy(self, busy):
+        # Indicador de operação em andamento na barra de status
+        self.busy_indicator.setVisible(busy)
+        self.ui.statusbar.showMessage("Carregando..." if busy else "")
+        
     def filter_plot_products(self):
         from_date = self.ui.dateEdit_3.text()
         to_date = self.ui.dateEdit_4.text()
         dateEdit = datetime.strptime(from_date, "%d/%m/%Y").strftime("%Y-%m-%d")
         dateEdit_2 = datetime.strptime(to_date, "%d/%m/%Y").strftime("%Y-%m-%d")
-        self.plot_products(date_from=dateEdit, date_to=dateEdit_2)
+        self.tasks.submit(self.sales_processor.top_products, date_from=dateEdit, date_to=dateEdit_2, n=20,
+                          on_result=lambda produtos: self.plot_products(sales_product=produtos))
         
     def filtrar_plot_sales(self):
         from_date = self.ui.dateEdit_5.text()
         to_date = self.ui.dateEdit_6.text()
-        
+
         dateEdit = datetime.strptime(from_date, "%d/%m/%Y").strftime("%Y-%m-%d")
         dateEdit_2 = datetime.strptime(to_date, "%d/%m/%Y").strftime("%Y-%m-%d")
+        # O período é recortado do resumo já carregado, sem nova consulta ao banco
         self.plot_sales(date_from=dateEdit, date_to=dateEdit_2)
-    
+
     def plot_sales(self, date_from=None, date_to=None):
-        if self.vendas.empty:
+        if self.dashboard is None or self.dashboard.empty:
             return
 
-        actual_month = datetime.now().month
-        sales_copy = self.vendas.copy()
-        
-        # Converter as datas para o formato mês/ano e agrupar por mês
-        sales_copy['sale_month'] = pd.to_datetime(sales_copy['sale_date']).dt.to_period('M')
-        
-        
-        # Filtrar datas
-        if date_from is not None and date_to is not None:
-            vendas_diarias = sales_copy[(sales_copy['sale_date'] >= date_from) & (sales_copy['sale_date'] <= date_to)]
-            
-        sale_month_qtd = len(vendas_diarias['sale_month'].unique())
-        if sale_month_qtd > 1:
-            vendas_diarias = vendas_diarias.groupby('sale_month').sum(numeric_only=True).reset_index()
-            vendas_diarias['sale_month'] = vendas_diarias['sale_month'].dt.strftime('%b')
-        else:
-            vendas_diarias = vendas_diarias.groupby('sale_date').sum(numeric_only=True).reset_index()
-            vendas_diarias['sale_date'] = pd.to_datetime(vendas_diarias['sale_date']).dt.strftime('%d')
-        
-        # Adicionar coluna com a soma acumulada por dia
-        vendas_diarias['cumulative_sales'] = vendas_diarias['total_value'].cumsum()
-
-        # Obter o tamanho atual do QWidget que você usou no QtDesigner
-        width_px = self.ui.graphicsView_initial_4.width()
-        height_px = self.ui.graphicsView_initial_4.height()
-
-        dpi = 100
-        fig = Figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
-        canvas = FigureCanvas(fig)
-        
-        ax = fig.add_subplot(111)
-        if sale_month_qtd > 1:
-            ax.plot(vendas_diarias['sale_month'].astype(str), vendas_diarias['cumulative_sales'], marker='o', linestyle='-', color='b')
-        else:
-            ax.plot(vendas_diarias['sale_date'].astype(str), vendas_diarias['cumulative_sales'], marker='o', linestyle='-', color='b')
-        ax.set_title("Crescimento de vendas")
-        ax.set_ylabel("Valor em R$")
-        ax.grid(True)
-        
-        
-        # Obter o layout existente do graphicsView_initial_4
-        layout = self.ui.graphicsView_initial_4.layout()
-        
-        # Se não houver layout, criar um novo
-        if layout is None:
-            layout = QVBoxLayout(self.ui.graphicsView_initial_4)
-            self.ui.graphicsView_initial_4.setLayout(layout)
-        else:
-            # Limpar o layout atual removendo widgets anteriores
-            for i in reversed(range(layout.count())): 
-                layout.itemAt(i).widget().setParent(None)
-
-        # Adicionar o novo canvas ao layout existente
-        layout.addWidget(canvas)
-        canvas.draw()
-    
-    def plot_products(self, date_from=None, date_to=None):
-        if self.vendas.empty:
+        # Por mês quando o período tem mais de um mês, senão por dia
+        vendas, _ = self.dashboard.period(date_from=date_from, date_to=date_to)
+        if vendas.empty:
             return
 
-        # Pegando a tabela do DB: SalesProduct
-        sales_product = self.sales_processor.search_sales_product()
-
-        # Buscar pelo sale_id e adicionar a coluna sale_date sem agrupar
-        sales_product = sales_product.merge(self.vendas[['id', 'sale_date']], left_on='sale_id', right_on='id', how='left')
-
-        if date_from is not None and date_to is not None:
-            sales_product = sales_product[(sales_product['sale_date'] >= date_from) & (sales_product['sale_date'] <= date_to)]
-        
-        # Agrupar e somar a quantidade por produto
-        sales_product = sales_product.groupby('product_id').sum(numeric_only=True).reset_index()
-
-        # Separando as 20 maiores quantidades e ordenando
-        sales_product = sales_product.nlargest(20, 'quantity').sort_values(by='quantity', ascending=False)
-
-        # Buscar o nome do produto
-        sales_product['name'] = sales_product['product_id'].apply(lambda x: self.sales_processor.search_product_id(id=x)['name'].iloc[0])
-
-        # Obter o tamanho atual do QWidget que foi nomeado como graphicsView_initial_3 no QtDesigner
-        width_px = self.ui.graphicsView_initial_3.width()
-        height_px = self.ui.graphicsView_initial_3.height()
-
-        # Definir tamanho mínimo, se necessário
-        width_px = max(width_px, 950)
-        height_px = max(height_px, 450)
-
-        dpi = 100  # Densidade de pixels por polegada
-
-        # Criar a figura com o tamanho ajustado
-        fig = Figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
-        canvas = FigureCanvas(fig)
-
-        fig.patch.set_facecolor('#f0f0f0')
+        self.charts.update("vendas_periodo", vendas['label'], vendas['cumulative_revenue'], key=self.chart_key(date_from, date_to))
 
-        ax = fig.add_subplot(111)
+    def plot_products(self, date_from=None, date_to=None, sales_product=None):
+        if self.dashboard is None or self.dashboard.empty:
+            return
 
-        # Plotar o gráfico de barras
-        ax.bar(sales_product['name'].astype(str), sales_product['quantity'], color='b', alpha=0.7)
-        ax.set_title("Quantidade de Produtos Vendidos")
-        ax.set_xlabel("Nome do Produto")
-        ax.set_ylabel("Quantidade Vendida")
-        ax.grid(True, axis='y')
+        # Os 20 produtos mais vendidos no período, já ordenados e com o nome (lidos fora da thread da interface)
+        if sales_product is None:
+            self.tasks.submit(self.sales_processor.top_products, date_from=date_from, date_to=date_to, n=20,
+                              on_result=lambda produtos: self.plot_products(date_from, date_to, sales_product=produtos))
+            return
 
-        layout = self.ui.graphicsView_initial_3.layout()
-        
-        # Se não houver layout, criar um novo
-        if layout is None:
-            layout = QVBoxLayout(self.ui.graphicsView_initial_3)
-            self.ui.graphicsView_initial_3.setLayout(layout)
-        else:
-            # Limpar o layout atual removendo widgets anteriores
-            for i in reversed(range(layout.count())): 
-                layout.itemAt(i).widget().setParent(None)
+        self.charts.update("produtos_vendidos", sales_product['name'], sales_product['quantity'], key=self.chart_key(date_from, date_to))
 
-        # Adicionar o novo canvas ao layout existente
-        layout.addWidget(canvas)
-        canvas.draw()
-        
     def plot_profit_growth_daily(self):
-        if self.vendas.empty:
+        if self.dashboard is None or self.dashboard.empty:
             return
 
-        actual_month = datetime.now().month
-        sales_copy = self.vendas.copy()
-        
-        # Converter as datas para o formato mês/ano e agrupar por mês
-        sales_copy['sale_month'] = pd.to_datetime(sales_copy['sale_date']).dt.to_period('M')
-        # Criando uma coluna para os dias ( Salvar apenas o dia da venda -> %d )
-        sales_copy['sale_day'] = pd.to_datetime(sales_copy['sale_date']).dt.strftime('%d')
-        # Filtrar apenas as vendas do mês atual
-        vendas_diarias = sales_copy[sales_copy['sale_month'].dt.month == actual_month]
-        # Agrupar as vendas por dia
-        vendas_diarias = vendas_diarias.groupby('sale_day').sum(numeric_only=True).reset_index()
-        # Adicionar coluna com a soma acumulada por dia
-        vendas_diarias['cumulative_profit'] = vendas_diarias['profit'].cumsum()
-        
-
-        # Obter o tamanho atual do QWidget que você usou no QtDesigner
-        width_px = self.ui.widget_2.width()
-        height_px = self.ui.widget_2.height()
-        
-        if width_px > 736:
-            width_px = 736
-        if height_px > 369:
-            height_px = 369
+        # Lucro acumulado por dia, apenas do mês atual
+        vendas = self.dashboard.current_month(datetime.now())
+        self.charts.update("lucro_mes_atual", vendas['label'], vendas['cumulative_profit'], key=self.chart_key(datetime.now().strftime("%Y-%m")))
 
-        dpi = 100
-        fig = Figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
-        canvas = FigureCanvas(fig)
-        
-        ax = fig.add_subplot(111)
-        ax.plot(vendas_diarias['sale_day'].astype(str), vendas_diarias['cumulative_profit'], marker='o', linestyle='-', color='b')
-        ax.set_title("Lucro por Dia ( Mês Atual )")
-        ax.set_ylabel("Lucro ( R$ )")
-        ax.grid(True)
-        
-        layout = self.ui.widget_2.layout()
-        
-        # Se não houver layout, criar um novo
-        if layout is None:
-            layout = QVBoxLayout(self.ui.widget_2)
-            self.ui.widget_2.setLayout(layout)
-        else:
-            # Limpar o layout atual removendo widgets anteriores
-            for i in reversed(range(layout.count())): 
-                layout.itemAt(i).widget().setParent(None)
-
-        # Adicionar o novo canvas ao layout existente
-        layout.addWidget(canvas)
-        canvas.draw()
-    
     def filtrar_plot_profit(self):
         from_date = self.ui.dateEdit_7.text()
         to_date = self.ui.dateEdit_8.text()
-        
+
         dateEdit = datetime.strptime(from_date, "%d/%m/%Y").strftime("%Y-%m-%d")
         dateEdit_2 = datetime.strptime(to_date, "%d/%m/%Y").strftime("%Y-%m-%d")
+        # O período é recortado do resumo já carregado, sem nova consulta ao banco
         self.plot_profit_growth_custom(date_from=dateEdit, date_to=dateEdit_2)
-    
+
     def plot_profit_growth_custom(self, date_from=None, date_to=None):
-        if self.vendas.empty:
+        if self.dashboard is None or self.dashboard.empty:
             return
 
-        actual_month = datetime.now().month
-        sales_copy = self.vendas.copy()
-        
-        # Converter as datas para o formato mês/ano e agrupar por mês
-        sales_copy['sale_month'] = pd.to_datetime(sales_copy['sale_date']).dt.to_period('M')
-        
-        # Filtrando o mês
-        vendas_diarias = sales_copy[(sales_copy['sale_date'] >= date_from) & (sales_copy['sale_date'] <= date_to)]
-        # Agrupar as vendas
-        sale_month_qtd = len(vendas_diarias['sale_month'].unique())
-        if sale_month_qtd > 1:
-            vendas_diarias = vendas_diarias.groupby('sale_month').sum(numeric_only=True).reset_index()
-            vendas_diarias['sale_month'] = vendas_diarias['sale_month'].dt.strftime('%b')
-        else:
-            vendas_diarias = vendas_diarias.groupby('sale_date').sum(numeric_only=True).reset_index()
-            vendas_diarias['sale_date'] = pd.to_datetime(vendas_diarias['sale_date']).dt.strftime('%d')
-        
-        # Adicionar coluna com a soma acumulada por dia
-        vendas_diarias['cumulative_profit'] = vendas_diarias['profit'].cumsum()
-
-        # Obter o tamanho atual do QWidget que você usou no QtDesigner
-        width_px = self.ui.graphicsView_initial_5.width()
-        height_px = self.ui.graphicsView_initial_5.height()
-        
-        if width_px > 736:
-            width_px = 736
-        if height_px > 369:
-            height_px = 369
+        # Por mês quando o período tem mais de um mês, senão por dia
+        vendas, por_mes = self.dashboard.period(date_from=date_from, date_to=date_to)
+        if vendas.empty:
+            return
 
-        dpi = 100
-        fig = Figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
-        canvas = FigureCanvas(fig)
-        
-        ax = fig.add_subplot(111)
-        if sale_month_qtd > 1:
-            ax.plot(vendas_diarias['sale_month'].astype(str), vendas_diarias['cumulative_profit'], marker='o', linestyle='-', color='b')
-            ax.set_title("Lucro por Mês")
-        else:
-            ax.plot(vendas_diarias['sale_date'].astype(str), vendas_diarias['cumulative_profit'], marker='o', linestyle='-', color='b')
-            ax.set_title("Lucro por Dia ( Mês Atual )")
-        ax.set_ylabel("Lucro ( R$ )")
-        ax.grid(True)
-        
-        layout = self.ui.graphicsView_initial_5.layout()
-        
-        # Se não houver layout, criar um novo
-        if layout is None:
-            layout = QVBoxLayout(self.ui.graphicsView_initial_5)
-            self.ui.graphicsView_initial_5.setLayout(layout)
-        else:
-            # Limpar o layout atual removendo widgets anteriores
-            for i in reversed(range(layout.count())): 
-                layout.itemAt(i).widget().setParent(None)
+        titulo = "Lucro por Mês" if por_mes else "Lucro por Dia ( Mês Atual )"
+        self.charts.update("lucro_periodo", vendas['label'], vendas['cumulative_profit'], title=titulo, key=self.chart_key(date_from, date_to))
 
-        # Adicionar o novo canvas ao layout existente
-        layout.addWidget(canvas)
-        canvas.draw()
-        
-        
     def plot_sales_growth_daily(self):
-        if self.vendas.empty:
+        if self.dashboard is None or self.dashboard.empty:
             return
 
-        actual_month = datetime.now().month
-        sales_copy = self.vendas.copy()
-        
-        # Converter as datas para o formato mês/ano e agrupar por mês
-        sales_copy['sale_month'] = pd.to_datetime(sales_copy['sale_date']).dt.to_period('M')
-        sales_copy['sale_day'] = pd.to_datetime(sales_copy['sale_date']).dt.strftime('%d')
-        
-        # Filtrar apenas as vendas do mês atual
-        vendas_diarias = sales_copy[sales_copy['sale_month'].dt.month == actual_month]
-        
-        # Agrupar as vendas por dia
-        vendas_diarias = vendas_diarias.groupby('sale_day').sum(numeric_only=True).reset_index()
-        
-        # Adicionar coluna com a soma acumulada por dia
-        vendas_diarias['cumulative_sales'] = vendas_diarias['total_value'].cumsum()
-
-        # Obter o tamanho atual do QWidget que você usou no QtDesigner
-        width_px = self.ui.graphicsView_initial_2.width()
-        height_px = self.ui.graphicsView_initial_2.height()
-        
-        if width_px > 736:
-            width_px = 736
-        if height_px > 369:
-            height_px = 369
+        # Vendas acumuladas por dia, apenas do mês atual
+        vendas = self.dashboard.current_month(datetime.now())
+        self.charts.update("vendas_mes_atual", vendas['label'], vendas['cumulative_revenue'], key=self.chart_key(datetime.now().strftime("%Y-%m")))
 
-        dpi = 100
-        fig = Figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
-        canvas = FigureCanvas(fig)
-        
-        ax = fig.add_subplot(111)
-        ax.plot(vendas_diarias['sale_day'].astype(str), vendas_diarias['cumulative_sales'], marker='o', linestyle='-', color='b')
-        ax.set_title("Crescimento de vendas por dia no mês atual")
-        ax.set_ylabel("Valor de vendas por dia")
-        ax.grid(True)
-        
-        layout = self.ui.graphicsView_initial_2.layout()
-        
-        # Se não houver layout, criar um novo
-        if layout is None:
-            layout = QVBoxLayout(self.ui.graphicsView_initial_2)
-            self.ui.graphicsView_initial_2.setLayout(layout)
-        else:
-            # Limpar o layout atual removendo widgets anteriores
-            for i in reversed(range(layout.count())): 
-                layout.itemAt(i).widget().setParent(None)
-
-        # Adicionar o novo canvas ao layout existente
-        layout.addWidget(canvas)
-        canvas.draw()
-        
     def plot_sales_growth(self):
-        if self.vendas.empty:
+        if self.dashboard is None or self.dashboard.empty:
             return
 
-        # Converter as datas para o formato mês/ano e agrupar por mês
-        self.vendas['sale_month'] = pd.to_datetime(self.vendas['sale_date']).dt.to_period('M')
-
-        # Agrupar as vendas por mês
-        vendas_mensais = self.vendas.groupby('sale_month').sum(numeric_only=True).reset_index()
-        
-        # Transformar o mês em string ( Jan, Fev, Mar, etc )
-        vendas_mensais['sale_month'] = vendas_mensais['sale_month'].dt.strftime('%b')
-
-        # Calcular a soma acumulada das vendas mensais
-        vendas_mensais['cumulative_sales'] = vendas_mensais['total_value'].cumsum()
-
-        # Obter o tamanho atual do QWidget que foi nomeado como graphicsView_initial no QtDesigner
-        width_px = self.ui.graphicsView_initial.width()
-        height_px = self.ui.graphicsView_initial.height()
-        
-        if width_px > 736:
-            width_px = 736
-        if height_px > 369:
-            height_px = 369
-
+        # Vendas acumuladas por mês, de todo o histórico
+        vendas = self.dashboard.months()
+        self.charts.update("vendas_por_mes", vendas['label'], vendas['cumulative_revenue'], key=self.chart_key())
 
-        dpi = 100  # Densidade de pixels por polegada
-
-        # Criar a figura com o tamanho ajustado
-        fig = Figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
-        canvas = FigureCanvas(fig)
-
-        # Adicionando borda e cor de fundo
-        fig.patch.set_facecolor('#f0f0f0')
-        fig.patch.set_linewidth(0)
-
-        ax = fig.add_subplot(111)
-        
-        # Plotar o gráfico de linha mostrando o crescimento
-        ax.plot(vendas_mensais['sale_month'].astype(str), vendas_mensais['cumulative_sales'], marker='o', linestyle='-', color='b')
-        ax.set_title("Crescimento de vendas por mês")
-        ax.set_ylabel("Valor de vendas por mês")
-        ax.grid(True)
-
-        layout = self.ui.graphicsView_initial.layout()
-        
-        # Se não houver layout, criar um novo
-        if layout is None:
-            layout = QVBoxLayout(self.ui.graphicsView_initial)
-            self.ui.graphicsView_initial.setLayout(layout)
-        else:
-            # Limpar o layout atual removendo widgets anteriores
-            for i in reversed(range(layout.count())): 
-                layout.itemAt(i).widget().setParent(None)
+    def plot_stock_products(self, estoque_tmp=None):
 
-        # Adicionar o novo canvas ao layout existente
-        layout.addWidget(canvas)
-        canvas.draw()
+        # Os 10 produtos com mais unidades em estoque, já ordenados pelo banco de dados (lidos fora da thread da interface)
+        if estoque_tmp is None:
+            self.tasks.submit(self.sales_processor.top_stock, n=10,
+                              on_result=lambda estoque: self.plot_stock_products(estoque_tmp=estoque))
+            return
 
-    def plot_stock_products(self):
-        
-        self.controle_de_estoque = self.sales_processor.filter_product_name("")
-        estoque_tmp = self.controle_de_estoque.copy()
+        self.charts.update("estoque", estoque_tmp['name'], estoque_tmp['stock'], key=self.chart_key())
 
-        # Ordenando por estoque
-        estoque_tmp = estoque_tmp.sort_values(by='stock', ascending=False)
-        estoque_tmp = estoque_tmp.head(10)
-        
-        width_px = self.ui.widget.width()
-        height_px = self.ui.widget.height()
-        dpi = 100
-        fig = Figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
-        canvas = FigureCanvas(fig)
-        fig.patch.set_facecolor('#f0f0f0')
-        fig.patch.set_linewidth(0)
-        ax = fig.add_subplot(111)
-        ax.bar(estoque_tmp['name'].astype(str), estoque_tmp['stock'], color='b', alpha=0.7)
-        ax.set_title("Quantidade de Produtos em Estoque")
-        ax.set_ylabel("Quantidade em Estoque")
-        ax.grid(True)
-        
-        layout = self.ui.widget.layout()
-        
-        # Se não houver layout, criar um novo
-        if layout is None:
-            layout = QVBoxLayout(self.ui.widget)
-            self.ui.widget.setLayout(layout)
-        else:
-            # Limpar o layout atual removendo widgets anteriores
-            for i in reversed(range(layout.count())): 
-                layout.itemAt(i).widget().setParent(None)
+    def chart_key(self, *periodo):
+        # Chave das imagens dos gráficos no modo "pixmap": período e versão dos dados do painel
+        versao = self.dashboard.version if self.dashboard is not None else None
+        return (periodo, versao)
 
-        # Adicionar o novo canvas ao layout existente
-        layout.addWidget(canvas)
-        canvas.draw()
- 
     def go_to_loading_page(self):
         # Inicia progressBar_loading_page em 0
         self.ui.progressBar_loading_page.setValue(0)
-        # Muda para a página `loading_page`
-        self.ui.stackedWidget.setCurrentWidget(self.ui.loading_page)
-        
-        # Define a duração total em milissegundos (5 segundos)
-        duration = 750
-        # Define o incremento de tempo em milissegundos
-        interval = 50
-        # Calcula o incremento de valor para a progress bar
-        self.step = 100 / (duration / interval)
-
-        # Inicia o QTimer
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_progress)
-        self.timer.start(interval)
+        # Muda para a página `loading_page` (no modo caixa, direto para a página de venda, bloqueada até o fim do carregamento)
+        if self.register_mode:
+            self.ui.stackedWidget.setCurrentWidget(self.ui.page_4_venda)
+            self.ui.page_4_venda.setEnabled(False)
+        else:
+            self.ui.stackedWidget.setCurrentWidget(self.ui.loading_page)
+        # O menu só é liberado quando o banco de dados estiver pronto
+        self.ui.MenuPrincipal.setEnabled(False)
+        
+        # Carregamento real em segundo plano: a barra avança conforme cada etapa termina
+        self.tasks.submit(self.warm_up, on_progress=self.update_progress, on_result=self.warm_up_finished, on_error=self.warm_up_failed)
 
-    def update_progress(self):
-        # Atualiza o valor da progress bar
-        current_value = self.ui.progressBar_loading_page.value()
-        # Converte o incremento para inteiro
-        next_value = current_value + int(self.step)
-        
-        # Evita passar de 100 devido a arredondamentos
-        if next_value >= 100:
-            next_value = 100
+    def warm_up(self, progress):
+        '''
+        Etapas de inicialização executadas fora da thread da interface.
+        Retorna os dados da página inicial e da busca de clientes.
+        '''
+        progress(5, "Abrindo o banco de dados")
+        # Conexão, criação das tabelas e migrações
+        self.sales_processor = SalesProcessor(warm_catalog=False, audit=self.audit)
+        progress(25, "Carregando o catálogo de produtos")
+        self.sales_processor.catalog.warm()
+        progress(40, "Carregando bibliotecas")
+        pd.load()
+        dados = {"clientes": self.sales_processor.search_customers("")}
+        if self.register_mode:
+            # Modo caixa: os gráficos ficam para quando a página inicial for aberta
+            progress(100, "")
+            return dados
+        load_matplotlib()
+        progress(60, "Calculando o resumo das vendas")
+        dados.update(self.load_dashboard())
+        progress(85, "Desenhando os gráficos")
+        return dados
+
+    def update_progress(self, value, etapa=""):
+        # Atualiza o valor da progress bar e a etapa atual na barra de status
+        self.ui.progressBar_loading_page.setValue(value)
+        self.ui.statusbar.showMessage(etapa)
+
+    def warm_up_finished(self, dados):
+        self.init_tables()
+        self.ui.table_search_client_carrinho.setModel(self.clientes_model(dados["clientes"]))
+        
+        # Timer que efetiva os commits agrupados pendentes (modos "grouped" e "relaxed").
+        # As escritas acontecem na thread de escrita do TaskRunner, então o flush também roda lá,
+        # e só essa thread agrupa commits (as demais fazem commit a cada escrita)
+        if self.sales_processor.db.durability != "full":
+            self.tasks.submit(self.sales_processor.db.claim_group_commit, write=True, show_busy=False)
+            self.flush_timer = QTimer(self)
+            self.flush_timer.timeout.connect(lambda: self.tasks.submit(self.sales_processor.db.flush_if_due, write=True, show_busy=False))
+            self.flush_timer.start(int(self.sales_processor.db.group_interval * 1000))
+        
+        if self.register_mode:
+            # Caixa pronto para ler códigos de barras
+            self.ui.MenuPrincipal.setEnabled(True)
+            self.ui.page_4_venda.setEnabled(True)
+            self.ui.statusbar.clearMessage()
+            self.ui.lineEdit_cod_produto_carrinho.setFocus()
+            QTimer.singleShot(0, lambda: self.mark_startup("interactive"))
+            return
+        
+        # Os gráficos precisam ser criados na thread da interface: um por vez, deixando a barra ser redesenhada entre eles
+        etapas = self.dashboard_steps(dados)
+        def proximo_grafico():
+            if etapas:
+                etapas.pop(0)()
+                self.update_progress(100 - 15 * len(etapas) // 5, "Desenhando os gráficos")
+                QTimer.singleShot(0, proximo_grafico)
+                return
+            self.ui.MenuPrincipal.setEnabled(True)
+            self.ui.statusbar.clearMessage()
+            # Muda para a página `page_1_inicial`
+            self.ui.stackedWidget.setCurrentWidget(self.ui.page)
+            QTimer.singleShot(0, lambda: self.mark_startup("interactive"))
+        proximo_grafico()
 
-        self.ui.progressBar_loading_page.setValue(next_value)
+    def warm_up_failed(self, e):
+        print(getattr(e, "traceback", repr(e)))
+        self.ui.statusbar.showMessage(f"Erro ao abrir o banco de dados: {e}")
 
-        # Para o timer quando atinge 100%
-        if next_value >= 100:
-            self.timer.stop()
-            # Muda para a página `page_1_inicial`
-            self.go_to_inicial_page()
+    def mark_startup(self, etapa):
+        # Registra o tempo desde o início do programa até a etapa e, no fim, exibe a métrica
+        self.startup_metrics[etapa] = time.perf_counter() - STARTED_AT
+        if etapa == "interactive":
+            print("Startup.....\033[92m" + ", ".join(f"{k}={v:.3f}s" for k, v in self.startup_metrics.items()) + "\033[0m")
 
     def go_to_inicial_page(self):
-        # Recarregando gráficos
-        self.vendas = self.sales_processor.search_sale()
-        self.plot_products()
-        self.plot_profit_growth_daily()
-        self.plot_sales_growth_daily()
-        self.plot_sales_growth()
         # Muda para a página `page_1_inicial`
         self.ui.stackedWidget.setCurrentWidget(self.ui.page)
+        # Recarregando gráficos: os dados são lidos fora da thread da interface
+        self.tasks.submit(self.load_dashboard, on_result=self.show_dashboard)
+    
+    def load_dashboard(self):
+        # Executado no TaskRunner: consultas e agregação, nada de interface aqui
+        atual = self.dashboard
+        if atual is None:
+            dashboard = DashboardAggregator(*self.sales_processor.sales_since())
+        else:
+            # Apenas as vendas registradas depois da última leitura são somadas ao resumo
+            novas, ultima_venda, versoes = self.sales_processor.sales_since(after_id=atual.last_sale_id)
+            if versoes["Sales"] != atual.versions["Sales"]:
+                # Alguma venda antiga foi editada ou removida: o resumo é relido por completo
+                dashboard = DashboardAggregator(*self.sales_processor.sales_since())
+            else:
+                dashboard = atual.fold(novas, ultima_venda, versoes)
+        # Séries usadas pelos gráficos da página inicial, calculadas uma vez e compartilhadas entre eles
+        dashboard.months()
+        dashboard.current_month(datetime.now())
+        dados = {"dashboard": dashboard, "produtos": None, "estoque": None}
+        # Produtos e estoque só são consultados de novo se houve venda ou alteração de produtos
+        if dashboard is not atual:
+            dados["produtos"] = self.sales_processor.top_products(n=20)
+            dados["estoque"] = self.sales_processor.top_stock(n=10)
+        return dados
+    
+    def show_dashboard(self, dados):
+        # Desenha os gráficos da página inicial com os dados de load_dashboard
+        for etapa in self.dashboard_steps(dados):
+            etapa()
+    
+    def dashboard_steps(self, dados):
+        # Um passo por gráfico da página inicial (gráficos com os mesmos dados não são redesenhados)
+        self.dashboard = dados["dashboard"]
+        etapas = [
+            self.plot_profit_growth_daily,
+            self.plot_sales_growth_daily,
+            self.plot_sales_growth,
+        ]
+        if dados["produtos"] is not None:
+            etapas.insert(0, lambda: self.plot_products(sales_product=dados["produtos"]))
+        if dados["estoque"] is not None:
+            etapas.append(lambda: self.plot_stock_products(estoque_tmp=dados["estoque"]))
+        return etapas
         
     def go_to_cadastrar_cliente(self):
         # Muda para a página `page_2_cadastrar_cliente`
@@ -680,30 +511,23 @@ class MainWindow(QMainWindow):
         self.ui.stackedWidget.setCurrentWidget(self.ui.page_4_venda)
     
     def go_to_controle_estoque(self):
-        # Faz uma busca pelo estoque e preenche a tabela
-        self.controle_de_estoque = self.sales_processor.filter_product_name("")
+        # Muda para a página `page_5_controle_estoque`
+        self.ui.stackedWidget.setCurrentWidget(self.ui.page_5_estoque)
+        # Faz uma busca pelo estoque e preenche a tabela quando o resultado chegar
+        self.tasks.submit(self.sales_processor.search_products, "", on_result=self.mostrar_controle_estoque)
+    
+    def mostrar_controle_estoque(self, produtos):
+        self.controle_de_estoque = produtos
         estoque_tmp = self.controle_de_estoque.copy()
         estoque_tmp.columns = ["ID", "Nome", "Código", "Descrição", "Preço de Compra", "Preço de Venda", "Estoque"]
         model = PandasModel(estoque_tmp)
         self.ui.table_estoque.setModel(model)
         
-        
-        # Muda para a página `page_5_controle_estoque`
-        self.ui.stackedWidget.setCurrentWidget(self.ui.page_5_estoque)
-        
     def go_to_relatorios(self):
-        self.buscar_ultimas_compras = self.sales_processor.search_sale()
-        ultimas_vendas = self.buscar_ultimas_compras
-        # Convertendo valores para payment_names no método de pagamento
-        ultimas_vendas["payment"] = ultimas_vendas["payment"].map(self.payment_names)
-        # Renomeando as colunas
-        ultimas_vendas.columns = ["ID da Venda", "ID Cliente", "Valor Total ( R$ )", "Lucro", "Parcelas", "Método de Pagamento", "Taxa de Juros (%)", "Desconto (%)","Data da Venda"]
-        
-        
-        self.ui.table_ultimas_compras.setModel(PandasModel(ultimas_vendas))
-        
         # Muda para a página `page_6_relatorios`
         self.ui.stackedWidget.setCurrentWidget(self.ui.page_6_relatorio)
+        # Modelo paginado: abre com as vendas mais recentes e carrega mais ao rolar
+        self.show_paged(self.ui.table_ultimas_compras, self.sales_processor.sale_page, self.prepare_sales)
         
     def go_to_configuracoes(self):
         # Muda para a página `page_7_configuracoes`
@@ -720,20 +544,24 @@ class MainWindow(QMainWindow):
         if product_code == "":
             self.ui.error_buscar_estoque.setText("Produto não selecionado")
             return
-        # Busca pelo produto
-        product = self.sales_processor.search_product(code=product_code)
-        if product is None or product.empty:
+        # Busca pelo produto fora da thread da interface (até o resultado chegar nenhum produto está selecionado)
+        self.produto = None
+        self.tasks.submit(self.sales_processor.get_product, code=product_code, on_result=self.mostrar_editar_estoque)
+
+    def mostrar_editar_estoque(self, product):
+        # Resultado da busca do produto a ser editado
+        if product is None:
             self.ui.error_buscar_estoque.setText("Produto não encontrado")
             return
         # Atualiza a variável produto
-        self.produto = product["id"].iloc[0]
+        self.produto = product.id
         # Preenche os campos da página de editar estoque
-        self.ui.lineEdit_add_name_produto_2.setText(product["name"].iloc[0])
-        self.ui.lineEdit_add_description_2.setText(product["description"].iloc[0])
-        self.ui.lineEdit_add_codigo_produto_2.setText(product["code"].iloc[0])
-        self.ui.lineEdit_add_valor_compra_2.setText(str(product["purchase_price"].iloc[0]))
-        self.ui.lineEdit_add_valor_venda_2.setText(str(product["sale_price"].iloc[0]))
-        self.ui.lineEdit_add_estoque_2.setText(str(product["stock"].iloc[0]))
+        self.ui.lineEdit_add_name_produto_2.setText(product.name)
+        self.ui.lineEdit_add_description_2.setText(product.description)
+        self.ui.lineEdit_add_codigo_produto_2.setText(product.code)
+        self.ui.lineEdit_add_valor_compra_2.setText(str(product.purchase_price))
+        self.ui.lineEdit_add_valor_venda_2.setText(str(product.sale_price))
+        self.ui.lineEdit_add_estoque_2.setText(str(product.stock))
         
         self.ui.stackedWidget.setCurrentWidget(self.ui.page_9_editar_estoque)    
     
@@ -742,15 +570,16 @@ class MainWindow(QMainWindow):
         Método para buscar um cliente na página de cadastro de cliente
         '''
         nome = self.ui.lineEdit_buscar_cliente_nome.text()
-        modal = self.buscar_cliente(nome)
-        self.ui.table_clientes.setModel(modal)
+        # Busca textual por nome, CPF ou e-mail (nome vazio retorna todos os clientes)
+        self.tasks.submit(self.sales_processor.search_customers, nome,
+                          on_result=lambda clientes: self.ui.table_clientes.setModel(self.clientes_model(clientes)))
         
     def go_to_payment_method(self):
         '''
         Método para mudar para a página de método de pagamento
         '''
         # 1. Verificando se o carrinho está vazio
-        if self.carrinho.empty:
+        if self.carrinho.cart.empty:
             self.ui.error_registrar_venda.setText("Carrinho vazio, é necessário adicionar itens para finalizar uma venda")
             return
         cliente = self.ui.table_search_client_carrinho.model().index(self.ui.table_search_client_carrinho.currentIndex().row(), 0).data()
@@ -760,45 +589,60 @@ class MainWindow(QMainWindow):
             self.ui.error_registrar_venda.setText("Cliente não selecionado")
             return
         
+        # 3. Verificando o estoque de todo o carrinho de uma vez, com uma única consulta
+        self.tasks.submit(self.sales_processor.check_stock_batch, self.carrinho.cart.items(), on_result=self.estoque_verificado)
+        
+    def estoque_verificado(self, faltas):
+        # Todos os itens sem estoque aparecem juntos; sem faltas segue para o pagamento
+        if faltas:
+            self.ui.error_registrar_venda.setText(self.mensagem_estoque(faltas))
+            return
+        self.ui.error_registrar_venda.setText("")
         self.ui.stackedWidget.setCurrentWidget(self.ui.payment_method)
+        
+    def mensagem_estoque(self, faltas):
+        # faltas: código -> (quantidade pedida, estoque disponível ou None se o produto não existir)
+        itens = ", ".join(
+            f"{codigo} (pedido {pedido}, {'produto inexistente' if estoque is None else f'estoque {estoque}'})"
+            for codigo, (pedido, estoque) in faltas.items()
+        )
+        return f"Estoque insuficiente, remova ou ajuste os itens: {itens}"
        
     def go_to_log_page(self):
         '''
         Método para mudar para a página de log
         '''
         
-        # Buscando o log
-        self.table_log_pd = self.sales_processor.search_log()
-        # log
-        log = self.table_log_pd.copy()
-        # Alterando o nome das colunas
-        log.columns = ["ID", "Operação", "Data"]
-        # Gerando o modelo
-        model = PandasModel(log)
-        # Atualizando a tabela
-        self.ui.table_log.setModel(model)
-        
         self.ui.stackedWidget.setCurrentWidget(self.ui.page_log)
+        # Gerando o modelo paginado: abre com os registros mais recentes e carrega mais ao rolar
+        self.show_paged(self.ui.table_log, self.sales_processor.log_page, self.prepare_log)
         
     def filter_log(self):
         '''
         Método para filtrar o log
         '''
-        date_from = self.ui.dateEdit_9.text()
-        date_to = self.ui.dateEdit_10.text()
-        
-        # Buscando o log no dataframe
-        log = self.table_log_pd.copy()
-        # Convertendo as datas para o formato datetime
-        log["datetime"] = pd.to_datetime(log["datetime"])
-        # Filtrando as datas
-        log = log[(log["datetime"] >= date_from) & (log["datetime"] <= date_to)]
-        # Alterando o nome das colunas
+        # Datas no formato DD/MM/YYYY converter para YYYY-MM-DD
+        date_from = datetime.strptime(self.ui.dateEdit_9.text(), "%d/%m/%Y").strftime("%Y-%m-%d")
+        date_to = datetime.strptime(self.ui.dateEdit_10.text(), "%d/%m/%Y").strftime("%Y-%m-%d")
+        
+        # Gerando o modelo paginado com o filtro de datas feito no banco de dados
+        fetch_page = partial(self.sales_processor.log_page, date_from=date_from, date_to=date_to)
+        self.show_paged(self.ui.table_log, fetch_page, self.prepare_log)
+        
+    def show_paged(self, table, fetch_page, prepare):
+        '''
+        Método para preencher uma tabela paginada: a primeira página é lida fora da thread
+        da interface e as seguintes (ao rolar ou ordenar) também, pelo TaskRunner
+        '''
+        self.tasks.submit(fetch_page, on_result=lambda pagina: table.setModel(PagedTableModel(fetch_page, prepare=prepare, first_page=pagina, submit=self.tasks.submit)))
+        
+    def prepare_log(self, log):
+        '''
+        Método para preparar o log para exibição (nomes das colunas)
+        '''
+        log = log.copy()
         log.columns = ["ID", "Operação", "Data"]
-        # Gerando o modelo
-        model = PandasModel(log)
-        # Atualizando a tabela
-        self.ui.table_log.setModel(model)
+        return log
         
     def select_money(self):
         '''
@@ -1016,9 +860,13 @@ class MainWindow(QMainWindow):
             return
         
         # Chamando o método create_client da classe SalesProcessor
-        self.sales_processor.create_client(name=nome, email=email, cpf=cpf, phone=phone)
-        
-        # Alterando QLabel: error_cadastrar_client para informar que o cliente foi cadastrado com sucesso
+        # e, ao terminar, mostrando a página de operação concluída
+        self.tasks.submit(self.sales_processor.create_client, name=nome, email=email, cpf=cpf, phone=phone, write=True,
+                          on_result=self.cliente_inserido)
+
+    def cliente_inserido(self, _):
+        # Cliente gravado: a busca enquanto digita volta a consultar o banco
+        self.busca_cliente_ao_vivo.invalidate()
         self.ui.stackedWidget.setCurrentWidget(self.ui.end_finish_payment)
 
     def insert_produto(self):
@@ -1041,19 +889,18 @@ class MainWindow(QMainWindow):
             self.ui.error_cadastrar_produto.setText("Verifique os valores inseridos!")
             return
 
-        
-        # Verifica se já existe um produto com o mesmo código
-        product = self.sales_processor.search_product(code=codigo)
-        if product is not None and not product.empty:
-            self.ui.error_cadastrar_produto.setText("Produto já cadastrado")
-            return
-        
-        new_product = self.sales_processor.create_product(name=nome, description=description, code=codigo, purchase_price=valor_compra, sale_price=valor_venda, stock=estoque)
-        
+        # create_product verifica se já existe um produto com o mesmo código (produto_inserido mostra o erro)
+        self.tasks.submit(self.sales_processor.create_product, name=nome, description=description, code=codigo, purchase_price=valor_compra, sale_price=valor_venda, stock=estoque, write=True,
+                          on_result=self.produto_inserido)
+    
+    def produto_inserido(self, new_product):
+        # Resultado de create_product (False quando o código já existe)
         if not new_product:
             self.ui.error_cadastrar_produto.setText("Produto já cadastrado")
             return
         
+        # Produto gravado: a busca enquanto digita volta a consultar o banco
+        self.busca_produto_ao_vivo.invalidate()
         self.ui.stackedWidget.setCurrentWidget(self.ui.end_finish_payment)
         
     def cancelar_op_cadastrar_produto(self):
@@ -1086,19 +933,10 @@ class MainWindow(QMainWindow):
         self.ui.lineEdit_qtd_produto_carrinho_2.setText("1")
         self.ui.error_registrar_venda.setText("")
         ''' Limpar o carrinho '''
-        self.carrinho = pd.DataFrame(columns=["id","name", "code", "sale_price", "stock", "quantity", "purchase_price"])
+        self.carrinho.clear()
         self.clientes = pd.DataFrame(columns=["id", "name", "cpf"])
         self.cliente = None
-        # Atualiza a visualização do carrinho na QTableView
-        tmp_carrinho = self.carrinho.copy()
-        tmp_carrinho.columns = ["ID", "Nome", "Código", "Preço de Venda", "Estoque", "Quantidade", "Preço de Compra Total"]
-        model = PandasModel(tmp_carrinho)
-        tmp_cliente = self.clientes.copy()
-        tmp_cliente.columns = ["ID", "Nome", "CPF"]
-        model_client = PandasModel(tmp_cliente)
-        self.ui.carrinho_table.setModel(model)
-        self.ui.table_search_client_carrinho.setModel(model_client)
-        self.ui.table_finalizar_venda.setModel(model)
+        self.ui.table_search_client_carrinho.setModel(self.clientes_model(self.clientes))
         # Atualizando os valores na interface
         self.ui.label_qtd_itens_carrinho.setText("0")
         self.ui.label_valor_total_carrinho.setText("R$0.00")
@@ -1143,60 +981,23 @@ class MainWindow(QMainWindow):
             self.ui.error_registrar_venda.setText("Campo obrigatório: Código do Produto não preenchido")
             return
         
-        # Busca o produto pelo código
-        product = self.sales_processor.search_product(code=codigo)
-        # Removendo colunas description e purchase_price
-        product = product.drop(columns=["description"])
-        
-        # Verifica se o produto foi encontrado e se não está vazio
-        if product is None or product.empty:
+        if quantidade == "":
+            quantidade = 1  # Se a quantidade não for informada, assume 1
+        quantidade = int(quantidade)
+        # Busca o produto pelo código fora da thread da interface
+        self.tasks.submit(self.sales_processor.get_product, code=codigo,
+                          on_result=lambda product: self.item_encontrado(product, quantidade))
+
+    def item_encontrado(self, product, quantidade):
+        # Verifica se o produto foi encontrado
+        if product is None:
             self.ui.error_registrar_venda.setText("Produto não encontrado")
             return
-        
-        # Verifica se o produto possui dados válidos antes de concatenar
-        if not product.dropna(how='all').empty:
-            # Adiciona a quantidade de produtos no DataFrame
-            if quantidade == "":
-                quantidade = 1  # Se a quantidade não for informada, assume 1
-            product["quantity"] = int(quantidade)
-
-            # MUltiplica o preço de venda pelo quantidade
-            product["sale_price"] = float(product["sale_price"].iloc[0]) * product["quantity"].iloc[0]
-            product["purchase_price"] = float(product["purchase_price"].iloc[0]) * product["quantity"].iloc[0]
-            
-            self.carrinho = pd.concat([self.carrinho, product], ignore_index=True)
-            
-        self.carrinho['id'] = range(1, len(self.carrinho) + 1)
-        
-        # Criando uma variável temporário para self.carrinho e trocar nome das colunastotal_purchase
-        tmp_carrinho = self.carrinho.copy()
-        
-        tmp_carrinho.columns = ["ID", "Nome", "Código", "Preço de Venda  ( R$ )", "Estoque", "Quantidade", "Preço de Compra Total ( R$ )"]
-
-        # Atualiza a visualização do carrinho na QTableView
-        model = PandasModel(tmp_carrinho)
-        self.ui.carrinho_table.setModel(model)  # Assume que o nome do QTableView é carrinho_table
+        # Código repetido soma a quantidade na linha que já está no carrinho
+        self.carrinho.add(product, quantidade)
         # Limpa mensagens de erro anteriores
         self.ui.error_registrar_venda.setText("")
-        # Somando a coluna sale_price do carrinho
-        total = self.carrinho["sale_price"].sum()
-        total_purchase = self.carrinho["purchase_price"].sum()
-        
-        # Atualizando os valores na interface
-        # Quantidade de itens é dado pela soma da coluna quantity
-        self.ui.label_qtd_itens_carrinho.setText(str(self.carrinho["quantity"].sum()))
-        # label_valor_total_carrinho
-        self.ui.label_valor_total_carrinho.setText(f"R${total:.2f}")
-        
-        # Gerando carrinho na página de finalizar venda
-        self.ui.table_finalizar_venda.setModel(model)
-        self.ui.label_qtd_itens_carrinho_2.setText(str(self.carrinho["quantity"].sum()))
-        self.ui.label_valor_total_carrinho_2.setText(f"R${total:.2f}")
-        
-        
-        self.ui.label_valor_total_3.setText(f"R${total:.2f}")
-        self.value_total = total
-        self.purchase_total = total_purchase
+        self.atualizar_totais_carrinho()
         
     def remove_item_carrinho(self):
         # Implementar a remoção de um item do carrinho
@@ -1209,55 +1010,60 @@ class MainWindow(QMainWindow):
         if not id.isdigit():
             self.ui.error_registrar_venda.setText("ID do Produto deve ser um número")
             return
-        # Verifica se o id é um número válido
-        if int(id) not in self.carrinho["id"].values:
+        # Remove o item do carrinho (None se o id não existir)
+        if self.carrinho.remove(int(id)) is None:
             self.ui.error_registrar_venda.setText("ID do Produto não encontrado")
             return
-        # Remove o item do carrinho
-        self.carrinho = self.carrinho[self.carrinho["id"] != int(id)]
-        
-        tmp_carrinho = self.carrinho.copy()
-        tmp_carrinho.columns = ["ID", "Nome", "Código", "Preço de Venda ( R$ )","Estoque", "Quantidade", "Preço de Compra Total ( R$ )"]
-        
-        model = PandasModel(tmp_carrinho)
-        self.ui.carrinho_table.setModel(model)
         self.ui.error_registrar_venda.setText("")
-        total = self.carrinho["sale_price"].sum()
-        total_purchase = self.carrinho["purchase_price"].sum()
+        self.atualizar_totais_carrinho()
+        
+    def atualizar_totais_carrinho(self):
+        # Totais mantidos pelo carrinho a cada alteração, sem somar as linhas de novo
+        carrinho = self.carrinho.cart
+        total = carrinho.sale_total
         self.value_total = total
-        self.purchase_total = total_purchase
+        self.purchase_total = carrinho.purchase_total
         
-        self.ui.label_qtd_itens_carrinho.setText(str(self.carrinho["quantity"].sum()))
+        # Quantidade de itens e valor total, na página de venda e na de finalizar venda
+        self.ui.label_qtd_itens_carrinho.setText(str(carrinho.quantity))
         self.ui.label_valor_total_carrinho.setText(f"R${total:.2f}")
+        self.ui.label_qtd_itens_carrinho_2.setText(str(carrinho.quantity))
+        self.ui.label_valor_total_carrinho_2.setText(f"R${total:.2f}")
+        self.ui.label_valor_total_3.setText(f"R${total:.2f}")
         
     def btn_search_client_sales(self):
         name = self.ui.lineEdit_buscar_cliente_carrinho.text()
-        model = self.buscar_cliente(name)
-        self.ui.table_search_client_carrinho.setModel(model)
-        
-    def buscar_cliente(self, name=""):
-        # Busca um cliente no banco de dados pelo nome
-        # Retorna um DataFrame com os dados do cliente
-        if name == "":
-            cliente = self.sales_processor.search_client()
-        else:
-            cliente = self.sales_processor.search_client(name)
+        self.tasks.submit(self.sales_processor.search_customers, name, on_result=self.mostrar_busca_cliente)
+        
+    def clientes_model(self, cliente):
         # Manter apenas as colunas id, name e cpf
-        cliente = cliente[["id", "name", "cpf"]]
+        cliente = cliente[["id", "name", "cpf"]].copy()
         cliente.columns = ["ID", "Nome", "CPF"]
         # Preenchendo tabela table_search_client_carrinho com os resultados
         model = PandasModel(cliente)
         return model
+    
+    def mostrar_busca_cliente(self, cliente):
+        # Resultado da busca enquanto digita na página de venda
+        self.ui.table_search_client_carrinho.setModel(self.clientes_model(cliente))
+    
+    def mostrar_busca_estoque(self, produto):
+        # Resultado da busca enquanto digita no controle de estoque
+        produto = produto.copy()
+        produto.columns = ["ID", "Nome", "Código", "Descrição", "Preço de Compra", "Preço de Venda", "Estoque"]
+        self.ui.table_estoque.setModel(PandasModel(produto))
+        self.ui.error_buscar_estoque.setText("" if not produto.empty else "Produto não encontrado")
         
     def finalizar_venda(self):
         try:
             # Verificar se o carrinho está vazio
-            if self.carrinho.empty:
+            if self.carrinho.cart.empty:
                 self.ui.error_registrar_venda_2.setText("Carrinho vazio, é necessário adicionar itens para finalizar uma venda")
                 self.ui.error_registrar_venda_2.setStyleSheet("color: red")
                 return
 
-            produtos = self.carrinho[["id", "code", "quantity"]]
+            # Itens do carrinho como (código, quantidade)
+            itens = self.carrinho.cart.items()
             # Pegando cliente a partir do QTableView selecionado
             cliente = self.ui.table_search_client_carrinho.model().index(self.ui.table_search_client_carrinho.currentIndex().row(), 0).data()
             
@@ -1267,42 +1073,53 @@ class MainWindow(QMainWindow):
                 self.ui.error_registrar_venda_2.setStyleSheet("color: red")
                 return
             # Verifica se o carrinho está vazio
-            if produtos.empty or produtos is None:
+            if not itens:
                 self.ui.error_registrar_venda_2.setText("Carrinho vazio")
                 self.ui.error_registrar_venda_2.setStyleSheet("color: red")
                 return
-            # Verificando se a quantidade de produtos vendidos é menor ou igual ao estoque
-            for index, row in produtos.iterrows():
-                # Soma a quantidade de um produto no carrinho, serve para evitar que um produto seja vendido em quantidade maior que a disponível
-                quantidade_total_do_id = self.carrinho[self.carrinho["code"] == row["code"]]["quantity"].sum() 
-                estoque = self.sales_processor.check_stock(row["code"], quantidade_total_do_id)
-                if not estoque:
-                    self.ui.error_registrar_venda_2.setText(f"Produto {row['code']} sem estoque suficiente, volte para a tela de registro de venda e remova o item")
-                    self.ui.error_registrar_venda_2.setStyleSheet("color: red")
-                    return
-                
             profit = self.value_total - self.purchase_total
-            # Processa a venda
-            venda = self.sales_processor.create_sale(client_id=cliente, total_price=self.value_total, profit = profit, payment=int(self.payment_method), installment=int(self.installment), tax=float(self.taxa), discount=float(self.desconto))
-            # Processa a venda de cada produto
-            for index, row in produtos.iterrows():
-                quantity = int(row["quantity"])
-                self.sales_processor.process_sale(sale_id=venda, product_code=row["code"], quantity=quantity)
-            # Mensagem de sucesso
-            self.limpar_carrinhos()
-            self.ui.stackedWidget.setCurrentWidget(self.ui.end_finish_payment)
+            # Processa a venda inteira em uma única transação, o estoque é validado dentro dela.
+            # O botão fica desabilitado até a venda terminar, evitando registrar a mesma venda duas vezes
+            self.ui.btn_finalizar_venda_2.setEnabled(False)
+            self.tasks.submit(self.sales_processor.checkout, cart=itens, client_id=cliente, total_price=self.value_total, profit=profit, payment=int(self.payment_method), installment=int(self.installment), tax=float(self.taxa), discount=float(self.desconto), write=True,
+                              on_result=self.venda_finalizada, on_error=self.venda_com_erro)
         except Exception as e:
             # printando traceback
             traceback_print = traceback.format_exc()
             print(traceback_print)
+    
+    def venda_finalizada(self, sale_id):
+        # Mensagem de sucesso (o estoque dos produtos vendidos mudou, então a busca de produtos volta ao banco)
+        self.busca_produto_ao_vivo.invalidate()
+        self.ui.btn_finalizar_venda_2.setEnabled(True)
+        self.limpar_carrinhos()
+        self.ui.stackedWidget.setCurrentWidget(self.ui.end_finish_payment)
+    
+    def venda_com_erro(self, e):
+        self.ui.btn_finalizar_venda_2.setEnabled(True)
+        if isinstance(e, InsufficientStockError):
+            self.ui.error_registrar_venda_2.setText(f"{self.mensagem_estoque(e.shortfalls)}. Volte para a tela de registro de venda")
+            self.ui.error_registrar_venda_2.setStyleSheet("color: red")
+            return
+        if is_busy(e):
+            # Outro caixa ficou com o banco ocupado durante todas as tentativas; nada foi gravado
+            self.ui.error_registrar_venda_2.setText("Banco de dados ocupado por outro caixa, tente finalizar a venda novamente")
+            self.ui.error_registrar_venda_2.setStyleSheet("color: red")
+            return
+        # printando traceback
+        print(getattr(e, "traceback", repr(e)))
         
     def buscar_estoque(self):
         nome = self.ui.lineEdit_buscar_estoque_nome.text()
         codigo = self.ui.lineEdit_buscar_estoque_codigo.text()
+        # As duas buscas rodam fora da thread da interface
+        self.tasks.submit(lambda: (self.sales_processor.search_product(code=codigo), self.sales_processor.search_products(nome)),
+                          on_result=self.mostrar_buscar_estoque)
+    
+    def mostrar_buscar_estoque(self, resultados):
         produto = None
-        # Se tiver código, buscar por ele primeiro
-        produto_codigo = self.sales_processor.search_product(code=codigo)
-        produto_nome = self.sales_processor.filter_product_name(name=nome)
+        # Se tiver código, o resultado por código vem primeiro
+        produto_codigo, produto_nome = resultados
         # Juntar os dois resultados
         if produto_codigo is not None and not produto_codigo.empty:
             produto = produto_codigo
@@ -1328,6 +1145,9 @@ class MainWindow(QMainWindow):
         
     def editar_estoque(self):
         produto = self.produto
+        if produto is None:
+            self.ui.error_cadastrar_produto_2.setText("Produto não selecionado")
+            return
         
         nome = self.ui.lineEdit_add_name_produto_2.text()
         codigo = self.ui.lineEdit_add_codigo_produto_2.text()
@@ -1348,27 +1168,26 @@ class MainWindow(QMainWindow):
             self.ui.error_cadastrar_produto_2.setText("Verifique os valores inseridos!")
             return
         
-        # Atualiza o estoque do produto
-        self.sales_processor.update_product(product_id=produto,name=nome, description=descricao, code=codigo, purchase_price=valor_compra, sale_price=valor_venda, stock=estoque)
-        # Mensagem de sucesso
+        # Atualiza o estoque do produto e exibe a mensagem de sucesso
+        self.tasks.submit(self.sales_processor.update_product, product_id=produto,name=nome, description=descricao, code=codigo, purchase_price=valor_compra, sale_price=valor_venda, stock=estoque, write=True,
+                          on_result=self.produto_atualizado)
+
+    def produto_atualizado(self, _):
+        # Produto gravado: a busca enquanto digita volta a consultar o banco
+        self.busca_produto_ao_vivo.invalidate()
         self.ui.error_cadastrar_produto_2.setText("Produto atualizado com sucesso!")
         
     def limpar_carrinhos(self):
         # Limpa os carrinhos
-        self.carrinho = pd.DataFrame(columns=["id","name", "code", "sale_price", "stock", "quantity", "purchase_price"])
+        self.carrinho.clear()
         self.clientes = pd.DataFrame(columns=["id", "name", "cpf"])
         self.cliente = None
         self.value_total = 0
         self.payment_method = 0
         self.installment = 1
         self.taxa = 0
-        # Atualiza a visualização do carrinho na QTableView
-        tmp_carrinho = self.carrinho.copy()
-        tmp_carrinho.columns = ["ID", "Nome", "Código", "Preço de Venda", "Estoque", "Quantidade", "Preço de Compra"]
-        model = PandasModel(tmp_carrinho)
-        self.ui.carrinho_table.setModel(model)
-        self.ui.table_search_client_carrinho.setModel(model)
-        self.ui.table_finalizar_venda.setModel(model)
+        # As tabelas do carrinho já exibem o carrinho vazio; a lista de clientes volta a ficar vazia
+        self.ui.table_search_client_carrinho.setModel(self.clientes_model(self.clientes))
         # Atualizando os valores na interface
         self.ui.label_qtd_itens_carrinho.setText("0")
         self.ui.label_valor_total_carrinho.setText("R$0.00")
@@ -1381,11 +1200,11 @@ class MainWindow(QMainWindow):
         '''
         Método para preencher a tabela de clientes
         '''
-        todos_clientes = self.buscar_cliente(name="")
-        # Preenchendo na tabela table_clientes
-        self.ui.table_clientes.setModel(todos_clientes)
         # Mudando para página de clientes page_7_clientes
         self.ui.stackedWidget.setCurrentWidget(self.ui.page_7_clientes)
+        # Preenchendo na tabela table_clientes quando a busca terminar
+        self.tasks.submit(self.sales_processor.search_customers, "",
+                          on_result=lambda clientes: self.ui.table_clientes.setModel(self.clientes_model(clientes)))
         
     def edit_client(self):
         '''
@@ -1393,22 +1212,30 @@ class MainWindow(QMainWindow):
         '''
         # Implementar a edição de um cliente
         id = self.ui.lineEdit_buscar_cliente_id.text()
-        # Buscar cliente por ID
-        cliente = self.sales_processor.search_client_id(id)
-        if cliente is None or cliente.empty:
+        # Buscar cliente por ID fora da thread da interface
+        self.tasks.submit(self.sales_processor.get_client, id, on_result=self.mostrar_editar_cliente)
+
+    def mostrar_editar_cliente(self, cliente):
+        # Resultado da busca do cliente a ser editado
+        if cliente is None:
             self.ui.error_buscar_cliente.setText("Cliente não encontrado")
             return
         # Preencher formulário e trocar de página
-        self.ui.lineEdit_add_nome_cliente_2.setText(cliente["name"].iloc[0])
-        self.ui.lineEdit_add_email_2.setText(cliente["email"].iloc[0])
-        self.ui.lineEdit_add_cpf_2.setText(cliente["cpf"].iloc[0])
-        self.ui.lineEdit_add_fone_2.setText(cliente["phone"].iloc[0])
+        self.ui.lineEdit_add_nome_cliente_2.setText(cliente.name)
+        self.ui.lineEdit_add_email_2.setText(cliente.email)
+        self.ui.lineEdit_add_cpf_2.setText(cliente.cpf)
+        self.ui.lineEdit_add_fone_2.setText(cliente.phone)
         self.ui.stackedWidget.setCurrentWidget(self.ui.page_10_editar_cliente)
         
     def delete_client(self):
         id = self.ui.lineEdit_buscar_cliente_id.text()
-        self.sales_processor.delete_client(client_id=id)
-        # Retorna para a página de clientes
+        # Retorna para a página de clientes depois de excluir
+        self.tasks.submit(self.sales_processor.delete_client, client_id=id, write=True,
+                          on_result=self.cliente_excluido)
+
+    def cliente_excluido(self, _):
+        # Cliente removido: a busca enquanto digita volta a consultar o banco
+        self.busca_cliente_ao_vivo.invalidate()
         self.clientes_table()
     
     def save_cliente_edit(self):
@@ -1425,9 +1252,13 @@ class MainWindow(QMainWindow):
         if nome == "":
             self.ui.error_cadastrar_client_2.setText("Campo obrigatório: Nome do Cliente não preenchido")
             return
-        # Atualizar o cliente
-        self.sales_processor.update_client(client_id=id, name=nome, email=email, cpf=cpf, phone=fone)
-        # Mensagem de sucesso
+        # Atualizar o cliente e exibir a mensagem de sucesso
+        self.tasks.submit(self.sales_processor.update_client, client_id=id, name=nome, email=email, cpf=cpf, phone=fone, write=True,
+                          on_result=self.cliente_atualizado)
+
+    def cliente_atualizado(self, _):
+        # Cliente gravado: a busca enquanto digita volta a consultar o banco
+        self.busca_cliente_ao_vivo.invalidate()
         self.ui.error_cadastrar_client_2.setText("Cliente atualizado com sucesso!")
     
     def buscar_compra(self):
@@ -1437,26 +1268,37 @@ class MainWindow(QMainWindow):
         dateEdit = self.ui.dateEdit.text()
         dateEdit_2 = self.ui.dateEdit_2.text()
         
-        # Iniciando o DataFrame de resultados como a tabela completa
-        df_result = self.buscar_ultimas_compras
+        # Filtros vazios não entram na consulta
+        filtros = {}
         
         # Aplicando o filtro de compra_id se não estiver vazio
         if compra_id != "":
-            df_result = df_result[df_result["ID da Venda"] == int(compra_id)]
+            filtros["sale_id"] = int(compra_id)
         
         # Aplicando o filtro de cliente_id se não estiver vazio
         if cliente_id != "":
-            df_result = df_result[df_result["ID Cliente"] == int(cliente_id)]
+            filtros["customer_id"] = int(cliente_id)
         
         # Aplicando o filtro de dateEdit se não estiver vazio
         if dateEdit != "" and dateEdit_2 != "":
             # Datas no formato DD-MM-YYYY converter para YYYY-MM-DD
-            dateEdit = datetime.strptime(dateEdit, "%d/%m/%Y").strftime("%Y-%m-%d")
-            dateEdit_2 = datetime.strptime(dateEdit_2, "%d/%m/%Y").strftime("%Y-%m-%d")
-            df_result = df_result[(df_result["Data da Venda"] >= dateEdit) & (df_result["Data da Venda"] <= dateEdit_2)]
+            filtros["date_from"] = datetime.strptime(dateEdit, "%d/%m/%Y").strftime("%Y-%m-%d")
+            filtros["date_to"] = datetime.strptime(dateEdit_2, "%d/%m/%Y").strftime("%Y-%m-%d")
         
-        # Preenchendo a tabela table_compras com os resultados filtrados
-        self.ui.table_ultimas_compras.setModel(PandasModel(df_result))
+        # Preenchendo a tabela table_compras com os resultados filtrados no banco de dados
+        fetch_page = partial(self.sales_processor.sale_page, **filtros)
+        self.show_paged(self.ui.table_ultimas_compras, fetch_page, self.prepare_sales)
+    
+    def prepare_sales(self, vendas):
+        '''
+        Método para preparar as vendas para exibição (nome do método de pagamento e das colunas)
+        '''
+        vendas = vendas.copy()
+        # Convertendo valores para payment_names no método de pagamento
+        vendas["payment"] = vendas["payment"].map(self.payment_names)
+        # Renomeando as colunas
+        vendas.columns = ["ID da Venda", "ID Cliente", "Valor Total ( R$ )", "Lucro", "Parcelas", "Método de Pagamento", "Taxa de Juros (%)", "Desconto (%)","Data da Venda"]
+        return vendas
     
     def mostrar_compra(self):
         pass
@@ -1703,6 +1545,11 @@ class MainWindow(QMainWindow):
 
 if __name__ == "__main__":
     app = QApplication([])
-    window = MainWindow()
+    # python main.py --register -> modo caixa (abre direto na página de venda)
+    # python main.py --pixmap-charts -> gráficos desenhados em segundo plano e guardados em cache
+    # python main.py --strict-audit -> log de operações gravado na mesma transação de cada operação
+    window = MainWindow(register_mode="--register" in sys.argv,
+                        chart_mode="pixmap" if "--pixmap-charts" in sys.argv else "canvas",
+                        audit="strict" if "--strict-audit" in sys.argv else "async")
     window.show()
     app.exec()
\ No newline at end of file
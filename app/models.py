@@ -0,0 +1,68 @@
+'''
+
+Objetos leves que representam uma linha de cada tabela do banco de dados.
+São usados nas consultas de um único registro (ex.: leitura do código de barras),
+onde montar um DataFrame custaria mais do que a própria consulta.
+A ordem dos campos segue a ordem das colunas de cada tabela.
+
+'''
+
+from dataclasses import dataclass, fields
+
+
+@dataclass(slots=True)
+class Customer:
+    id: int
+    name: str
+    cpf: str
+    email: str
+    phone: str
+
+
+@dataclass(slots=True)
+class Product:
+    id: int
+    name: str
+    code: str
+    description: str
+    purchase_price: float
+    sale_price: float
+    stock: int
+
+
+@dataclass(slots=True)
+class Sale:
+    id: int
+    customer_id: int
+    total_value: float
+    profit: float
+    installment: int
+    payment: int
+    tax: float
+    discount: float
+    sale_date: str
+
+
+@dataclass(slots=True)
+class SaleLine:
+    id: int
+    sale_id: int
+    product_id: int
+    quantity: int
+    unit_price: float
+    unit_cost: float
+
+
+# Tabela do banco de dados -> classe que representa uma linha dela
+ROW_TYPES = {
+    "Customer": Customer,
+    "Product": Product,
+    "Sales": Sale,
+    "SalesProduct": SaleLine,
+}
+
+# Lista de colunas usada no SELECT de cada tabela, na ordem dos campos da classe
+ROW_COLUMNS = {
+    table_name: ", ".join(field.name for field in fields(row_type))
+    for table_name, row_type in ROW_TYPES.items()
+}
@@ -0,0 +1,193 @@
+'''
+
+Cache em memória do cadastro de produtos.
+Guarda os produtos (objetos Product) por código e por id, para que a leitura
+do código de barras e a finalização da venda não precisem consultar o banco a cada item.
+As buscas devolvem cópias, então quem recebe um produto não altera o que está em memória.
+Alterações feitas por outro caixa são percebidas pela versão "Catalog" da tabela DataVersion,
+consultada no máximo uma vez a cada `check_interval` segundos: se ela mudou, o cache é esvaziado.
+Essa versão só muda com o cadastro (nome, código, descrição e preços); vendas não a alteram,
+o estoque em memória é relido após cada venda por `refresh_stock`.
+
+'''
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import replace
+
+
+class ProductCatalog:
+    def __init__(self, db, max_size=None, check_interval=1.0):
+        """
+        Args:
+            db (DatabaseManager): Instância do gerenciador do banco de dados.
+            max_size (int, opcional): Número máximo de produtos em memória. Quando atingido,
+                o produto usado há mais tempo é descartado (LRU). None = sem limite.
+            check_interval (float): Intervalo mínimo (s) entre as consultas à versão do cadastro.
+                0 = consulta a versão a cada busca.
+        """
+        self.db = db
+        self.max_size = max_size
+        self.check_interval = check_interval
+        # Versão do cadastro dos produtos em memória e momento (time.monotonic) da última consulta
+        self._version = None
+        self._checked = None
+        # Código -> Product, na ordem de uso (o mais recente no final)
+        self._by_code = OrderedDict()
+        # Id -> código, para buscas pelo id
+        self._code_by_id = {}
+        # Contadores para acompanhar a eficiência do cache
+        self.hits = 0
+        self.misses = 0
+        # O catálogo é lido pela interface e atualizado pela thread de escrita
+        self._lock = threading.RLock()
+
+    def warm(self):
+        """
+        Carrega o cadastro de produtos para a memória (até max_size produtos).
+
+        Returns:
+            int: Quantidade de produtos carregados.
+        """
+        # A versão é lida antes dos produtos: uma alteração entre as duas leituras esvazia o cache na próxima consulta
+        version = self.db.fetch_data_version("Catalog")
+        products = self.db.fetch_all_rows("Product", limit=self.max_size)
+        with self._lock:
+            self.clear()
+            for product in products:
+                self._store(product)
+            self._version = version
+            self._checked = time.monotonic()
+            return len(self._by_code)
+
+    def get(self, code):
+        """
+        Busca um produto pelo código, consultando o banco apenas se ele não estiver em memória.
+
+        Args:
+            code (str): Código do produto.
+
+        Returns:
+            Product | None: Cópia do produto encontrado ou None.
+        """
+        self._check_version()
+        with self._lock:
+            product = self._by_code.get(code)
+            if product is not None:
+                self.hits += 1
+                self._by_code.move_to_end(code)
+                return replace(product)
+            self.misses += 1
+
+        product = self.db.fetch_row("Product", code, "code")
+        if product is not None:
+            with self._lock:
+                self._store(replace(product))
+        return product
+
+    def get_by_id(self, product_id):
+        """
+        Busca um produto pelo id, consultando o banco apenas se ele não estiver em memória.
+
+        Args:
+            product_id (int): Id do produto.
+
+        Returns:
+            Product | None: Cópia do produto encontrado ou None.
+        """
+        self._check_version()
+        with self._lock:
+            code = self._code_by_id.get(int(product_id))
+            if code is not None:
+                self.hits += 1
+                self._by_code.move_to_end(code)
+                return replace(self._by_code[code])
+            self.misses += 1
+
+        product = self.db.fetch_row("Product", product_id)
+        if product is not None:
+            with self._lock:
+                self._store(replace(product))
+        return product
+
+    def invalidate(self, code=None, product_id=None):
+        """
+        Remove um produto do cache, pelo código e/ou pelo id. A próxima busca lê o banco novamente.
+        """
+        with self._lock:
+            if product_id is not None:
+                old_code = self._code_by_id.pop(int(product_id), None)
+                if old_code is not None:
+                    self._by_code.pop(old_code, None)
+            if code is not None:
+                product = self._by_code.pop(code, None)
+                if product is not None:
+                    self._code_by_id.pop(product.id, None)
+
+    def refresh_stock(self, codes):
+        """
+        Relê do banco, em uma única consulta, o estoque dos produtos em memória (ex.: os vendidos em uma venda).
+        Produtos que não existem mais saem do cache.
+
+        Args:
+            codes (iterable): Códigos dos produtos.
+        """
+        with self._lock:
+            codes = [code for code in set(codes) if code in self._by_code]
+        if not codes:
+            return
+        stock = self.db.fetch_stock(codes)
+        with self._lock:
+            for code in codes:
+                product = self._by_code.get(code)
+                if product is None:
+                    continue
+                if code in stock:
+                    product.stock = stock[code][1]
+                else:
+                    self.invalidate(code=code)
+
+    def clear(self):
+        """
+        Esvazia o cache (os contadores são mantidos).
+        """
+        with self._lock:
+            self._by_code.clear()
+            self._code_by_id.clear()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Tamanho do cache, acertos, falhas e taxa de acerto.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._by_code),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def _check_version(self):
+        # Esvazia o cache se o cadastro mudou no banco desde a última consulta (ex.: em outro caixa)
+        now = time.monotonic()
+        if self._checked is not None and now - self._checked < self.check_interval:
+            return
+        version = self.db.fetch_data_version("Catalog")
+        with self._lock:
+            if self._version is not None and version != self._version:
+                self.clear()
+            self._version = version
+            self._checked = now
+
+    def _store(self, product):
+        # Chamado com self._lock adquirido. Guarda o produto e descarta o usado há mais tempo se passar do limite
+        self._by_code[product.code] = product
+        self._by_code.move_to_end(product.code)
+        self._code_by_id[product.id] = product.code
+        if self.max_size is not None:
+            while len(self._by_code) > self.max_size:
+                _, evicted = self._by_code.popitem(last=False)
+                self._code_by_id.pop(evicted.id, None)
@@ -5,12 +5,38 @@ ou seja, a interação com o banco de dados e a manipulação de dados.
 
 '''
 
-from database_manager import DatabaseManager
-from datetime import datetime
+from database_manager import DatabaseManager, InsufficientStockError, group_quantities, stock_shortfalls, is_busy
+from product_catalog import ProductCatalog
+from datetime import datetime, timedelta
 
 class SalesProcessor:
-    def __init__(self):
-        self.db = DatabaseManager()
+    def __init__(self, db_name="sales_system.db", durability="full", profile="register", catalog_size=None, warm_catalog=True, audit="async"):
+        """
+        Args:
+            db_name (str): Caminho do arquivo do banco de dados.
+            durability (str): Nível de durabilidade dos commits ("full", "grouped" ou "relaxed").
+            profile (str): Perfil de PRAGMA do banco ("register", "back-office" ou "bulk-load").
+            catalog_size (int, opcional): Limite de produtos no cache do catálogo (None = todos).
+            warm_catalog (bool): Se False, o catálogo começa vazio e pode ser carregado depois com `catalog.warm()`.
+            audit (str): Gravação do log de operações: "async" (em lotes, em segundo plano) ou "strict" (na mesma transação).
+        """
+        self.db = DatabaseManager(db_name=db_name, durability=durability, profile=profile, audit=audit)
+        # Cache do cadastro de produtos, carregado já na inicialização
+        self.catalog = ProductCatalog(self.db, max_size=catalog_size)
+        if warm_catalog:
+            self.catalog.warm()
+        
+    def close(self):
+        """
+        Efetiva as escritas pendentes e fecha a conexão com o banco de dados.
+        """
+        stats = self.catalog.stats()
+        print(f"Catalog cache.....size={stats['size']} hits={stats['hits']} misses={stats['misses']} hit_rate={stats['hit_rate']:.1%}")
+        if self.db.audit_log is not None:
+            self.db.audit_log.flush()
+            stats = self.db.audit_log.stats()
+            print(f"Audit log.....written={stats['written']} batches={stats['batches']} unwritten={stats['unwritten']}")
+        self.db.close_connection()
         
         
     def create_client(self, name, email, cpf, phone):
@@ -51,9 +77,9 @@ class SalesProcessor:
         """
         
         # Verificando se o código do produto já existe
-        product = self.search_product(code)
-        if product is not None or not product.empty:
+        if self.get_product(code) is None:
             self.db.insert_product(name=name, description=description, code=code, purchase_price=purchase_price, sale_price=sale_price, stock=stock)
+            self.catalog.invalidate(code=code)
             return True
         return False
 
@@ -72,6 +98,8 @@ class SalesProcessor:
             stock (int): Estoque do produto.
         """
         self.db.update_product(product_id=product_id, name=name, description=description, code=code, purchase_price=purchase_price, sale_price=sale_price, stock=stock)
+        # O código pode ter mudado, então o produto sai do cache pelo id e pelo novo código
+        self.catalog.invalidate(code=code, product_id=product_id)
 
     def check_stock(self, product_code, quantity):
         """
@@ -84,11 +112,25 @@ class SalesProcessor:
         Returns:
             bool: True se o estoque for suficiente, False caso contrário.
         """
-        product = self.db.fetch_by_id("Product", product_code, "code")
-        
-        if product.empty:
-            return False
-        return int(product["stock"].values[0]) >= int(quantity)
+        # Estoque lido do banco (e não do catálogo em memória), que pode ter sido alterado por outro caixa
+        return not self.check_stock_batch({product_code: quantity})
+
+    def check_stock_batch(self, cart):
+        """
+        Verifica o estoque de todo o carrinho com uma única consulta ao banco de dados.
+
+        Args:
+            cart (dict): Código do produto -> quantidade. Também aceita uma lista de tuplas
+                (código, quantidade); códigos repetidos têm as quantidades somadas.
+
+        Returns:
+            dict: Código -> (quantidade pedida, estoque disponível) de todos os produtos sem
+                estoque suficiente (estoque None se o produto não existir). Vazio se o carrinho puder ser vendido.
+        """
+        requested = group_quantities(cart)
+        if not requested:
+            return {}
+        return stock_shortfalls(requested, self.db.fetch_stock(requested))
 
     def create_sale(self, client_id, total_price, profit,payment, installment, tax, discount):
         """
@@ -109,6 +151,36 @@ class SalesProcessor:
         
         return sale_id
 
+    def checkout(self, cart, client_id, total_price, profit, payment, installment, tax, discount):
+        """
+        Finaliza uma venda completa em uma única transação: valida o estoque,
+        registra a venda e os produtos vendidos, baixa o estoque e gera o log.
+        Se qualquer etapa falhar nada é gravado.
+
+        Args:
+            cart (list): Lista de tuplas (código do produto, quantidade), uma por item do carrinho.
+            client_id (int): ID do cliente que realizou a compra.
+            total_price (float): Preço total da compra.
+            profit (float): Lucro da compra.
+            payment (int): Forma de pagamento da compra.
+            installment (int): Número de parcelas da compra.
+            tax (float): Taxa de juros da compra.
+            discount (float): Desconto da compra.
+
+        Returns:
+            int: ID da venda registrada.
+
+        Raises:
+            InsufficientStockError: Se algum produto não tiver estoque suficiente.
+        """
+        sale_date = datetime.now().strftime("%Y-%m-%d")
+        cart = list(cart)
+        sale_id = self.db.insert_full_sale(customer_id=client_id, total_value=total_price, profit=profit, sale_date=sale_date, items=cart, payment=payment, installment=installment, tax=tax, discount=discount)
+        # Venda gravada: relendo do banco o estoque dos produtos vendidos que estão em memória
+        self.catalog.refresh_stock(code for code, _ in cart)
+
+        return sale_id
+
     def process_sale(self, sale_id, product_code, quantity):
         """
         Processa a venda de um produto, atualizando o estoque e registrando a venda.
@@ -119,23 +191,24 @@ class SalesProcessor:
             product_id (int): ID do produto a ser vendido.
             quantity (int): Quantidade do produto a ser vendida.
         """
-        # 1. Obtendo as informações do produto
-        product = self.db.fetch_by_id("Product", record_id=product_code, column_name="code")
-        product_id = product["id"].values[0]
-        product_qtd = int(product["stock"].values[0])
+        # 1. Obtendo o id e os preços do produto direto do banco
+        product = self.db.fetch_stock([product_code]).get(product_code)
+        if product is None:
+            return False
+        product_id, _, sale_price, purchase_price = product
         quantity = int(quantity)
-        # 2. Verificando se a quantidade de produtos vendidos é menor ou igual ao estoque
-        if quantity <= product_qtd:
-            # 3. Atualizando o estoque do produto
-            new_stock = product_qtd - quantity
-            self.db.update_product(product_id=product_id, stock=new_stock)
-            # Exibindo dados do produto
-            new_product = self.db.fetch_by_id("Product", record_id=product_id)
-            # 4. Inserindo o produto vendido na tabela SalesProduct
-            self.db.insert_sales_product(sale_id=sale_id, product_id=product_id, quantity=quantity)
-            return True
-        else:
+        def write():
+            self.db.decrement_stock_bulk({product_id: quantity})
+            self.db.insert_sales_products_bulk(sale_id, [(product_id, quantity, sale_price, purchase_price)])
+
+        try:
+            # 2. Baixando o estoque (só se houver estoque suficiente) e inserindo o produto vendido,
+            # em uma transação BEGIN IMMEDIATE com um único commit
+            self.db.write_transaction(write)
+        except InsufficientStockError:
             return False
+        self.catalog.refresh_stock([product_code])
+        return True
      
     def search_sales_product(self, sale_id=None):
         """
@@ -162,6 +235,52 @@ class SalesProcessor:
         product = self.db.fetch_by_id(table_name = "Product", record_id = code, column_name = "code")
         return product
     
+    def get_product(self, code):
+        """
+        Busca um produto pelo código e retorna um objeto Product (ou None), sem montar DataFrame.
+        Usado no caminho rápido da leitura do código de barras, atendido pelo cache do catálogo.
+
+        Args:
+            code (str): Código do produto a ser buscado.
+        """
+        return self.catalog.get(code)
+    
+    def get_product_by_id(self, id):
+        """
+        Busca um produto pelo id e retorna um objeto Product (ou None).
+
+        Args:
+            id (int): Id do produto a ser buscado.
+        """
+        return self.catalog.get_by_id(id)
+    
+    def get_client(self, id):
+        """
+        Busca um cliente pelo id e retorna um objeto Customer (ou None).
+
+        Args:
+            id (int): Id do cliente a ser buscado.
+        """
+        return self.db.fetch_row(table_name = "Customer", record_id = id)
+    
+    def get_sale(self, sale_id):
+        """
+        Busca uma venda pelo id e retorna um objeto Sale (ou None).
+
+        Args:
+            sale_id (int): ID da venda a ser buscada.
+        """
+        return self.db.fetch_row(table_name = "Sales", record_id = sale_id)
+    
+    def get_sale_lines(self, sale_id):
+        """
+        Busca os itens de uma venda e retorna uma lista de objetos SaleLine.
+
+        Args:
+            sale_id (int): ID da venda.
+        """
+        return self.db.fetch_rows(table_name = "SalesProduct", record_id = sale_id, column_name = "sale_id")
+    
     def search_product_id(self, id):
         """
         Busca um produto no banco de dados pelo id.
@@ -185,6 +304,38 @@ class SalesProcessor:
         
         return product
     
+    def search_products(self, text, limit=None):
+        """
+        Busca produtos pelo nome, descrição ou código (busca textual por prefixo, ordenada por relevância).
+
+        Args:
+            self.db (DatabaseManager): Instância do gerenciador do banco de dados.
+            text (str): Texto digitado (vazio = todos os produtos).
+            limit (int, opcional): Quantidade máxima de produtos retornados.
+        """
+        return self.db.search_text(table_name = "Product", text = text, limit = limit)
+    
+    def search_customers(self, text, limit=None):
+        """
+        Busca clientes pelo nome, CPF ou e-mail (busca textual por prefixo, ordenada por relevância).
+
+        Args:
+            self.db (DatabaseManager): Instância do gerenciador do banco de dados.
+            text (str): Texto digitado (vazio = todos os clientes).
+            limit (int, opcional): Quantidade máxima de clientes retornados.
+        """
+        return self.db.search_text(table_name = "Customer", text = text, limit = limit)
+    
+    def top_stock(self, n=10):
+        """
+        Busca os produtos com mais unidades em estoque.
+
+        Args:
+            self.db (DatabaseManager): Instância do gerenciador do banco de dados.
+            n (int): Quantidade de produtos retornados.
+        """
+        return self.db.fetch_top_stock(limit = n)
+    
     def search_client_id(self, id):
         """
         Busca um cliente no banco de dados pelo id.
@@ -240,6 +391,41 @@ class SalesProcessor:
         sale = self.db.fetch_by_id(table_name = "Sales", record_id = sale_id)
         return sale
     
+    def daily_sales(self, date_from=None, date_to=None, by_payment=False):
+        """
+        Busca o resumo diário das vendas (faturamento, lucro e quantidade de vendas por dia).
+
+        Args:
+            self.db (DatabaseManager): Instância do gerenciador do banco de dados.
+            date_from (str, opcional): Data inicial, inclusive (formato: 'YYYY-MM-DD').
+            date_to (str, opcional): Data final, inclusive (formato: 'YYYY-MM-DD').
+            by_payment (bool): Se True, separa o resumo por forma de pagamento.
+        """
+        return self.db.fetch_daily_sales(date_from=date_from, date_to=date_to, by_payment=by_payment)
+    
+    def sales_since(self, after_id=None):
+        """
+        Busca o resumo diário das vendas novas (id maior que after_id), o maior id de venda
+        e a versão dos dados do painel (ver DatabaseManager.fetch_sales_since).
+
+        Args:
+            self.db (DatabaseManager): Instância do gerenciador do banco de dados.
+            after_id (int, opcional): Último id de venda já conhecido. None = todas as vendas.
+        """
+        return self.db.fetch_sales_since(after_id=after_id)
+
+    def top_products(self, date_from=None, date_to=None, n=20):
+        """
+        Busca os produtos mais vendidos no período, já com o nome de cada produto.
+
+        Args:
+            self.db (DatabaseManager): Instância do gerenciador do banco de dados.
+            date_from (str, opcional): Data inicial, inclusive (formato: 'YYYY-MM-DD').
+            date_to (str, opcional): Data final, inclusive (formato: 'YYYY-MM-DD').
+            n (int): Quantidade de produtos retornados.
+        """
+        return self.db.fetch_top_products(date_from=date_from, date_to=date_to, limit=n)
+    
     def search_log(self, log_id=None):
         """
         Busca um log no banco de dados pelo ID.
@@ -248,8 +434,63 @@ class SalesProcessor:
             self.db (DatabaseManager): Instância do gerenciador do banco de dados.
             log_id (int): ID do log a ser buscado.
         """
+        # Logs ainda na fila entram na consulta
+        self.db.flush_logs()
         if log_id is None:
             log = self.db.fetch_all(table_name = "Logs")
             return log
         log = self.db.fetch_by_id(table_name = "Logs", record_id = log_id)
-        return log
\ No newline at end of file
+        return log
+    
+    def log_page(self, after_id=None, limit=200, date_from=None, date_to=None, order_by="id", order="desc", after_value=None):
+        """
+        Busca uma página do log, do registro mais recente para o mais antigo.
+        O filtro de datas é feito no banco (índice idx_logs_datetime).
+
+        Args:
+            self.db (DatabaseManager): Instância do gerenciador do banco de dados.
+            after_id (int, opcional): Último ID da página anterior (None = primeira página).
+            limit (int): Quantidade de registros da página.
+            date_from (str, opcional): Data inicial, inclusive (formato: 'YYYY-MM-DD').
+            date_to (str, opcional): Data final, inclusive (formato: 'YYYY-MM-DD').
+            order_by, order, after_value: Ordenação da tabela (ver DatabaseManager.fetch_page).
+        """
+        filters = []
+        if date_from:
+            filters.append(("datetime", ">=", date_from))
+        if date_to:
+            # datetime tem hora, então a data final vai até o início do dia seguinte
+            next_day = datetime.strptime(date_to, "%Y-%m-%d") + timedelta(days=1)
+            filters.append(("datetime", "<", next_day.strftime("%Y-%m-%d")))
+        # Logs ainda na fila entram na primeira página
+        if after_id is None:
+            self.db.flush_logs()
+        return self.db.fetch_page(table_name = "Logs", after_id = after_id, limit = limit, filters = filters,
+                                  order_by = order_by, order = order, after_value = after_value)
+    
+    def sale_page(self, after_id=None, limit=200, date_from=None, date_to=None, customer_id=None, sale_id=None, order_by="id", order="desc", after_value=None):
+        """
+        Busca uma página de vendas, da venda mais recente para a mais antiga.
+        Os filtros são feitos no banco (índices idx_sales_date e idx_sales_customer).
+
+        Args:
+            self.db (DatabaseManager): Instância do gerenciador do banco de dados.
+            after_id (int, opcional): Último ID da página anterior (None = primeira página).
+            limit (int): Quantidade de registros da página.
+            date_from (str, opcional): Data inicial, inclusive (formato: 'YYYY-MM-DD').
+            date_to (str, opcional): Data final, inclusive (formato: 'YYYY-MM-DD').
+            customer_id (int, opcional): ID do cliente.
+            sale_id (int, opcional): ID da venda.
+            order_by, order, after_value: Ordenação da tabela (ver DatabaseManager.fetch_page).
+        """
+        filters = []
+        if sale_id is not None:
+            filters.append(("id", "=", int(sale_id)))
+        if customer_id is not None:
+            filters.append(("customer_id", "=", int(customer_id)))
+        if date_from:
+            filters.append(("sale_date", ">=", date_from))
+        if date_to:
+            filters.append(("sale_date", "<=", date_to))
+        return self.db.fetch_page(table_name = "Sales", after_id = after_id, limit = limit, filters = filters,
+                                  order_by = order_by, order = order, after_value = after_value)
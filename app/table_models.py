@@ -0,0 +1,299 @@
+'''
+
+Modelos de tabela usados pelas QTableView da interface.
+O PandasModel copia as colunas do DataFrame para arrays NumPy na criação e formata
+o texto de cada célula só quando ela é desenhada pela primeira vez, guardando o resultado.
+Assim a rolagem de tabelas grandes (log, relatórios) não depende do acesso via iloc.
+
+'''
+
+from functools import lru_cache
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
+
+from lazy import LazyModule
+
+# Carregados no primeiro uso (ver lazy.py)
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+
+# Trechos do cabeçalho que indicam uma coluna de valores em reais
+CURRENCY_HEADERS = ("R$", "Preço", "Valor", "Lucro")
+# Trechos do cabeçalho que indicam uma coluna de datas
+DATE_HEADERS = ("Data",)
+
+
+def format_money(value):
+    """
+    Formata um valor em reais no padrão brasileiro (ex.: 1.234,56).
+    """
+    return f"{value:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+@lru_cache(maxsize=4096)
+def format_date(value):
+    """
+    Converte uma data do banco (YYYY-MM-DD ou YYYY-MM-DD HH:MM:SS) para DD/MM/YYYY [HH:MM:SS].
+    Como as mesmas datas se repetem em muitas linhas, o resultado fica em cache.
+    """
+    value = str(value)
+    date, _, time = value.partition(" ")
+    parts = date.split("-")
+    if len(parts) != 3:
+        return value
+    formatted = f"{parts[2]}/{parts[1]}/{parts[0]}"
+    return f"{formatted} {time}" if time else formatted
+
+
+def format_number(value):
+    """
+    Formata números reais sem casas decimais desnecessárias (ex.: 3.0 -> 3, 2.5 -> 2.5).
+    """
+    return f"{value:g}" if float(value).is_integer() else f"{value:.2f}"
+
+
+def formatter_for(header, values):
+    """
+    Escolhe o formatador de uma coluna pelo cabeçalho e pelo tipo dos valores.
+
+    Args:
+        header (str): Nome da coluna exibido na tabela.
+        values (np.ndarray): Valores da coluna.
+
+    Returns:
+        callable: Função que recebe um valor e retorna o texto da célula.
+    """
+    header = str(header)
+    is_numeric = values.dtype.kind in "iuf"
+    if is_numeric and any(key in header for key in CURRENCY_HEADERS):
+        return format_money
+    if any(header.startswith(key) for key in DATE_HEADERS):
+        return format_date
+    if values.dtype.kind == "f":
+        return format_number
+    return str
+
+
+class PandasModel(QAbstractTableModel):
+    def __init__(self, dataframe: "pd.DataFrame" = None, formatters=None):
+        """
+        Args:
+            dataframe (pd.DataFrame): Dados exibidos na tabela. None gera uma tabela vazia.
+            formatters (dict, opcional): Cabeçalho -> função de formatação, substituindo a escolha automática.
+        """
+        super().__init__()
+        self._formatter_overrides = formatters or {}
+        self._set_frame(pd.DataFrame() if dataframe is None else dataframe)
+
+    def _set_frame(self, dataframe):
+        # Cópia das colunas em arrays NumPy (o DataFrame não é mais consultado na pintura)
+        self._headers = [str(column) for column in dataframe.columns]
+        self._columns = [dataframe.iloc[:, i].to_numpy() for i in range(dataframe.shape[1])]
+        self._index = dataframe.index.to_numpy()
+        self._row_count = dataframe.shape[0]
+        self._formatters = [
+            self._formatter_overrides.get(header) or formatter_for(header, values)
+            for header, values in zip(self._headers, self._columns)
+        ]
+        # Textos já formatados de cada coluna, criados na primeira vez que a coluna é desenhada
+        self._display = [None] * len(self._columns)
+        # Ordem das linhas exibidas (None = ordem original do DataFrame)
+        self._order = None
+
+    def rowCount(self, index=QModelIndex()):
+        return self._row_count
+
+    def columnCount(self, index=QModelIndex()):
+        return len(self._columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._text(self._source_row(index.row()), index.column())
+        elif role == Qt.ItemDataRole.TextAlignmentRole:
+            # Centraliza o conteúdo das células
+            return Qt.AlignmentFlag.AlignCenter
+        return QVariant()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            if orientation == Qt.Orientation.Horizontal:
+                return self._headers[section]
+            else:
+                return str(self._index[self._source_row(section)])
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """
+        Ordena a tabela por uma coluna. Apenas a permutação das linhas é calculada;
+        os dados e os textos já formatados não são copiados.
+        """
+        self.layoutAboutToBeChanged.emit()
+        if column < 0 or column >= len(self._columns):
+            self._order = None
+        else:
+            values = self._columns[column]
+            try:
+                permutation = np.argsort(values, kind="stable")
+            except TypeError:
+                # Colunas com tipos misturados (ex.: None entre textos) são ordenadas pelo texto
+                permutation = np.argsort(values.astype(str), kind="stable")
+            if order == Qt.SortOrder.DescendingOrder:
+                permutation = permutation[::-1]
+            self._order = permutation
+        self.layoutChanged.emit()
+
+    def _append(self, dataframe):
+        # Acrescenta linhas ao final da tabela (mesmas colunas), mantendo os textos já formatados
+        added = dataframe.shape[0]
+        if added == 0:
+            return
+        for i in range(len(self._columns)):
+            self._columns[i] = np.concatenate([self._columns[i], dataframe.iloc[:, i].to_numpy()])
+            if self._display[i] is not None:
+                self._display[i] = np.concatenate([self._display[i], np.full(added, None, dtype=object)])
+        self._index = np.concatenate([self._index, dataframe.index.to_numpy()])
+        self._row_count += added
+        if self._order is not None:
+            self._order = np.concatenate([self._order, np.arange(self._row_count - added, self._row_count)])
+
+    def _source_row(self, row):
+        # Converte a linha exibida para a linha original do DataFrame
+        return row if self._order is None else self._order[row]
+
+    def _text(self, row, column):
+        # Formata a célula na primeira vez que ela é pedida e guarda o texto
+        display = self._display[column]
+        if display is None:
+            display = self._display[column] = np.full(self._row_count, None, dtype=object)
+        text = display[row]
+        if text is None:
+            value = self._columns[column][row]
+            text = "" if value is None or (isinstance(value, float) and np.isnan(value)) else self._formatters[column](value)
+            display[row] = text
+        return text
+
+
+class PagedTableModel(PandasModel):
+    def __init__(self, fetch_page, prepare=None, page_size=200, key="id", formatters=None, first_page=None, submit=None):
+        """
+        Modelo que carrega a tabela aos poucos: a primeira página é lida na criação e as
+        seguintes quando a QTableView pede mais linhas (rolagem até o fim), via canFetchMore/fetchMore.
+        A ordenação pelo cabeçalho é feita no banco: a tabela volta para a primeira página
+        na nova ordem e a paginação continua por (coluna, id).
+
+        Args:
+            fetch_page (callable): Função (after_id, limit, **ordem) -> DataFrame com a próxima página.
+                Ao ordenar por uma coluna, recebe também order_by, order e after_value
+                (ver DatabaseManager.fetch_page).
+            prepare (callable, opcional): Função DataFrame -> DataFrame aplicada antes de exibir
+                (ex.: renomear colunas). Recebe a página como veio do banco, sem mudar a ordem das colunas.
+            page_size (int): Quantidade de registros por página.
+            key (str): Coluna usada como chave da paginação (nome original, antes do prepare).
+            formatters (dict, opcional): Cabeçalho -> função de formatação.
+            first_page (DataFrame, opcional): Primeira página já lida (ex.: fora da thread da interface),
+                como retornada por fetch_page(None, page_size).
+            submit (callable, opcional): Função no formato de TaskRunner.submit
+                (fn, *args, on_result, on_error, **kwargs) usada para ler as próximas páginas fora
+                da thread da interface. Sem submit, as páginas são lidas na hora.
+        """
+        self._fetch_page = fetch_page
+        self._prepare = prepare or (lambda dataframe: dataframe)
+        self._page_size = page_size
+        self._key = key
+        self._submit = submit
+        self._last_key = None
+        self._exhausted = False
+        # Página pedida e ainda não recebida (com submit); enquanto isso não se pede outra
+        self._loading = False
+        # Muda a cada ordenação: páginas pedidas antes dela são descartadas ao chegar
+        self._generation = 0
+        # Ordenação atual: {} = ordem padrão de fetch_page, senão order_by e order
+        self._sort = {}
+        self._last_value = None
+        # Nomes das colunas como vieram do banco (antes do prepare), para ordenar pelo índice da coluna
+        self._source_columns = []
+        if first_page is None:
+            first_page = self._fetch_page(None, page_size)
+        super().__init__(self._accept_page(first_page, 0), formatters=formatters)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return not self._exhausted and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted or self._loading:
+            return
+        self._request_page(self._insert_page)
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """
+        Ordena a tabela por uma coluna no banco de dados: as linhas carregadas são descartadas e
+        a primeira página é lida de novo na nova ordem (coluna -1 = ordem padrão).
+        """
+        if 0 <= column < len(self._source_columns):
+            self._sort = {
+                "order_by": self._source_columns[column],
+                "order": "desc" if order == Qt.SortOrder.DescendingOrder else "asc",
+            }
+        else:
+            self._sort = {}
+        self._last_key = None
+        self._last_value = None
+        self._exhausted = False
+        self._generation += 1
+        self._request_page(self._reset_page)
+
+    def _request_page(self, deliver):
+        # Pede a página seguinte à última lida; `deliver` recebe o DataFrame na thread da interface
+        sort = dict(self._sort)
+        if sort:
+            sort["after_value"] = self._last_value
+        if self._submit is None:
+            deliver(self._fetch_page(self._last_key, self._page_size, **sort))
+            return
+        generation = self._generation
+        self._loading = True
+
+        def received(page):
+            if generation == self._generation:
+                self._loading = False
+                deliver(page)
+
+        def failed(error):
+            if generation == self._generation:
+                self._loading = False
+            print(getattr(error, "traceback", repr(error)))
+
+        self._submit(self._fetch_page, self._last_key, self._page_size, on_result=received, on_error=failed, **sort)
+
+    def _insert_page(self, page):
+        # Acrescenta a página ao fim da tabela
+        page = self._accept_page(page, self._row_count)
+        if page.shape[0] == 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._row_count, self._row_count + page.shape[0] - 1)
+        self._append(page)
+        self.endInsertRows()
+
+    def _reset_page(self, page):
+        # Troca as linhas da tabela pela primeira página de uma nova ordenação
+        self.beginResetModel()
+        self._set_frame(self._accept_page(page, 0))
+        self.endResetModel()
+
+    def _accept_page(self, page, start):
+        # Guarda a chave do último registro da página e prepara o DataFrame para exibição
+        if page.shape[0] < self._page_size:
+            self._exhausted = True
+        self._source_columns = list(page.columns)
+        if page.shape[0] > 0:
+            self._last_key = page[self._key].iloc[-1]
+            if self._sort:
+                value = page[self._sort["order_by"]].iloc[-1]
+                # Tipos do NumPy viram tipos do Python para o sqlite3; NULL (None/NaN) vira None
+                self._last_value = None if pd.isna(value) else (value.item() if hasattr(value, "item") else value)
+        page = self._prepare(page)
+        # Numeração das linhas continua de uma página para a outra
+        page.index = pd.RangeIndex(start, start + page.shape[0])
+        return page
@@ -0,0 +1,127 @@
+'''
+
+Execução das operações do banco de dados fora da thread da interface.
+A MainWindow envia cada operação ao TaskRunner e recebe o resultado por sinal, já na
+thread da interface, então uma consulta lenta não congela a janela.
+Leituras rodam em paralelo; escritas rodam uma de cada vez, na ordem em que foram enviadas,
+sempre na mesma thread (a conexão dessa thread guarda os commits agrupados pendentes).
+
+'''
+
+import traceback
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class WorkerSignals(QObject):
+    result = pyqtSignal(object)
+    error = pyqtSignal(object)
+    finished = pyqtSignal()
+    # (percentual, descrição da etapa)
+    progress = pyqtSignal(int, str)
+
+
+class Worker(QRunnable):
+    def __init__(self, fn, *args, **kwargs):
+        """
+        Args:
+            fn (callable): Função executada na thread do pool.
+            *args, **kwargs: Argumentos repassados para a função.
+        """
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as error:
+            error.traceback = traceback.format_exc()
+            self.signals.error.emit(error)
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+
+class TaskRunner(QObject):
+    # True quando há alguma operação em andamento, False quando todas terminaram
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, max_readers=4, parent=None):
+        """
+        Args:
+            max_readers (int): Número máximo de leituras simultâneas.
+            parent (QObject, opcional): Objeto pai no Qt.
+        """
+        super().__init__(parent)
+        self.readers = QThreadPool(self)
+        self.readers.setMaxThreadCount(max_readers)
+        # As threads de leitura também não expiram: cada thread nova abriria mais uma conexão, que só
+        # é fechada em DatabaseManager.close_connection (no máximo max_readers conexões de leitura)
+        self.readers.setExpiryTimeout(-1)
+        # Uma única thread de escrita: as escritas não disputam o lock do SQLite e mantêm a ordem
+        self.writer = QThreadPool(self)
+        self.writer.setMaxThreadCount(1)
+        # A thread de escrita também não é encerrada por inatividade (a conexão dela fica aberta)
+        self.writer.setExpiryTimeout(-1)
+        # Tarefas enviadas e ainda não terminadas (todas e as que acionam o indicador de ocupado)
+        self._workers = set()
+        self._busy = set()
+
+    def submit(self, fn, *args, on_result=None, on_error=None, on_progress=None, write=False, show_busy=True, **kwargs):
+        """
+        Executa fn(*args, **kwargs) fora da thread da interface.
+
+        Args:
+            fn (callable): Operação a ser executada (ex.: um método do SalesProcessor).
+            on_result (callable, opcional): Recebe o retorno de fn, na thread da interface.
+            on_error (callable, opcional): Recebe a exceção lançada por fn, na thread da interface.
+                Sem on_error, o erro é exibido no terminal.
+            on_progress (callable, opcional): Recebe (percentual, etapa), na thread da interface.
+                Quando informado, fn recebe o argumento `progress`, uma função progress(percentual, etapa).
+            write (bool): Se True, a operação entra na fila de escritas.
+            show_busy (bool): Se False, a operação não aciona o indicador de ocupado (ex.: tarefas periódicas).
+
+        Returns:
+            Worker: Tarefa enviada ao pool.
+        """
+        worker = Worker(fn, *args, **kwargs)
+        if on_progress is not None:
+            worker.kwargs["progress"] = worker.signals.progress.emit
+            worker.signals.progress.connect(on_progress)
+        if on_result is not None:
+            worker.signals.result.connect(on_result)
+        worker.signals.error.connect(on_error if on_error is not None else self._print_error)
+        worker.signals.finished.connect(lambda: self._task_finished(worker))
+        # Referência mantida até o fim para que os sinais da tarefa não sejam coletados antes da entrega
+        self._workers.add(worker)
+        if show_busy:
+            self._busy.add(worker)
+            if len(self._busy) == 1:
+                self.busy_changed.emit(True)
+        (self.writer if write else self.readers).start(worker)
+        return worker
+
+    def is_busy(self):
+        return bool(self._busy)
+
+    def wait(self):
+        """
+        Aguarda todas as operações enviadas terminarem (usado ao fechar a janela).
+        Os sinais de resultado só são entregues quando o loop de eventos voltar a rodar.
+        """
+        self.readers.waitForDone()
+        self.writer.waitForDone()
+
+    def _task_finished(self, worker):
+        self._workers.discard(worker)
+        if worker in self._busy:
+            self._busy.discard(worker)
+            if not self._busy:
+                self.busy_changed.emit(False)
+
+    def _print_error(self, error):
+        print(getattr(error, "traceback", repr(error)))
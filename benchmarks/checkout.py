@@ -0,0 +1,97 @@
+'''
+
+Benchmark da gravação dos itens de uma venda.
+
+Compara, para carrinhos de tamanhos diferentes, o caminho antigo linha a linha (para cada item:
+busca do produto, update_product com log e commit, insert_sales_product com outro commit) com o
+caminho em lote usado por insert_full_sale (uma consulta IN, executemany nos produtos vendidos e na
+baixa de estoque protegida por stock >= quantidade, um único commit).
+Roda sobre uma cópia do banco de dados; o original nunca é alterado.
+
+Uso:
+    python benchmarks/checkout.py [--lines 1 10 50 200] [--repeat 20]
+
+'''
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, os.path.abspath(APP_DIR))
+
+from database_manager import DatabaseManager  # noqa: E402
+
+BENCH_STOCK = 10 ** 9
+
+
+def per_row(db, sale_id, cart):
+    """
+    Caminho antigo: cada linha do carrinho busca o produto, atualiza o estoque e insere o item separadamente.
+    """
+    for code, quantity in cart:
+        db.cursor.execute("SELECT id, stock FROM Product WHERE code = ?", (code,))
+        product_id, stock = db.cursor.fetchone()
+        db.update_product(product_id=product_id, stock=stock - quantity)
+        db.insert_sales_product(sale_id=sale_id, product_id=product_id, quantity=quantity)
+
+
+def bulk(db, sale_id, cart):
+    """
+    Caminho em lote: os mesmos passos de insert_full_sale, em uma única transação.
+    """
+    with db.transaction():
+        products = db.fetch_stock(code for code, _ in cart)
+        db.insert_sales_products_bulk(sale_id, [
+            (products[code][0], quantity, products[code][2], products[code][3]) for code, quantity in cart
+        ])
+        requested = {}
+        for code, quantity in cart:
+            requested[products[code][0]] = requested.get(products[code][0], 0) + quantity
+        db.decrement_stock_bulk(requested)
+
+
+def measure(function, db, sale_id, cart, repeat):
+    # Melhor tempo entre as repetições, em milissegundos
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(db, sale_id, cart)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da gravação dos itens de uma venda")
+    parser.add_argument("--lines", type=int, nargs="+", default=[1, 10, 50, 200], help="Tamanhos de carrinho")
+    parser.add_argument("--repeat", type=int, default=20, help="Repetições por tamanho (vale o melhor tempo)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db_name = os.path.join(workdir, "sales_system.db")
+        shutil.copy(os.path.join(APP_DIR, "sales_system.db"), db_name)
+        db = DatabaseManager(db_name=db_name)
+        # Produtos próprios do benchmark, com estoque que não acaba durante as repetições
+        largest = max(args.lines)
+        with db.transaction():
+            for i in range(largest):
+                db.cursor.execute(
+                    "INSERT INTO Product (name, description, code, purchase_price, sale_price, stock) VALUES (?, '', ?, 1.0, 2.0, ?)",
+                    (f"Benchmark {i}", f"BENCH{i:05d}", BENCH_STOCK),
+                )
+        sale_id = db.insert_sale(customer_id=1, total_value=0, profit=0, sale_date="2000-01-01")
+
+        print(f"{'Itens':>6} {'Linha a linha':>15} {'Em lote':>10} {'Ganho':>8}")
+        for lines in args.lines:
+            cart = [(f"BENCH{i:05d}", 1) for i in range(lines)]
+            slow = measure(per_row, db, sale_id, cart, args.repeat)
+            fast = measure(bulk, db, sale_id, cart, args.repeat)
+            print(f"{lines:>6} {slow:>12.2f} ms {fast:>7.2f} ms {slow / fast:>7.1f}x")
+        db.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+'''
+
+Benchmark de inicialização.
+
+1. Importação: roda `python -X importtime -c "import main"` na pasta app/ e lista os módulos
+   mais caros. Falha se pandas, numpy ou matplotlib forem importados ao carregar main.py
+   (eles devem ser carregados só quando usados, ver app/lazy.py).
+2. Modo caixa: abre a janela com `register_mode=True` (sem tela, plataforma offscreen) sobre uma
+   cópia do banco de dados e mede o tempo até a página de venda ficar pronta para ler códigos.
+   Falha se passar do limite (padrão: 1 segundo).
+
+Uso:
+    python benchmarks/startup.py [--budget 1.0] [--top 15]
+
+'''
+
+import argparse
+import ast
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+HEAVY_MODULES = ("pandas", "numpy", "matplotlib")
+
+
+def import_times():
+    """
+    Executa o import de main.py com -X importtime em um processo novo.
+
+    Returns:
+        list: Tuplas (tempo próprio em µs, tempo acumulado em µs, módulo), na ordem do import.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=APP_DIR, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), module.rstrip()))
+    return rows
+
+
+def register_startup():
+    """
+    Abre a janela no modo caixa em um processo novo e retorna as métricas de inicialização.
+    """
+    script = (
+        "import main\n"
+        "from PyQt6.QtCore import QTimer\n"
+        "app = main.QApplication([])\n"
+        "window = main.MainWindow(register_mode=True)\n"
+        "window.show()\n"
+        "def check():\n"
+        "    if 'interactive' in window.startup_metrics:\n"
+        "        print('METRICS', window.startup_metrics)\n"
+        "        window.close()\n"
+        "        app.quit()\n"
+        "timer = QTimer()\n"
+        "timer.timeout.connect(check)\n"
+        "timer.start(5)\n"
+        "app.exec()\n"
+    )
+    # O benchmark nunca abre o banco de dados original: as migrações rodariam nele
+    with tempfile.TemporaryDirectory() as workdir:
+        shutil.copy(os.path.join(APP_DIR, "sales_system.db"), workdir)
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen", PYTHONPATH=os.path.abspath(APP_DIR))
+        process = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=workdir, env=env, capture_output=True, text=True, timeout=120,
+        )
+    for line in process.stdout.splitlines():
+        if line.startswith("METRICS"):
+            return ast.literal_eval(line[len("METRICS"):].strip())
+    raise RuntimeError(f"A janela não terminou a inicialização:\n{process.stdout}\n{process.stderr}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização do Sell Easer")
+    parser.add_argument("--budget", type=float, default=1.0, help="Tempo máximo (s) até o caixa ficar pronto")
+    parser.add_argument("--top", type=int, default=15, help="Quantidade de módulos listados")
+    args = parser.parse_args()
+    failed = False
+
+    rows = import_times()
+    total_us = sum(self_us for self_us, _, _ in rows)
+    print(f"Import de main.py.....{total_us / 1000:.1f} ms ({len(rows)} módulos)")
+    for self_us, cumulative_us, module in sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"    {cumulative_us / 1000:8.1f} ms  {module.strip()}")
+    eager = sorted({module.strip().split(".")[0] for _, _, module in rows} & set(HEAVY_MODULES))
+    if eager:
+        print(f"\033[91mBibliotecas pesadas importadas na carga de main.py: {', '.join(eager)}\033[0m")
+        failed = True
+
+    metrics = register_startup()
+    interactive = metrics["interactive"]
+    color = "\033[92m" if interactive <= args.budget else "\033[91m"
+    print(f"Modo caixa.....{color}primeiro quadro {metrics['first_frame']:.3f}s, pronto {interactive:.3f}s (limite {args.budget:.1f}s)\033[0m")
+    if interactive > args.budget:
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+'''
+
+Configuração comum dos testes.
+Os módulos da aplicação usam imports no estilo de script (ex.: `from database_manager import ...`),
+então a pasta app/ entra no sys.path. Cada teste usa uma cópia do banco de dados em uma
+pasta temporária; o banco original nunca é alterado.
+
+'''
+
+import os
+import shutil
+import sys
+
+import pytest
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app"))
+sys.path.insert(0, APP_DIR)
+
+from database_manager import DatabaseManager  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    # Cópia do banco de dados da aplicação
+    path = tmp_path / "sales_system.db"
+    shutil.copy(os.path.join(APP_DIR, "sales_system.db"), path)
+    return str(path)
+
+
+@pytest.fixture
+def db(db_path):
+    manager = DatabaseManager(db_name=db_path)
+    yield manager
+    manager.close_connection()
+
+
+@pytest.fixture
+def product(db):
+    # Produto próprio do teste, com estoque conhecido
+    def create(code, stock=10, sale_price=2.0, purchase_price=1.0):
+        db.insert_product(name=f"Produto {code}", description="", code=code,
+                          purchase_price=purchase_price, sale_price=sale_price, stock=stock)
+        return db.fetch_row("Product", code, "code")
+    return create
+
+
+@pytest.fixture
+def count(db):
+    # Quantidade de linhas de uma tabela
+    def rows(table_name):
+        db.cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+        return db.cursor.fetchone()[0]
+    return rows
@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+import audit_log
+from audit_log import AuditLogError
+from database_manager import DatabaseManager
+
+
+def logs_like(db_path, pattern):
+    # Lido por outra conexão, depois do close_connection
+    connection = sqlite3.connect(db_path)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM Logs WHERE text LIKE ?", (pattern,)).fetchone()[0]
+    finally:
+        connection.close()
+
+
+def test_close_writes_queued_logs(db_path):
+    db = DatabaseManager(db_name=db_path)
+    for i in range(120):
+        db.audit_log.put(f"Teste de log {i}", "2030-01-01 00:00:00")
+    db.close_connection()
+    assert logs_like(db_path, "Teste de log %") == 120
+
+
+def test_grouped_logs_wait_for_commit(db_path):
+    db = DatabaseManager(db_name=db_path, durability="grouped", group_size=100, group_interval_ms=60000)
+    db.insert_customer(name="Cliente agrupado", cpf="1", email="", phone="")
+    # A operação ainda não teve commit: o log também não foi para a fila
+    db.flush_logs()
+    assert logs_like(db_path, "%Cliente agrupado%") == 0
+    db.close_connection()
+    assert logs_like(db_path, "%Cliente agrupado%") == 1
+
+
+def test_failed_batches_are_retried(db_path, monkeypatch):
+    monkeypatch.setattr(audit_log, "WRITE_BACKOFF", 0)
+    db = DatabaseManager(db_name=db_path)
+    write_transaction = db.write_transaction
+    failures = []
+
+    def flaky(work, *args, **kwargs):
+        if len(failures) < 2:
+            failures.append(1)
+            raise sqlite3.OperationalError("disk I/O error")
+        return write_transaction(work, *args, **kwargs)
+
+    monkeypatch.setattr(db, "write_transaction", flaky)
+    for i in range(10):
+        db.audit_log.put(f"Teste de retry {i}", "2030-01-01 00:00:00")
+    db.flush_logs()
+    assert db.audit_log.stats()["unwritten"] == 0
+    db.close_connection()
+    assert logs_like(db_path, "Teste de retry %") == 10
+
+
+def test_close_raises_when_logs_cannot_be_written(db_path, monkeypatch):
+    monkeypatch.setattr(audit_log, "WRITE_RETRIES", 1)
+    monkeypatch.setattr(audit_log, "WRITE_BACKOFF", 0)
+    db = DatabaseManager(db_name=db_path)
+
+    def failing(work, *args, **kwargs):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(db, "write_transaction", failing)
+    db.audit_log.put("Teste sem gravação", "2030-01-01 00:00:00")
+    with pytest.raises(AuditLogError) as error:
+        db.close_connection()
+    assert [text for text, _ in error.value.rows] == ["Teste sem gravação"]
+    # As conexões foram fechadas mesmo com o erro
+    assert db._states == []
+    assert logs_like(db_path, "Teste sem gravação") == 0
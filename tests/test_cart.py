@@ -0,0 +1,57 @@
+import pytest
+
+from cart import Cart
+from models import Product
+
+
+def make_product(product_id, code, sale_price, purchase_price, stock=10):
+    return Product(product_id, f"Produto {code}", code, "", purchase_price, sale_price, stock)
+
+
+def test_add_merges_lines_by_code():
+    cart = Cart()
+    line, merged = cart.add(make_product(1, "A", 2.5, 1.0), 2)
+    assert not merged and line.id == 1
+    cart.add(make_product(2, "B", 10.0, 6.0), 1)
+    again, merged = cart.add(make_product(1, "A", 2.5, 1.0), 3)
+    assert merged and again is line
+    assert len(cart) == 2
+    assert line.quantity == 5
+    assert cart.items() == [("A", 5), ("B", 1)]
+
+
+def test_totals_follow_every_change():
+    cart = Cart()
+    cart.add(make_product(1, "A", 2.5, 1.0), 2)
+    cart.add(make_product(2, "B", 10.0, 6.0), 1)
+    cart.add(make_product(1, "A", 2.5, 1.0), 1)
+    assert cart.sale_total == pytest.approx(17.5)
+    assert cart.purchase_total == pytest.approx(9.0)
+    assert cart.quantity == 4
+
+    removed, row = cart.remove(1)
+    assert (removed.code, row) == ("A", 0)
+    assert cart.sale_total == pytest.approx(10.0)
+    assert cart.purchase_total == pytest.approx(6.0)
+    assert cart.quantity == 1
+    # A linha restante passa a ocupar a primeira posição
+    assert cart.row_of(cart.get(2)) == 0 and cart.find("A") is None
+
+
+def test_remove_last_line_resets_totals():
+    cart = Cart()
+    cart.add(make_product(1, "A", 0.1, 0.07), 3)
+    cart.remove(1)
+    assert (cart.sale_total, cart.purchase_total, cart.quantity) == (0.0, 0.0, 0)
+    assert cart.empty
+    assert cart.remove(1) is None
+
+
+def test_clear_restarts_line_ids():
+    cart = Cart()
+    cart.add(make_product(1, "A", 1.0, 0.5), 1)
+    cart.add(make_product(2, "B", 1.0, 0.5), 1)
+    cart.clear()
+    assert cart.empty and cart.items() == []
+    line, _ = cart.add(make_product(2, "B", 1.0, 0.5), 1)
+    assert line.id == 1
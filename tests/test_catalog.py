@@ -0,0 +1,84 @@
+import sqlite3
+
+from product_catalog import ProductCatalog
+from sales_processor import SalesProcessor
+
+
+def test_get_returns_copies(db, product):
+    product("CAT-A", stock=4)
+    catalog = ProductCatalog(db)
+    catalog.warm()
+    first = catalog.get("CAT-A")
+    first.stock = 0
+    assert catalog.get("CAT-A").stock == 4
+    assert catalog.get_by_id(first.id).stock == 4
+
+
+def test_changes_from_other_connection_clear_cache(db, db_path, product):
+    product("CAT-A", stock=4, sale_price=2.0)
+    catalog = ProductCatalog(db, check_interval=0)
+    catalog.warm()
+    assert catalog.get("CAT-A").sale_price == 2.0
+    # Outro caixa reajusta o preço direto no banco
+    other = sqlite3.connect(db_path)
+    with other:
+        other.execute("UPDATE Product SET sale_price = 3.0 WHERE code = 'CAT-A'")
+    other.close()
+    assert catalog.get("CAT-A").sale_price == 3.0
+
+
+def test_refresh_stock_reads_database(db, product):
+    item = product("CAT-A", stock=4)
+    catalog = ProductCatalog(db, check_interval=60)
+    catalog.warm()
+    db.decrement_stock_bulk({item.id: 3})
+    # Dentro do intervalo de verificação a versão não é consultada: o refresh relê o estoque
+    assert catalog.get("CAT-A").stock == 4
+    catalog.refresh_stock(["CAT-A"])
+    assert catalog.get("CAT-A").stock == 1
+
+
+
+def test_checkout_keeps_other_cached_products(db_path):
+    processor = SalesProcessor(db_name=db_path)
+    try:
+        processor.db.insert_product(name="Produto A", description="", code="CAT-A", purchase_price=1.0, sale_price=2.0, stock=5)
+        processor.db.insert_product(name="Produto B", description="", code="CAT-B", purchase_price=1.0, sale_price=2.0, stock=5)
+        catalog = processor.catalog
+        catalog.check_interval = 0
+        catalog.warm()
+        processor.checkout([("CAT-A", 2)], 1, 4.0, 2.0, 1, 1, 0.0, 0.0)
+        # A venda muda só o estoque: o restante do cache continua em memória
+        misses, size = catalog.misses, catalog.stats()["size"]
+        assert catalog.get("CAT-B").stock == 5
+        assert catalog.get("CAT-A").stock == 3
+        assert (catalog.misses, catalog.stats()["size"]) == (misses, size)
+    finally:
+        processor.close()
+
+def test_lru_discards_least_recently_used(db, product):
+    for code in ("CAT-A", "CAT-B", "CAT-C"):
+        product(code)
+    catalog = ProductCatalog(db, max_size=2)
+    catalog.get("CAT-A")
+    catalog.get("CAT-B")
+    catalog.get("CAT-A")
+    catalog.get("CAT-C")
+    # CAT-B foi o usado há mais tempo
+    assert catalog.stats()["size"] == 2
+    misses = catalog.misses
+    catalog.get("CAT-A")
+    assert catalog.misses == misses
+    catalog.get("CAT-B")
+    assert catalog.misses == misses + 1
+
+
+def test_invalidate_reads_database_again(db, product):
+    item = product("CAT-A", sale_price=2.0)
+    catalog = ProductCatalog(db)
+    catalog.warm()
+    db.update_product(item.id, sale_price=3.0)
+    assert catalog.get("CAT-A").sale_price == 2.0
+    catalog.invalidate(code="CAT-A")
+    assert catalog.get("CAT-A").sale_price == 3.0
+    assert catalog.get_by_id(item.id).sale_price == 3.0
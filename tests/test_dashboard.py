@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from dashboard import DashboardAggregator
+
+
+def daily(rows):
+    return pd.DataFrame(rows, columns=["sale_date", "total_value", "profit", "sale_count"])
+
+
+HISTORY = daily([
+    ("2030-01-30", 100.0, 20.0, 2),
+    ("2030-01-31", 50.0, 10.0, 1),
+    ("2030-02-01", 80.0, 30.0, 1),
+])
+VERSIONS = {"Sales": 1, "Product": 4}
+
+
+def test_fold_matches_full_aggregation():
+    new_sales = daily([
+        ("2030-02-01", 20.0, 5.0, 1),
+        ("2030-02-03", 40.0, 8.0, 1),
+    ])
+    folded = DashboardAggregator(HISTORY, 10, VERSIONS).fold(new_sales, 12, VERSIONS)
+    full = DashboardAggregator(pd.concat([HISTORY, new_sales]).groupby("sale_date", as_index=False).sum(), 12, VERSIONS)
+    pd.testing.assert_frame_equal(folded.daily, full.daily)
+    pd.testing.assert_frame_equal(folded.months(), full.months())
+    assert folded.last_sale_id == 12
+    assert list(folded.days(date_from="2030-02-01")["revenue"]) == [100.0, 40.0]
+
+
+def test_fold_does_not_change_current_aggregator():
+    aggregator = DashboardAggregator(HISTORY, 10, VERSIONS)
+    before = aggregator.months().copy()
+    aggregator.fold(daily([("2030-02-02", 5.0, 1.0, 1)]), 11, VERSIONS)
+    pd.testing.assert_frame_equal(aggregator.months(), before)
+    assert aggregator.last_sale_id == 10
+
+
+def test_fold_without_changes_returns_same_aggregator():
+    aggregator = DashboardAggregator(HISTORY, 10, VERSIONS)
+    assert aggregator.fold(daily([]), 10, VERSIONS) is aggregator
+
+
+def test_fold_with_new_version_keeps_cached_periods():
+    aggregator = DashboardAggregator(HISTORY, 10, VERSIONS)
+    months = aggregator.months()
+    folded = aggregator.fold(daily([]), 10, {"Sales": 1, "Product": 5})
+    assert folded is not aggregator
+    assert folded.months() is months
+    assert folded.version != aggregator.version
+
+
+def test_months_cumulative_revenue():
+    months = DashboardAggregator(HISTORY, 10, VERSIONS).months()
+    assert list(months["revenue"]) == [150.0, 80.0]
+    assert list(months["cumulative_revenue"]) == pytest.approx([150.0, 230.0])
+
+
+def test_period_granularity_follows_months():
+    aggregator = DashboardAggregator(HISTORY, 10, VERSIONS)
+    frame, by_month = aggregator.period("2030-01-30", "2030-01-31")
+    assert not by_month and list(frame["revenue"]) == [100.0, 50.0]
+    frame, by_month = aggregator.period("2030-01-31", "2030-02-01")
+    assert by_month and list(frame["profit"]) == [10.0, 30.0]
+    # Recortes repetidos vêm do cache
+    assert aggregator.days("2030-01-30", "2030-01-31") is aggregator.days("2030-01-30", "2030-01-31")
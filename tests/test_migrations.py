@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+
+import database_manager
+from database_manager import DatabaseManager, MIGRATIONS
+
+
+def user_version(db):
+    db.cursor.execute("PRAGMA user_version")
+    return db.cursor.fetchone()[0]
+
+
+def names(db, kind):
+    db.cursor.execute("SELECT name FROM sqlite_master WHERE type = ?", (kind,))
+    return {row[0] for row in db.cursor.fetchall()}
+
+
+def test_migrations_reach_last_version(db):
+    assert user_version(db) == MIGRATIONS[-1][0]
+    assert {"idx_salesproduct_sale", "idx_sales_date", "idx_logs_datetime"} <= names(db, "index")
+    assert {"DailySales", "ProductDailySales", "ProductSearch", "CustomerSearch", "DataVersion"} <= names(db, "table")
+    assert {"trg_product_update_version", "trg_product_update_catalog", "trg_product_insert_search"} <= names(db, "trigger")
+
+
+def test_migrate_again_is_noop(db):
+    indexes = names(db, "index")
+    assert db.migrate() == MIGRATIONS[-1][0]
+    assert names(db, "index") == indexes
+
+
+def test_new_database_is_migrated(tmp_path):
+    db = DatabaseManager(db_name=str(tmp_path / "novo.db"))
+    try:
+        assert user_version(db) == MIGRATIONS[-1][0]
+        assert "idx_customer_name" in names(db, "index")
+        db.cursor.execute("SELECT name, version FROM DataVersion ORDER BY name")
+        assert db.cursor.fetchall() == [("Catalog", 0), ("Product", 0), ("Sales", 0)]
+    finally:
+        db.close_connection()
+
+
+def test_failed_migration_is_rolled_back(db, monkeypatch):
+    version = MIGRATIONS[-1][0] + 1
+    monkeypatch.setattr(database_manager, "MIGRATIONS", MIGRATIONS + [
+        (version, "Migração com erro", [
+            "CREATE TABLE Partial (id INTEGER)",
+            "SELECT * FROM tabela_inexistente",
+        ]),
+    ])
+    with pytest.raises(sqlite3.OperationalError):
+        db.migrate()
+    assert user_version(db) == version - 1
+    assert "Partial" not in names(db, "table")
@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+
+def test_fetch_page_walks_every_row_once(db, count):
+    ids = []
+    page = db.fetch_page("Logs", limit=50)
+    while not page.empty:
+        ids.extend(page["id"])
+        page = db.fetch_page("Logs", after_id=ids[-1], limit=50)
+    assert len(ids) == count("Logs")
+    assert ids == sorted(ids, reverse=True)
+
+
+
+def test_fetch_page_applies_filters(db):
+    page = db.fetch_page("Sales", order="asc", limit=5, filters=[("customer_id", "=", 1)])
+    assert list(page["id"]) == sorted(page["id"])
+    assert set(page["customer_id"]) <= {1}
+
+
+def walk(db, table_name, order_by, order, limit=7):
+    # Percorre todas as páginas como o PagedTableModel: a próxima começa depois do último (valor, id)
+    ids = []
+    page = db.fetch_page(table_name, limit=limit, order=order, order_by=order_by)
+    while not page.empty:
+        ids.extend(page["id"])
+        last = page.iloc[-1]
+        value = None if pd.isna(last[order_by]) else last[order_by].item()
+        page = db.fetch_page(table_name, after_id=int(last["id"]), limit=limit, order=order,
+                             order_by=order_by, after_value=value)
+    return ids
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_fetch_page_sorted_by_nullable_column(db, order):
+    # Vendas sem cliente: os NULL ficam antes dos valores na ordem crescente (como no SQLite), e nenhuma linha se perde
+    with db.transaction():
+        for day in range(1, 6):
+            db.cursor.execute("INSERT INTO Sales (customer_id, total_value, sale_date) VALUES (NULL, 1.0, ?)", (f"2030-03-0{day}",))
+    db.cursor.execute("SELECT id, customer_id FROM Sales")
+    rows = db.cursor.fetchall()
+    expected = [row[0] for row in sorted(rows, key=lambda row: (row[1] is not None, row[1] or 0, row[0]))]
+    if order == "desc":
+        expected.reverse()
+    assert walk(db, "Sales", "customer_id", order) == expected
@@ -0,0 +1,84 @@
+import pytest
+
+from database_manager import InsufficientStockError, group_quantities, stock_shortfalls
+from sales_processor import SalesProcessor
+
+
+def stock_of(db, product_id):
+    db.cursor.execute("SELECT stock FROM Product WHERE id = ?", (product_id,))
+    return db.cursor.fetchone()[0]
+
+
+def test_group_quantities_and_shortfalls():
+    requested = group_quantities([("A", 1), ("B", 2), ("A", 3)])
+    assert requested == {"A": 4, "B": 2}
+    products = {"A": (1, 3, 2.0, 1.0), "B": (2, 5, 2.0, 1.0)}
+    assert stock_shortfalls(requested, products) == {"A": (4, 3)}
+    assert stock_shortfalls({"C": 1}, products) == {"C": (1, None)}
+
+
+def test_decrement_stock_bulk(db, product):
+    a, b = product("STK-A", stock=5), product("STK-B", stock=2)
+    db.decrement_stock_bulk({a.id: 5, b.id: 1})
+    assert (stock_of(db, a.id), stock_of(db, b.id)) == (0, 1)
+
+
+def test_decrement_stock_bulk_is_all_or_nothing(db, product):
+    a, b = product("STK-A", stock=5), product("STK-B", stock=2)
+    with pytest.raises(InsufficientStockError) as error:
+        db.decrement_stock_bulk({a.id: 1, b.id: 3, 999999: 1})
+    assert error.value.shortfalls == {"STK-B": (3, 2), 999999: (1, None)}
+    # A baixa de STK-A, feita antes da falha, foi desfeita
+    assert (stock_of(db, a.id), stock_of(db, b.id)) == (5, 2)
+
+
+def test_decrement_failure_keeps_outer_transaction(db, product, count):
+    # O SAVEPOINT desfaz apenas a baixa; quem trata o erro decide o destino da transação
+    a = product("STK-A", stock=1)
+    customers = count("Customer")
+    with db.transaction():
+        db.insert_customer(name="Cliente", cpf="", email="", phone="")
+        with pytest.raises(InsufficientStockError):
+            db.decrement_stock_bulk({a.id: 2})
+    assert count("Customer") == customers + 1
+    assert stock_of(db, a.id) == 1
+
+
+
+def test_decrement_is_rolled_back_with_outer_transaction(db, product):
+    # A baixa é o primeiro comando da transação: o RELEASE do SAVEPOINT não pode fazer commit dela
+    a = product("STK-A", stock=5)
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.decrement_stock_bulk({a.id: 2})
+            raise RuntimeError("falha depois da baixa")
+    assert stock_of(db, a.id) == 5
+
+def test_oversold_checkout_changes_nothing(db, product, count):
+    a, b = product("STK-A", stock=5), product("STK-B", stock=2)
+    sales, lines = count("Sales"), count("SalesProduct")
+    # A mesma mercadoria em duas linhas: as quantidades são somadas antes da validação
+    with pytest.raises(InsufficientStockError) as error:
+        db.insert_full_sale(1, 10.0, 2.0, "2030-01-01", [("STK-A", 1), ("STK-B", 2), ("STK-B", 1)])
+    assert error.value.shortfalls == {"STK-B": (3, 2)}
+    assert (stock_of(db, a.id), stock_of(db, b.id)) == (5, 2)
+    assert (count("Sales"), count("SalesProduct")) == (sales, lines)
+
+
+def test_checkout_records_sale_and_stock(db_path):
+    processor = SalesProcessor(db_name=db_path)
+    try:
+        db = processor.db
+        db.insert_product(name="Produto", description="", code="STK-A", purchase_price=1.0, sale_price=2.5, stock=5)
+        # Produto em memória antes da venda: o estoque do catálogo é relido depois dela
+        assert processor.get_product("STK-A").stock == 5
+        sale_id = processor.checkout([("STK-A", 2), ("STK-A", 1)], 1, 7.5, 4.5, 1, 1, 0.0, 0.0)
+        product = processor.get_product("STK-A")
+        assert product.stock == 2
+        # O banco de exemplo tem itens antigos que apontam para ids de vendas futuras
+        lines = [line for line in db.fetch_rows("SalesProduct", sale_id, "sale_id") if line.product_id == product.id]
+        assert [(line.quantity, line.unit_price) for line in lines] == [(2, 2.5), (1, 2.5)]
+        assert processor.check_stock("STK-A", 2) and not processor.check_stock("STK-A", 3)
+        assert processor.check_stock_batch([("STK-A", 2), ("STK-A", 1), ("NADA", 1)]) == {"STK-A": (3, 2), "NADA": (1, None)}
+    finally:
+        processor.close()
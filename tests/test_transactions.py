@@ -0,0 +1,99 @@
+import sqlite3
+import threading
+
+import pytest
+
+import database_manager
+from database_manager import is_busy
+
+
+def busy_error():
+    error = sqlite3.OperationalError("database is locked")
+    error.sqlite_errorcode = sqlite3.SQLITE_BUSY
+    return error
+
+
+@pytest.fixture
+def blocker(db_path):
+    # Outra conexão (outro caixa) segurando o lock de escrita do banco
+    connection = sqlite3.connect(db_path, check_same_thread=False)
+    connection.execute("BEGIN IMMEDIATE")
+    yield connection
+    connection.rollback()
+    connection.close()
+
+
+def test_transaction_commits_all_operations(db, count):
+    customers = count("Customer")
+    with db.transaction():
+        db.insert_customer(name="Cliente A", cpf="1", email="", phone="")
+        db.insert_customer(name="Cliente B", cpf="2", email="", phone="")
+    assert count("Customer") == customers + 2
+
+
+def test_transaction_rolls_back_on_error(db, count):
+    customers, logs = count("Customer"), count("Logs")
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.insert_customer(name="Cliente A", cpf="1", email="", phone="")
+            with db.transaction():
+                db.insert_customer(name="Cliente B", cpf="2", email="", phone="")
+            raise RuntimeError("falha no meio da transação")
+    db.flush_logs()
+    assert count("Customer") == customers
+    # As operações desfeitas também não geram log
+    assert count("Logs") == logs
+
+
+def test_write_transaction_retries_busy_without_duplicates(db, count):
+    customers = count("Customer")
+    attempts = []
+
+    def work():
+        db.insert_customer(name="Cliente retry", cpf="3", email="", phone="")
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise busy_error()
+        return "ok"
+
+    assert db.write_transaction(work) == "ok"
+    assert len(attempts) == 2
+    # A primeira tentativa foi desfeita antes de a transação ser refeita
+    assert count("Customer") == customers + 1
+
+
+def test_write_transaction_waits_for_other_connection(db, blocker, count, monkeypatch):
+    monkeypatch.setattr(database_manager, "BUSY_BACKOFF", 0.02)
+    db.cursor.execute("PRAGMA busy_timeout = 0")
+    customers = count("Customer")
+    release = threading.Timer(0.1, blocker.commit)
+    release.start()
+    try:
+        db.write_transaction(db.insert_customer, name="Cliente lock", cpf="4", email="", phone="")
+    finally:
+        release.join()
+    assert count("Customer") == customers + 1
+
+
+def test_write_transaction_gives_up_when_still_busy(db, blocker, count, monkeypatch):
+    monkeypatch.setattr(database_manager, "BUSY_RETRIES", 2)
+    monkeypatch.setattr(database_manager, "BUSY_BACKOFF", 0)
+    db.cursor.execute("PRAGMA busy_timeout = 0")
+    customers = count("Customer")
+    with pytest.raises(sqlite3.OperationalError) as error:
+        db.write_transaction(db.insert_customer, name="Cliente lock", cpf="5", email="", phone="")
+    assert is_busy(error.value)
+    assert not db.connection.in_transaction
+    assert count("Customer") == customers
+
+
+def test_write_transaction_does_not_retry_other_errors(db):
+    attempts = []
+
+    def work():
+        attempts.append(1)
+        raise sqlite3.OperationalError("no such table: Nada")
+
+    with pytest.raises(sqlite3.OperationalError):
+        db.write_transaction(work)
+    assert len(attempts) == 1
@@ -0,0 +1,127 @@
+import pytest
+
+
+def rollups(db):
+    # Conteúdo dos resumos, com os valores arredondados (somas e subtrações de REAL acumulam resíduos)
+    db.cursor.execute("SELECT sale_date, payment, ROUND(revenue, 6), ROUND(profit, 6), sale_count FROM DailySales ORDER BY 1, 2")
+    daily = db.cursor.fetchall()
+    db.cursor.execute("SELECT sale_date, product_id, quantity, ROUND(revenue, 6), ROUND(profit, 6) FROM ProductDailySales ORDER BY 1, 2")
+    return daily, db.cursor.fetchall()
+
+
+def assert_rollups_match_rebuild(db):
+    maintained = rollups(db)
+    db.rebuild_rollups()
+    assert maintained == rollups(db)
+
+
+def version(db, name):
+    return db.fetch_data_version(name)
+
+
+@pytest.fixture
+def sales(db, product):
+    # Três vendas em dois dias e duas formas de pagamento, com produtos próprios do teste
+    a = product("TRG-A", stock=100, sale_price=5.0, purchase_price=3.0)
+    b = product("TRG-B", stock=100, sale_price=8.0, purchase_price=2.5)
+    ids = [
+        db.insert_full_sale(1, 18.0, 7.0, "2030-01-01", [("TRG-A", 2), ("TRG-B", 1)], payment=1),
+        db.insert_full_sale(1, 16.0, 11.0, "2030-01-01", [("TRG-B", 2)], payment=2),
+        db.insert_full_sale(2, 15.0, 6.0, "2030-01-02", [("TRG-A", 3)], payment=1),
+    ]
+    return ids, a, b
+
+
+def test_new_sales_update_rollups(db, sales):
+    db.cursor.execute("SELECT revenue, sale_count FROM DailySales WHERE sale_date = '2030-01-01' AND payment = 1")
+    assert db.cursor.fetchone() == (18.0, 1)
+    assert_rollups_match_rebuild(db)
+
+
+def test_sale_update_moves_rollups(db, sales):
+    ids, _, _ = sales
+    with db.transaction():
+        db.cursor.execute("UPDATE Sales SET sale_date = '2030-01-03', payment = 3, total_value = 20.0 WHERE id = ?", (ids[0],))
+    assert_rollups_match_rebuild(db)
+
+
+def test_sale_delete_updates_rollups(db, sales):
+    ids, _, _ = sales
+    db.delete_sale(ids[2])
+    db.cursor.execute("SELECT COUNT(*) FROM DailySales WHERE sale_date = '2030-01-02'")
+    assert db.cursor.fetchone()[0] == 0
+    assert_rollups_match_rebuild(db)
+
+
+def test_sales_product_changes_update_rollups(db, sales):
+    ids, a, b = sales
+    db.cursor.execute("SELECT id FROM SalesProduct WHERE sale_id = ? AND product_id IN (?, ?) ORDER BY id", (ids[0], a.id, b.id))
+    first, second = [row[0] for row in db.cursor.fetchall()]
+    db.update_sales_product(first, quantity=5)
+    assert_rollups_match_rebuild(db)
+    db.update_sales_product(second, sale_id=ids[2], product_id=a.id)
+    assert_rollups_match_rebuild(db)
+    db.delete_sales_product(first)
+    assert_rollups_match_rebuild(db)
+
+
+def test_items_outside_their_sale_update_rollups(db, product):
+    # Itens gravados antes da venda passam a contar quando ela é inserida, e deixam de contar
+    # quando ela é removida sem os itens
+    item = product("TRG-C", stock=10)
+    db.cursor.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM sqlite_sequence WHERE name = 'Sales'")
+    sale_id = db.cursor.fetchone()[0]
+    with db.transaction():
+        db.cursor.execute("INSERT INTO SalesProduct (sale_id, product_id, quantity) VALUES (?, ?, 4)", (sale_id, item.id))
+        db.cursor.execute("INSERT INTO Sales (id, customer_id, total_value, sale_date) VALUES (?, 1, 8.0, '2030-02-01')", (sale_id,))
+    assert_rollups_match_rebuild(db)
+    with db.transaction():
+        db.cursor.execute("DELETE FROM Sales WHERE id = ?", (sale_id,))
+    assert_rollups_match_rebuild(db)
+
+
+def test_search_index_follows_product_changes(db, product):
+    created = product("FTS-1")
+    assert list(db.search_text("Product", "produto fts")["id"]) == [created.id]
+
+    # O nome antigo sai do índice; o código continua indexado
+    db.update_product(created.id, name="Caderno espiral")
+    assert list(db.search_text("Product", "caderno")["id"]) == [created.id]
+    assert created.id not in list(db.search_text("Product", "produto")["id"])
+    assert list(db.search_text("Product", "fts")["id"]) == [created.id]
+
+    db.delete_product(created.id)
+    assert db.search_text("Product", "caderno").empty
+
+
+def test_search_index_follows_customer_changes(db):
+    db.insert_customer(name="Joana Prado", cpf="000", email="joana@example.com", phone="")
+    found = db.search_text("Customer", "joa pra")
+    assert list(found["name"]) == ["Joana Prado"]
+    db.update_customer(int(found["id"][0]), name="Joana Lima")
+    assert db.search_text("Customer", "prado").empty
+    assert list(db.search_text("Customer", "lima")["name"]) == ["Joana Lima"]
+
+
+def test_data_versions(db, sales, product):
+    ids, a, _ = sales
+    sales_version, product_version, catalog_version = version(db, "Sales"), version(db, "Product"), version(db, "Catalog")
+
+    # Venda nova: o painel a encontra pelo id, a versão "Sales" não muda; a baixa de estoque não muda o cadastro
+    db.insert_full_sale(1, 5.0, 2.0, "2030-01-04", [("TRG-A", 1)])
+    assert version(db, "Sales") == sales_version
+    assert version(db, "Product") > product_version
+    assert version(db, "Catalog") == catalog_version
+
+    # Venda editada: o painel precisa ser recalculado
+    with db.transaction():
+        db.cursor.execute("UPDATE Sales SET total_value = 1.0 WHERE id = ?", (ids[0],))
+    assert version(db, "Sales") == sales_version + 1
+
+    # O preço muda o cadastro ("Catalog"); o estoque sozinho não
+    with db.transaction():
+        db.cursor.execute("UPDATE Product SET sale_price = 9.0 WHERE id = ?", (a.id,))
+    assert version(db, "Catalog") == catalog_version + 1
+    with db.transaction():
+        db.cursor.execute("UPDATE Product SET stock = stock + 5 WHERE id = ?", (a.id,))
+    assert version(db, "Catalog") == catalog_version + 1